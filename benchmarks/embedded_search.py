@@ -0,0 +1,92 @@
+"""
+Benchmark of `EmbeddedSearchRepository` - index build time, memory and query latency on synthetic products.
+
+Product names are drawn from a fixed vocabulary, queries are one or two words with the last one cut to a prefix,
+as typed in the search box. The benchmark does not need a running database or Meilisearch.
+
+Run:
+    python -m benchmarks.embedded_search --documents 1000000 --queries 1000
+"""
+
+import argparse
+import asyncio
+import random
+import resource
+import string
+from time import perf_counter
+
+from loguru import logger
+
+from src.modules.product.infra.repo.embedded.product import ProductEmbeddedSearchEngineRepo
+
+
+def build_vocabulary(words: int, rng: random.Random) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(words)]
+
+
+def build_documents(documents: int, vocabulary: list[str], rng: random.Random) -> list[dict]:
+    brands = vocabulary[:500]
+    categories = vocabulary[500:600]
+    return [
+        {
+            "id": str(i),
+            "name": " ".join(rng.choices(vocabulary, k=3)),
+            "brand": rng.choice(brands),
+            "groups": None,
+            "category": rng.choice(categories),
+        }
+        for i in range(documents)
+    ]
+
+
+def build_queries(queries: int, vocabulary: list[str], rng: random.Random) -> list[str]:
+    result = []
+    for _ in range(queries):
+        words = rng.choices(vocabulary, k=rng.randint(1, 2))
+        words[-1] = words[-1][: rng.randint(3, len(words[-1]))]
+        result.append(" ".join(words))
+    return result
+
+
+async def run(documents: int, queries: int, vocabulary_size: int, batch_size: int) -> None:
+    # per search info log would dominate the measured latency
+    logger.remove()
+    rng = random.Random(0)
+    vocabulary = build_vocabulary(vocabulary_size, rng)
+    docs = build_documents(documents, vocabulary, rng)
+    search_queries = build_queries(queries, vocabulary, rng)
+
+    # linux reports max rss in kilobytes
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    start = perf_counter()
+    for idx in range(0, documents, batch_size):
+        await search_repo.aupsert_documents(documents=docs[idx : idx + batch_size])
+    indexed = perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    await search_repo.asearch(search_queries[0])
+    latencies = []
+    hits = 0
+    for query in search_queries:
+        start = perf_counter()
+        hits += len(await search_repo.asearch(query, limit=20))
+        latencies.append(perf_counter() - start)
+    latencies.sort()
+
+    print(f"documents: {documents}, vocabulary: {vocabulary_size}, queries: {queries}")
+    print(f"index    : {indexed:8.2f} s ({documents / indexed:.0f} docs/s)")
+    print(f"memory   : {rss_after - rss_before:8.0f} MB rss growth (documents included)")
+    print(f"p50      : {latencies[len(latencies) // 2] * 1000:8.3f} ms")
+    print(f"p99      : {latencies[int(len(latencies) * 0.99)] * 1000:8.3f} ms")
+    print(f"hits     : {hits / queries:8.1f} per query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.queries, args.vocabulary, args.batch_size))
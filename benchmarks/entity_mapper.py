@@ -0,0 +1,91 @@
+"""
+Benchmark of `TortoiseRepo._to_entity` - legacy reflection based mapping vs compiled `EntityMapper`.
+
+Rows are built with `Model._init_from_db` (the same path tortoise uses for fetched rows),
+so the benchmark does not need a running database.
+
+Run:
+    python -m benchmarks.entity_mapper --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import timeit
+from datetime import datetime, timezone
+
+from tortoise import Tortoise
+from uuid6 import uuid6
+
+from src.config import TORTOISE_CONFIG
+from src.core.domain.value_object import PrecisedFloat
+from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+
+
+def legacy_to_entity(record):
+    """Copy of the previous `TortoiseRepo._to_entity` implementation."""
+
+    def convert_value(value):
+        if isinstance(value, float):
+            return PrecisedFloat(value)
+        return value
+
+    def should_be_skipped(key: str) -> bool:
+        return key in ["_partial", "_saved_in_db", "_custom_generated_pk"]
+
+    if record:
+        _dict = {
+            (key[1:] if key.startswith("_") else key): convert_value(value)
+            for key, value in vars(record).items()
+            if not should_be_skipped(key)
+        }
+        return ProductTortoiseRepo.entity(**_dict)
+
+    return None
+
+
+def build_records(rows: int) -> list:
+    now = datetime.now(tz=timezone.utc)
+    return [
+        ProductTortoiseRepo.model._init_from_db(
+            id=uuid6(),
+            created_at=now,
+            updated_at=now,
+            code=i,
+            name=f"product {i}",
+            quantity="100 g",
+            brand="brand",
+            size=None,
+            groups="group",
+            category="category",
+            energy_kcal_100g=123.456,
+            fat_100g=1.234,
+            carbohydrates_100g=12.345,
+            sugars_100g=None,
+            proteins_100g=5.678,
+            user_id=None,
+        )
+        for i in range(rows)
+    ]
+
+
+def main(rows: int, repeat: int) -> None:
+    asyncio.run(Tortoise.init(config=TORTOISE_CONFIG))
+    records = build_records(rows)
+
+    assert [legacy_to_entity(r) for r in records[:10]] == ProductTortoiseRepo._mapper.to_entities(records[:10])
+
+    legacy = min(timeit.repeat(lambda: [legacy_to_entity(r) for r in records], number=1, repeat=repeat))
+    compiled = min(timeit.repeat(lambda: ProductTortoiseRepo._mapper.to_entities(records), number=1, repeat=repeat))
+
+    print(f"rows: {rows}, best of {repeat}")
+    print(f"legacy   : {legacy * 1000:8.2f} ms ({legacy / rows * 1e6:.2f} us/row)")
+    print(f"compiled : {compiled * 1000:8.2f} ms ({compiled / rows * 1e6:.2f} us/row)")
+    print(f"speedup  : {legacy / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(rows=args.rows, repeat=args.repeat)
@@ -0,0 +1,92 @@
+"""
+Benchmark of password hashing off the event loop - latency of an unrelated endpoint during a login storm.
+
+In-process FastAPI app (called through httpx ASGI transport) has `POST /login` verifying a bcrypt password
+and `GET /ping` doing no work. Concurrent clients log in for `--seconds` while another client pings,
+ping p50 / p99 show how much logins stall other requests. With `--blocking` passwords are verified
+on the event loop (as before `WorkerPool`). The benchmark does not need a running database.
+
+Run:
+    python -m benchmarks.login_storm --logins 32 --seconds 10
+    python -m benchmarks.login_storm --logins 32 --seconds 10 --blocking
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+
+import httpx
+from fastapi import FastAPI
+
+from src.modules.auth.domain.entity.user import User, password_pool
+
+PASSWORD = "password"
+
+
+def build_app(user: User, blocking: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login() -> bool:
+        if blocking:
+            return user.correct_password(PASSWORD)
+        return await user.acorrect_password(PASSWORD)
+
+    @app.get("/ping")
+    async def ping() -> str:
+        return "pong"
+
+    return app
+
+
+async def storm(client: httpx.AsyncClient, deadline: float) -> int:
+    logins = 0
+    while perf_counter() < deadline:
+        await client.post("/login")
+        logins += 1
+        # in-process transport doesn't wait for network, let other requests in like a socket read would
+        await asyncio.sleep(0)
+    return logins
+
+
+async def pings(client: httpx.AsyncClient, deadline: float, interval: float) -> list[float]:
+    # latency is measured from the time the ping was due, so time the loop was blocked before sending counts too
+    latencies = []
+    due = perf_counter()
+    while due < deadline:
+        await asyncio.sleep(max(0.0, due - perf_counter()))
+        await client.get("/ping")
+        latencies.append(perf_counter() - due)
+        due += interval
+    return latencies
+
+
+async def run(logins: int, seconds: float, workers: int, blocking: bool) -> None:
+    password_pool.configure(max_workers=workers)
+    user = User.create(username="user", password=PASSWORD, email="user@no.com")
+    transport = httpx.ASGITransport(app=build_app(user, blocking))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = perf_counter() + seconds
+        results = await asyncio.gather(
+            pings(client, deadline, interval=0.01),
+            *(storm(client, deadline) for _ in range(logins)),
+        )
+    latencies, done = sorted(results[0]), sum(results[1:])
+    password_pool.shutdown()
+
+    print(f"mode     : {'blocking' if blocking else f'worker pool ({workers} processes)'}, {logins} login clients")
+    print(f"logins   : {done / seconds:8.1f} /s")
+    print(f"ping p50 : {latencies[len(latencies) // 2] * 1000:8.3f} ms")
+    print(f"ping p99 : {latencies[int(len(latencies) * 0.99)] * 1000:8.3f} ms")
+    print(f"ping max : {latencies[-1] * 1000:8.3f} ms ({len(latencies)} pings)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.seconds, args.workers, args.blocking))
@@ -0,0 +1,76 @@
+"""
+Benchmark of `PrefixSuggestRepository` - typeahead latency on synthetic products with skewed popularity.
+
+Queries are prefixes (1 - 8 characters) of product names and brands, as typed keystroke by keystroke.
+The benchmark does not need a running database.
+
+Run:
+    python -m benchmarks.suggest --documents 1000000 --queries 10000
+"""
+
+import argparse
+import asyncio
+import random
+from time import perf_counter
+
+from benchmarks.embedded_search import build_documents, build_vocabulary
+from src.modules.product.infra.repo.suggest.product import ProductSuggestRepo
+
+
+class SyntheticSuggestRepo(ProductSuggestRepo):
+    def __init__(self, popularity: dict[str, int] | None = None):
+        super().__init__()
+        self._synthetic_popularity = popularity or {}
+
+    async def apopularity(self) -> dict[str, int]:
+        return self._synthetic_popularity
+
+
+async def batches(documents: list[dict], batch_size: int):
+    for idx in range(0, len(documents), batch_size):
+        yield documents[idx : idx + batch_size]
+
+
+async def run(documents: int, queries: int, vocabulary_size: int) -> None:
+    rng = random.Random(0)
+    vocabulary = build_vocabulary(vocabulary_size, rng)
+    docs = build_documents(documents, vocabulary, rng)
+    popularity = {str(i): int(rng.paretovariate(1.2)) for i in range(documents)}
+
+    suggest_repo = SyntheticSuggestRepo(popularity)
+    start = perf_counter()
+    await suggest_repo.areindex(batches(docs, 1000))
+    indexed = perf_counter() - start
+
+    typed = []
+    for document in rng.choices(docs, k=queries // 4):
+        text = rng.choice([document["name"], document["brand"]])
+        typed.extend(text[:n] for n in rng.sample(range(1, min(len(text), 8) + 1), k=min(len(text), 4)))
+
+    # the first keystroke of a short prefix ranks its whole range, later ones read cached top
+    start = perf_counter()
+    for query in typed:
+        await suggest_repo.asearch(query)
+    cold = perf_counter() - start
+
+    latencies = []
+    for query in typed:
+        start = perf_counter()
+        await suggest_repo.asearch(query)
+        latencies.append(perf_counter() - start)
+    latencies.sort()
+
+    print(f"documents: {documents}, queries: {len(typed)}")
+    print(f"index    : {indexed:8.2f} s")
+    print(f"cold     : {cold / len(typed) * 1000:8.3f} ms mean (first pass)")
+    print(f"p50      : {latencies[len(latencies) // 2] * 1000:8.3f} ms")
+    print(f"p99      : {latencies[int(len(latencies) * 0.99)] * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.queries, args.vocabulary))
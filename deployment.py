@@ -19,6 +19,7 @@ COMMANDS: dict[str, list[str]] = {
         "docker-compose -f docker-compose.testdb.yml stop",
         "docker-compose -f docker-compose.testdb.yml rm -f test_db",
         "docker-compose -f docker-compose.testdb.yml rm -f test_meilisearch",
+        "docker-compose -f docker-compose.testdb.yml rm -f test_redis",
     ],
     "test_db": ["docker-compose -f docker-compose.testdb.yml up -d test_db"],
     "db": ["docker-compose -f docker-compose.yml up -d db"],
@@ -134,6 +135,50 @@ def migrate_manual(migration: str):
     return MigrationApplier(migration).apply()
 
 
+@app.command()
+def reindex(index: Optional[str] = None, batch_size: int = 1000, concurrency: int = 4):
+    """
+    Rebuild product / recipe search indexes (all or the given one) from database.
+    """
+    from tortoise import Tortoise
+
+    from src.config import TORTOISE_CONFIG
+    from src.config.di import AppContainer
+    from src.core.infra.reindex import areindex
+    from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+    from src.modules.recipe.infra.repo.postgres.recipe import RecipeTortoiseRepo
+
+    container = AppContainer()
+    targets = [
+        (ProductTortoiseRepo, container.product.meili_search_repo()),
+        (RecipeTortoiseRepo, container.recipe.meili_search_repo()),
+    ]
+    if index:
+        targets = [(repository, search_repo) for repository, search_repo in targets if search_repo.INDEX == index]
+        if not targets:
+            typer.echo(f"{typer.style('Error', fg=typer.colors.RED, bold=True)}: unknown index {index}")
+            sys.exit(1)
+
+    async def _reindex():
+        await Tortoise.init(config=TORTOISE_CONFIG)
+        try:
+            for repository, search_repo in targets:
+                report = await areindex(
+                    repository,
+                    search_repo,
+                    batch_size=batch_size,
+                    concurrency=concurrency,
+                    full_documents=container.raw_api_config.SEARCH_SERVED_LISTS,
+                )
+                typer.echo(f"{typer.style('Reindexed', fg=typer.colors.GREEN, bold=True)} {report}")
+        finally:
+            for _, search_repo in targets:
+                await search_repo.aclose()
+            await Tortoise.close_connections()
+
+    asyncio.run(_reindex())
+
+
 @app.command()
 def bootstrap():
     run_commands(["docker-compose down"])
@@ -9,11 +9,16 @@ from loguru import logger
 from tortoise.contrib.fastapi import register_tortoise
 
 # important stuff
+from src.api.middleware import RequestScopeMiddleware
+from src.api.monitoring import router as monitoring_router
 from src.api.response import ErrorResponse
 from src.api.router_util import include_routers
 from src.config import TORTOISE_CONFIG, settings
 from src.config.di import AppContainer
+from src.core.controller.crud import NEXT_CURSOR_HEADER
 from src.core.domain.errors import Error
+from src.core.infra.repo.embeddedsearchrepo import EMBEDDED
+from src.modules.auth.domain.entity.user import password_pool
 
 # controllers
 from src.modules.auth.controller import UserViewSet
@@ -32,6 +37,7 @@ container.wire(
         "src.modules.product.controller.product",
         "src.modules.product.controller.consumption",
         "src.modules.recipe.controller",
+        "src.api.monitoring",
         # ToDo: fix "api.routers.chat",
     ]
 )
@@ -55,6 +61,7 @@ include_routers(
         RecipeViewSet(),
         # Routers
         consumption_router,
+        monitoring_router,
         # ToDo: fix ChannelsViewSet(),
         # ToDo: fix ChatRouter,
     ],
@@ -103,7 +110,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(RequestScopeMiddleware)
 
 # ToDo: Figure out middleware for ws
 
@@ -121,6 +130,57 @@ register_tortoise(
     generate_schemas=False,
     add_exception_handlers=False,
 )
+
+###  Search engine sync ######
+
+
+@app.on_event("startup")
+async def apply_search_settings() -> None:
+    # filters and sort of Meilisearch work only on fields declared in index settings
+    if settings.SEARCH_ENGINE == EMBEDDED:
+        return
+    for search_repo in (container.product.meili_search_repo(), container.recipe.meili_search_repo()):
+        try:
+            await search_repo.aapply_settings()
+        except Exception as e:
+            logger.error(f"Error applying settings of {search_repo.INDEX} search index: {e}")
+
+
+@app.on_event("startup")
+async def start_outbox_relay() -> None:
+    container.outbox_relay().start()
+    # in-process indexes (typeahead, embedded search engine) are built in background while requests are served
+    container.outbox_feed().start()
+
+
+@app.on_event("startup")
+async def configure_password_pool() -> None:
+    password_pool.configure(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
+@app.on_event("startup")
+async def start_token_revocations() -> None:
+    container.auth.revocations().start()
+
+
+@app.on_event("shutdown")
+async def close_token_revocations() -> None:
+    await container.auth.revocations().aclose()
+
+
+@app.on_event("shutdown")
+async def shutdown_password_pool() -> None:
+    password_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_search_clients() -> None:
+    await container.outbox_relay().aclose()
+    await container.outbox_feed().aclose()
+    for search_repo in (container.product.search_repo(), container.recipe.search_repo()):
+        await search_repo.aclose()
+
+
 ### LogFire ######
 
 instrument_fastapi(app=app)
@@ -0,0 +1,23 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.infra.repo.identity_map import IdentityMap
+from src.core.infra.router import ReadYourWrites
+
+
+class RequestScopeMiddleware:
+    """
+    Open request scoped state for every http request:
+        * fresh identity map, so an entity is read from db only once per request,
+        * read-your-writes flag, so reads after a write of the request are not served by lagging replica.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with IdentityMap.scope(), ReadYourWrites.scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,28 @@
+from dependency_injector.wiring import inject
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from src.config.di import AppContainer
+from src.core.app.service import IAuthService
+from src.core.controller.di import dependency
+from src.core.domain.errors import BadPermissions
+from src.core.utils.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["monitoring"])
+
+
+@router.get("/")
+@inject
+async def get_metrics(
+    token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+    auth_service: IAuthService = dependency(AppContainer.auth.auth_service),
+) -> dict[str, float]:
+    """
+    Get in-process counters and gauges, e.g. identity map `identity_map.hits` / `identity_map.misses`.
+
+    Only for admins.
+    """
+    user = await auth_service.authorize(token.credentials)
+    if not user.is_admin:
+        raise BadPermissions(message="Only admins can read metrics")
+    return metrics.snapshot()
@@ -1,9 +1,13 @@
 from dependency_injector import containers, providers
 
 from src.config.config import ApiConfig
+from src.core.infra.outbox import OutboxRelay
+from src.core.infra.outbox_feed import OutboxFeed
 from src.modules.auth.di import AuthContainer
 from src.modules.product.di import ProductContainer, ConsumptionContainer
+from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
 from src.modules.recipe.di import RecipeContainer
+from src.modules.recipe.infra.repo.postgres.recipe import RecipeTortoiseRepo
 
 
 class AppContainer(containers.DeclarativeContainer):
@@ -42,3 +46,38 @@ class AppContainer(containers.DeclarativeContainer):
         api_config=raw_api_config,
         product_service=product.service,
     )
+
+    ### SEARCH INDEX SYNC ###
+    outbox_relay = providers.Singleton(
+        OutboxRelay,
+        repositories=providers.List(
+            providers.Object(ProductTortoiseRepo),
+            providers.Object(RecipeTortoiseRepo),
+        ),
+        # in-process search engines are followed by every process instead
+        search_repos=providers.Selector(
+            container_config.SEARCH_ENGINE,
+            meilisearch=providers.List(product.search_repo, recipe.search_repo),
+            embedded=providers.List(),
+        ),
+        batch_size=raw_api_config.SEARCH_INDEX_BATCH_SIZE,
+        poll_interval=raw_api_config.SEARCH_OUTBOX_POLL_INTERVAL,
+        lease=raw_api_config.SEARCH_OUTBOX_LEASE,
+        retention=raw_api_config.SEARCH_OUTBOX_RETENTION,
+        full_documents=raw_api_config.SEARCH_SERVED_LISTS,
+    )
+    # in-process indexes of this app process follow every outbox row
+    outbox_feed = providers.Singleton(
+        OutboxFeed,
+        repositories=providers.List(
+            providers.Object(ProductTortoiseRepo),
+            providers.Object(RecipeTortoiseRepo),
+        ),
+        search_repos=providers.Selector(
+            container_config.SEARCH_ENGINE,
+            meilisearch=providers.List(product.suggest_repo),
+            embedded=providers.List(product.search_repo, product.suggest_repo, recipe.search_repo),
+        ),
+        poll_interval=raw_api_config.SEARCH_OUTBOX_POLL_INTERVAL,
+        retention=raw_api_config.SEARCH_OUTBOX_RETENTION,
+    )
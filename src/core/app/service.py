@@ -6,9 +6,64 @@ from loguru import logger
 from pydantic import BaseModel
 
 from src.core.domain.entity import Entity
-from src.core.domain.errors import Error, NotSupportedError
+from src.core.domain.errors import Error, NotSupportedError, ValidationError
+from src.core.domain.pagination import Cursor, Page
 from src.core.domain.repo.postgres import IPostgresRepository
-from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.repo.search_engine import FULL_DOCUMENT, ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+
+
+def search_ids(documents: list[dict]) -> list[UUID]:
+    return [UUID(str(document["id"])) for document in documents]
+
+
+def in_search_order(entities: list[Entity], ids: list[UUID]) -> list[Entity]:
+    """
+    Entities read by `id__in` sorted back to search ranking order.
+    """
+    rank = {id: idx for idx, id in enumerate(ids)}
+    return sorted(entities, key=lambda entity: rank[UUID(str(entity.id))])
+
+
+def outputs_from_search(
+    documents: list[dict], output_dto: Type[BaseModel], fields: list[str] | None = None
+) -> list[BaseModel | dict] | None:
+    """
+    Output DTOs (or sparse dicts of `fields`) built from full search documents (`FULL_DOCUMENT`),
+    None when some of documents is not full - index was not rebuilt with them yet.
+    """
+    if not all(document.get(FULL_DOCUMENT) for document in documents):
+        return None
+
+    items = [output_dto(**document) for document in documents]
+    if fields:
+        return [{name: getattr(item, name) for name in fields} for item in items]
+    return items
+
+
+def parse_search_args(
+    filters: list[str] | None, sort: list[str] | None, filter_fields: tuple[str, ...], sort_fields: tuple[str, ...]
+) -> tuple[list[SearchFilter], list[SearchSort]]:
+    """
+    :raises ValidationError: When filter or sort is malformed or its field is not allowed
+    """
+    return (
+        [SearchFilter.parse(expression, filter_fields) for expression in filters or []],
+        [SearchSort.parse(expression, sort_fields) for expression in sort or []],
+    )
+
+
+# lookups of filters applied by db when search engine is down
+_LOOKUPS = {"=": "", "!=": "__not", ">": "__gt", ">=": "__gte", "<": "__lt", "<=": "__lte"}
+
+
+def filter_lookups(filters: list[SearchFilter]) -> dict[str, str | float]:
+    return {
+        f"{search_filter.field}{_LOOKUPS[search_filter.operator]}": (
+            search_filter.number if search_filter.number is not None else search_filter.value
+        )
+        for search_filter in filters
+    }
 
 
 class ICrudService(ABC):
@@ -27,9 +82,23 @@ class ICrudService(ABC):
         skip: int,
         limit: int,
         query: str | None = None,
+        fields: list[str] | None = None,
+        filters: list[str] | None = None,
+        sort: list[str] | None = None,
     ):
         pass
 
+    @abstractmethod
+    async def get_page(
+        self, limit: int, cursor: str | None = None, skip: int = 0, fields: list[str] | None = None
+    ) -> Page:
+        pass
+
+    async def get_facets(
+        self, query: str, facets: list[str], filters: list[str] | None = None
+    ) -> dict[str, dict[str, int]]:
+        raise NotSupportedError("Facets are not implemented for this service.")
+
     @abstractmethod
     async def get_by_id(self, id: UUID):
         pass
@@ -55,14 +124,19 @@ class BaseCrudService(ICrudService):
     NOT_FOUND_ERROR = None
     DOES_NOT_EXIST_ERROR = None
     FETCH_FIELDS = None
+    # fields of `field<op>value` search filters (and facets) and of `field:asc|desc` search sort
+    SEARCH_FILTER_FIELDS: tuple[str, ...] = ()
+    SEARCH_SORT_FIELDS: tuple[str, ...] = ()
 
     def __init__(
         self,
         repository: [IPostgresRepository],
         search_repo: [ISearchRepository] = None,
+        search_served: bool = False,
     ):
         self._repository = repository
         self._search_repo: ISearchRepository = search_repo
+        self._search_served = search_served
 
     @abstractmethod
     async def create(self, input_dto, user_id: UUID = None, is_admin: bool = False): ...
@@ -73,7 +147,8 @@ class BaseCrudService(ICrudService):
         raise _exception(msg.format(id=id) if "id" in msg else msg)
 
     async def update(self, id: UUID, input_dto: BaseModel, user_id: UUID = None, is_admin=False) -> BaseModel:
-        entity: Entity = await self._repository.aget_by_id(id)
+        # changed in place below, must not be the entity shared through identity map
+        entity: Entity = await self._repository.aget_by_id(id, fresh=True)
 
         if not is_admin and (
             (hasattr(entity, "user_id") and getattr(entity, "user_id") != user_id)
@@ -81,7 +156,7 @@ class BaseCrudService(ICrudService):
         ):
             self._raise(self.NOT_RECORD_OWNER_ERROR, id=id)
 
-        entity.update(input_dto)
+        await entity.aupdate(input_dto)
         await self._repository.aupdate(entity)
 
         logger.info("Entity[{entity}] updated", entity=str(entity))
@@ -90,16 +165,7 @@ class BaseCrudService(ICrudService):
             fetch_fields=self.FETCH_FIELDS,
         )
 
-        if self._search_repo:
-            try:
-                await self._search_repo.aupdate_document(
-                    document_id=id,
-                    document=fresh_entity.snapshot,
-                )
-            except Exception as e:
-                logger.error(f"Error updating search index: {e}")
-
-        return self.OUTPUT_DTO(**self._repository.convert_snapshot(fresh_entity.snapshot))
+        return self._repository.to_dto(fresh_entity, self.OUTPUT_DTO)
 
     async def delete(self, id: UUID, user_id: UUID = None, is_admin=False) -> None:
         entity: Entity = await self._repository.aget_by_id(id)
@@ -113,39 +179,70 @@ class BaseCrudService(ICrudService):
         await self._repository.adelete(entity)
         logger.info("Entity[{entity}] deleted", entity=str(entity))
 
-        if self._search_repo:
-            try:
-                await self._search_repo.adelete_document(document_id=id)
-            except Exception as e:
-                logger.error(f"Error deleting search index: {e}")
+    def _to_output(self, entity: Entity, fields: list[str] | None = None) -> BaseModel | dict:
+        if fields:
+            return self._repository.to_sparse(entity, fields)
+        return self._repository.to_dto(entity, self.OUTPUT_DTO)
 
     async def get_all(
         self,
         skip: int,
         limit: int,
         query: str | None = None,
-    ) -> list[BaseModel]:
-        if query and not self._search_repo:
+        fields: list[str] | None = None,
+        filters: list[str] | None = None,
+        sort: list[str] | None = None,
+    ) -> list[BaseModel | dict]:
+        """
+        Get instances, found by search engine when `query`, `filters` or `sort` is given - `skip` / `limit` page
+        search results, which are read from db in search ranking order. With `search_served` they are built
+        straight from full search documents, db is read only when index doesn't have them yet.
+        When search engine fails, instances are read from db with `filters` but unranked.
+
+        With `fields` only those columns are read from db and instances are returned as sparse dicts.
+
+        :raises ValidationError: When filter or sort is malformed or its field is not allowed
+        """
+        search_filters, search_sort = parse_search_args(
+            filters, sort, self.SEARCH_FILTER_FIELDS, self.SEARCH_SORT_FIELDS
+        )
+        searched = bool(query or search_filters or search_sort)
+        if searched and not self._search_repo:
             raise NotSupportedError("Search is not implemented for this service.")
 
-        if query:
-            search_result = []
-
+        if searched:
             try:
-                search_result: list[dict] = await self._search_repo.asearch(query=query, offset=skip, limit=limit)
-            except (Exception, Exception) as e:
-                logger.error(f"Error searching: {e}")
-                entities = await self._repository.aget_all(
+                documents: list[dict] = await self._search_repo.asearch(
+                    query=query or "",
                     offset=skip,
                     limit=limit,
-                    fetch_fields=self.FETCH_FIELDS,
+                    fields_to_get=["*"] if self._search_served else None,
+                    filters=search_filters,
+                    sort=search_sort,
                 )
-            finally:
-                entities: list[Entity] = await self._repository.aget_all_from_filter(
+            except Exception as e:
+                logger.error(f"Error searching: {e}")
+                entities = await self._repository.aget_all_from_filter(
                     offset=skip,
                     limit=limit,
-                    id__in=[result.get("id") for result in search_result],
                     fetch_fields=self.FETCH_FIELDS,
+                    fields=fields,
+                    **filter_lookups(search_filters),
+                )
+            else:
+                items = outputs_from_search(documents, self.OUTPUT_DTO, fields) if self._search_served else None
+                if items is not None:
+                    return items
+
+                ids = search_ids(documents)
+                entities: list[Entity] = in_search_order(
+                    await self._repository.aget_all_from_filter(
+                        limit=len(ids),
+                        id__in=ids,
+                        fetch_fields=self.FETCH_FIELDS,
+                        fields=fields,
+                    ),
+                    ids,
                 )
 
         else:
@@ -153,8 +250,51 @@ class BaseCrudService(ICrudService):
                 offset=skip,
                 limit=limit,
                 fetch_fields=self.FETCH_FIELDS,
+                fields=fields,
             )
-        return [self.OUTPUT_DTO(**self._repository.convert_snapshot(entity.snapshot)) for entity in entities]
+        return [self._to_output(entity, fields) for entity in entities]
+
+    async def get_facets(
+        self, query: str, facets: list[str], filters: list[str] | None = None
+    ) -> dict[str, dict[str, int]]:
+        """
+        Counts of `facets` field values among instances found by search engine, empty when it fails.
+
+        :raises ValidationError: When facet is not a filter field or filter is malformed
+        """
+        if unknown := [facet for facet in facets if facet not in self.SEARCH_FILTER_FIELDS]:
+            raise ValidationError(f"Fields {', '.join(unknown)} have no facets.")
+        if not self._search_repo:
+            raise NotSupportedError("Search is not implemented for this service.")
+
+        search_filters, _ = parse_search_args(filters, None, self.SEARCH_FILTER_FIELDS, ())
+        try:
+            return await self._search_repo.afacets(query=query or "", facets=facets, filters=search_filters)
+        except Exception as e:
+            logger.error(f"Error counting facets: {e}")
+            return {}
+
+    async def get_page(
+        self, limit: int, cursor: str | None = None, skip: int = 0, fields: list[str] | None = None
+    ) -> Page[BaseModel | dict]:
+        """
+        Get page of instances ordered by `(created_at, id)`.
+
+        With `cursor` (`next_cursor` of the previous page) rows are read with keyset pagination and `skip` is ignored.
+        With `fields` only those columns are read from db and instances are returned as sparse dicts.
+        """
+        entities: list[Entity] = await self._repository.aget_all(
+            offset=skip,
+            limit=limit,
+            fetch_fields=self.FETCH_FIELDS,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            fields=fields,
+        )
+        return Page.from_entities(
+            entities,
+            items=[self._to_output(entity, fields) for entity in entities],
+            limit=limit,
+        )
 
     async def get_by_id(self, id: UUID) -> BaseModel:
         try:
@@ -165,7 +305,7 @@ class BaseCrudService(ICrudService):
         except self.DOES_NOT_EXIST_ERROR:
             self._raise(self.NOT_FOUND_ERROR, id=id)
 
-        return self.OUTPUT_DTO(**self._repository.convert_snapshot(entity.snapshot))
+        return self._repository.to_dto(entity, self.OUTPUT_DTO)
 
 
 class IAuthService(ABC):
@@ -176,4 +316,14 @@ class IAuthService(ABC):
     async def verify(self, token: str): ...
 
     @abstractmethod
-    def refresh_token(self, user: [Entity]): ...
+    async def refresh_token(self, user: [Entity]): ...
+
+    async def authorize(self, token: str):
+        """
+        Principal of the request with at least `id` and `is_admin`, services able to authorize by token alone
+        don't load the user.
+        """
+        return await self.verify(token)
+
+    async def logout(self, token: str):
+        raise NotSupportedError(message="Logout is not supported.")
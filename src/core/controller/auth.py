@@ -13,4 +13,4 @@ class AuthController:
     async def bearer_auth(
         self, token: HTTPAuthorizationCredentials = Depends(http_bearer)
     ):
-        return await self._auth_service.verify(token.credentials)
+        return await self._auth_service.authorize(token.credentials)
@@ -6,17 +6,56 @@ from uuid import UUID
 
 from classy_fastapi.route_args import EndpointDefinition
 from dependency_injector.wiring import inject
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel
 
 from src.core.app.service import ICrudService, IAuthService
 from src.core.controller.auth import AuthController
+from src.core.domain.errors import ValidationError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 OutPutModel = TypeVar("OutPutModel", bound=BaseModel)
 InPutModel = TypeVar("InPutModel", bound=BaseModel)
 
 
+def parse_fields(fields: str | None, output_dto: Type[BaseModel]) -> list[str] | None:
+    """
+    Parse sparse fieldset `?fields=id,name` - comma separated fields of the output DTO.
+
+    :raises ValidationError: When field is not in the output DTO
+    """
+    if not fields:
+        return None
+
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if unknown := [name for name in names if name not in output_dto.model_fields]:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+
+def parse_list(value: str | None) -> list[str] | None:
+    """
+    Parse comma separated query param, e.g. `?sort=energy_kcal_100g:asc,name:desc`.
+    """
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()] or None
+
+
+def sparse_response(items: list[dict], next_cursor: str | None = None) -> JSONResponse:
+    """
+    Response of sparse items, returned as is - not validated by (and filled up to) the endpoint response model.
+    """
+    response = JSONResponse(content=jsonable_encoder(items))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
 class RoutableMetav2(type):
     """This is a metaclass that converts all the methods that were marked by a route/path decorator into values on a
     class member called _endpoints that the Routable constructor then uses to add the endpoints to its router.
@@ -85,12 +124,68 @@ class BaseModelView(Generic[OutPutModel, InPutModel], metaclass=RoutableMetav2):
 
             @self.router.get("/", response_model=List[self.output_dto])
             async def list(
+                response: Response,
                 skip: int = Query(default=0, gte=0, lte=100),
                 limit: int = Query(default=100, gte=0, lte=100),
                 q: str | None = None,
+                cursor: str | None = Query(
+                    default=None,
+                    description=f"Opaque cursor from `{NEXT_CURSOR_HEADER}` header of the previous page.",
+                ),
+                fields: str | None = Query(
+                    default=None,
+                    description="Comma separated fields to return, e.g. `id,name`. Only those columns are read.",
+                ),
+                filter: List[str] | None = Query(
+                    default=None,
+                    description="Search filter `field<op>value` with =, !=, >, >=, <, <=, e.g. `fat_100g<10`. "
+                    "Repeat to combine filters.",
+                ),
+                sort: str | None = Query(
+                    default=None,
+                    description="Comma separated search sort, e.g. `proteins_100g:desc,name:asc`.",
+                ),
+            ):
+                """Basic endpoint to get list of instance. You can also use ?filter
+
+                Next page cursor is returned in `X-Next-Cursor` header, pass it as ?cursor to get the next page.
+                With ?fields=id,name only given fields of instances are returned.
+                With ?q, ?filter or ?sort instances are found by search engine (not paged by cursor),
+                facet counts of the same search are returned by `/facets` endpoint.
+                """
+                sparse_fields = parse_fields(fields, self.output_dto)
+                sort_fields = parse_list(sort)
+
+                if q or filter or sort_fields:
+                    items = await self._service.get_all(
+                        skip=skip, limit=limit, query=q or "", fields=sparse_fields, filters=filter, sort=sort_fields
+                    )
+                    return sparse_response(items) if sparse_fields else items
+
+                page = await self._service.get_page(limit=limit, cursor=cursor, skip=skip, fields=sparse_fields)
+                if sparse_fields:
+                    return sparse_response(page.items, page.next_cursor)
+                if page.next_cursor:
+                    response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+                return page.items
+
+            @self.router.get("/facets", response_model=Dict[str, Dict[str, int]])
+            async def list_facets(
+                facets: str = Query(description="Comma separated fields to count values of, e.g. `category`."),
+                q: str | None = None,
+                filter: List[str] | None = Query(
+                    default=None,
+                    description="Search filter `field<op>value` with =, !=, >, >=, <, <=, e.g. `fat_100g<10`. "
+                    "Repeat to combine filters.",
+                ),
             ):
-                """Basic endpoint to get list of instance. You can also use ?filter"""
-                return await self._service.get_all(skip=skip, limit=limit, query=q)
+                """Basic endpoint to count values of ?facets fields among instances found by search engine,
+                e.g. `{"category": {"dairy": 2}}`. Takes the same ?q and ?filter as the list endpoint.
+                """
+                facet_fields = parse_list(facets)
+                if not facet_fields:
+                    raise ValidationError("No facets given.")
+                return await self._service.get_facets(query=q or "", facets=facet_fields, filters=filter)
 
         if "create" in self.crud_methods:
             assert self.create_dto is not None and self._service is not None
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -27,6 +27,34 @@ class Entity(ABC):
     updated_at: datetime = field(kw_only=True)
     created_at: datetime = field(kw_only=True)
 
+    def __post_init__(self):
+        # fields assigned after the entity was built (loaded or created), see `changed_fields`
+        object.__setattr__(self, "_changed", set())
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        changed = self.__dict__.get("_changed")
+        if changed is not None:
+            changed.add(name)
+
+    @property
+    def changed_fields(self) -> frozenset[str] | None:
+        """
+        Fields assigned since the entity was built or last written, None when changes are not tracked.
+        """
+        changed = self.__dict__.get("_changed")
+        return frozenset(changed) if changed is not None else None
+
+    def mark_written(self, fields: Iterable[str] | None = None) -> None:
+        """
+        Forget changes of `fields` (all fields by default) once they are written to db.
+        """
+        changed = self.__dict__.get("_changed")
+        if fields is None or changed is None:
+            object.__setattr__(self, "_changed", set())
+        else:
+            changed.difference_update(fields)
+
     def __eq__(self, other: "Entity") -> bool:
         return self.id == other.id
 
@@ -72,3 +100,9 @@ class Entity(ABC):
             if getattr(self, _field) != value:
                 setattr(self, _field, value)
         return self
+
+    async def aupdate(self, input_dto: BaseModel) -> "Entity":
+        """
+        Update called by services, entities doing blocking work on update (e.g. hashing) override it.
+        """
+        return self.update(input_dto)
@@ -40,3 +40,7 @@ class NotSupportedError(DomainError):
 
 class BadPermissions(DomainError):
     STATUS_CODE = HTTPStatus.FORBIDDEN
+
+
+class TooManyRequests(DomainError):
+    STATUS_CODE = HTTPStatus.TOO_MANY_REQUESTS
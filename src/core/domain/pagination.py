@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Generic, TypeVar
+from uuid import UUID
+
+from src.core.domain.entity import Entity
+from src.core.domain.errors import ValidationError
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Keyset pagination cursor - position of the last row of a page in `(created_at, id)` order.
+
+    Clients get it only as opaque, url safe string (`encode` / `decode`).
+    """
+
+    created_at: datetime
+    id: UUID
+
+    @classmethod
+    def from_entity(cls, entity: Entity) -> "Cursor":
+        return cls(created_at=entity.created_at, id=entity.id)
+
+    def encode(self) -> str:
+        payload = json.dumps([self.created_at.isoformat(), str(self.id)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            payload = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            created_at, id = json.loads(payload)
+            return cls(created_at=datetime.fromisoformat(created_at), id=UUID(id))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValidationError(f"Invalid cursor: {value}") from e
+
+
+@dataclass
+class Page(Generic[T]):
+    """
+    Page of items with cursor to the next one, `next_cursor` is None on the last page.
+    """
+
+    items: list[T] = field(default_factory=list)
+    next_cursor: str | None = None
+
+    @classmethod
+    def from_entities(cls, entities: list[Entity], items: list[T], limit: int) -> "Page[T]":
+        next_cursor = Cursor.from_entity(entities[-1]).encode() if entities and len(entities) >= limit else None
+        return cls(items=items, next_cursor=next_cursor)
@@ -9,11 +9,31 @@ class IPostgresRepository(ABC):
     async def aget_by_id(cls, id: UUID, *args, **kwargs) -> Optional[Any]:
         pass
 
+    @classmethod
+    @abstractmethod
+    async def aget_aggregate_by_id(cls, id: UUID) -> Any:
+        pass
+
     @classmethod
     @abstractmethod
     def convert_snapshot(cls, snapshot: dict) -> Any:
         pass
 
+    @classmethod
+    @abstractmethod
+    def to_dto(cls, entity: Any, dto: Any, **extra: Any) -> Any:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def to_search_document(cls, entity: Any) -> dict[str, Any]:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def to_sparse(cls, entity: Any, fields: list[str], **extra: Any) -> dict[str, Any]:
+        pass
+
     @classmethod
     @abstractmethod
     async def aget_all(cls, limit=100, offset=0, *args, **kwargs) -> list[Any]:
@@ -43,3 +63,20 @@ class IPostgresRepository(ABC):
     @abstractmethod
     async def aget_all_from_filter(cls, *args, **kwargs) -> list[Any]:
         pass
+
+    @classmethod
+    @abstractmethod
+    async def abulk_save(cls, entities: list[Any], batch_size: Optional[int] = None) -> None:
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def abulk_update(
+        cls, entities: list[Any], fields: Optional[list[str]] = None, batch_size: Optional[int] = None
+    ) -> None:
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def abulk_delete(cls, entities: list[Any], batch_size: Optional[int] = None) -> None:
+        pass
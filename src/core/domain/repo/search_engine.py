@@ -2,6 +2,11 @@ from abc import ABC, abstractmethod
 from typing import Any
 from uuid import UUID
 
+from src.core.domain.search import SearchFilter, SearchSort
+
+# marker of search documents holding whole output of entity, see `TortoiseRepo.to_search_document`
+FULL_DOCUMENT = "full_document"
+
 
 class ISearchRepository(ABC):
     @abstractmethod
@@ -12,10 +17,29 @@ class ISearchRepository(ABC):
         limit: int = 100,
         fields_to_get: list[str] | None = None,
         search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
         *args,
         **kwargs,
     ) -> list[Any]:
-        pass
+        """
+        Search documents matching `query` (all documents for empty query) and every of `filters`,
+        ordered by `sort` and then by relevance.
+        """
+
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        """
+        Counts of `facets` field values among documents matching `query` and `filters`,
+        search engines without facets return no counts.
+        """
+        return {}
 
     @abstractmethod
     async def aget_create_index(self, *args, **kwargs) -> Any:
@@ -48,3 +72,27 @@ class ISearchRepository(ABC):
         **kwargs,
     ) -> None:
         pass
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        """
+        Create or replace documents, search engines with batch api should override it.
+        """
+        for document in documents:
+            await self.acreate_document(document=document)
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        """
+        Delete documents, search engines with batch api should override it.
+        """
+        for document_id in document_ids:
+            await self.adelete_document(document_id=document_id)
+
+    def invalidate(self) -> None:
+        """
+        Drop cached search results of the index, repositories with result cache should override it.
+        """
+
+    async def aclose(self) -> None:
+        """
+        Release connections held by repository, called on app shutdown.
+        """
@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from src.core.domain.errors import ValidationError
+
+_FILTER = re.compile(r"^\s*(\w+)\s*(!=|>=|<=|=|>|<)\s*(.*?)\s*$")
+_COMPARISONS = {
+    "=": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+}
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Search condition `field operator value`, e.g. `category=dairy` or `energy_kcal_100g<200`.
+
+    Values are compared as numbers when both sides are numeric, as text otherwise.
+    Search engines translate filters into their own syntax, `matches` evaluates it in-process.
+    """
+
+    field: str
+    operator: str
+    value: str
+
+    @property
+    def number(self) -> float | None:
+        return _number(self.value)
+
+    @classmethod
+    def parse(cls, expression: str, fields: Iterable[str]) -> "SearchFilter":
+        """
+        :raises ValidationError: When expression is malformed or field is not filterable
+        """
+        match = _FILTER.match(expression)
+        if not match or not match.group(3):
+            raise ValidationError(f"Invalid filter: {expression}, expected field=value (or !=, >, >=, <, <=).")
+        field, operator, value = match.groups()
+        if field not in fields:
+            raise ValidationError(f"Field {field} is not filterable.")
+        return cls(field=field, operator=operator, value=value.strip("\"'"))
+
+    def matches(self, value: Any) -> bool:
+        if value is None:
+            return self.operator == "!="
+
+        number, other = self.number, _number(value)
+        if number is not None and other is not None:
+            return _COMPARISONS[self.operator](other, number)
+        return _COMPARISONS[self.operator](str(value).casefold(), self.value.casefold())
+
+
+@dataclass(frozen=True)
+class SearchSort:
+    """
+    Search results order by `field`, parsed from `field:asc` / `field:desc`.
+    """
+
+    field: str
+    descending: bool = False
+
+    @classmethod
+    def parse(cls, expression: str, fields: Iterable[str]) -> "SearchSort":
+        """
+        :raises ValidationError: When direction is unknown or field is not sortable
+        """
+        field, _, direction = expression.strip().partition(":")
+        if direction not in ("", "asc", "desc"):
+            raise ValidationError(f"Invalid sort: {expression}, expected field:asc or field:desc.")
+        if field not in fields:
+            raise ValidationError(f"Field {field} is not sortable.")
+        return cls(field=field, descending=direction == "desc")
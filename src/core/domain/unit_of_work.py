@@ -0,0 +1,51 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+from src.core.domain.entity import Entity
+from src.core.domain.repo.postgres import IPostgresRepository
+
+
+class IUnitOfWork(ABC):
+    """
+    Unit of Work - one connection and one transaction for a whole service call.
+
+    Writes are only registered (`save` / `update` / `delete`) and sent to db in batch on `flush` / `commit`.
+    Leaving `async with` block commits the unit, exception inside it rolls everything back.
+
+    Usage:
+        async with self._unit_of_work as uow:
+            day = await self._consumption_repository.aget_by_id(day_id)
+            uow.update(self._consumption_repository, day)
+    """
+
+    @abstractmethod
+    async def __aenter__(self) -> "IUnitOfWork":
+        pass
+
+    @abstractmethod
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        pass
+
+    @abstractmethod
+    def save(self, repository: IPostgresRepository, entity: Entity) -> None:
+        pass
+
+    @abstractmethod
+    def update(self, repository: IPostgresRepository, entity: Entity) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, repository: IPostgresRepository, entity: Entity) -> None:
+        pass
+
+    @abstractmethod
+    async def flush(self) -> None:
+        pass
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
@@ -19,3 +19,22 @@ class BaseModel(Model):
 
     class Meta:
         abstract = True
+
+
+class SearchOutbox(Model):
+    """
+    Transactional outbox of search index changes - row is written by `TortoiseRepo` in the same transaction
+    as the entity change, marked relayed by `OutboxRelay` once the document is synchronised and pruned after
+    in-process indexes of app processes followed it (see `OutboxFeed`).
+    """
+
+    id = fields.BigIntField(pk=True)
+    index = fields.CharField(max_length=255)
+    document_id = fields.UUIDField(index=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    # lease of the relay sending the document, see `OutboxRelay`
+    claimed_until = fields.DatetimeField(null=True)
+    relayed_at = fields.DatetimeField(null=True, index=True)
+
+    class Meta:
+        table = "search_outbox"
@@ -0,0 +1,307 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from time import monotonic
+from typing import Optional
+from uuid import UUID
+
+from loguru import logger
+from tortoise import connections
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
+from src.core.domain.repo.postgres import IPostgresRepository
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.infra.model import SearchOutbox
+from src.core.infra.router import PRIMARY
+from src.core.utils.metrics import metrics
+
+RELAYED = "outbox.relayed"
+FAILURES = "outbox.failures"
+DEPTH = "outbox.depth"
+PRUNED = "outbox.pruned"
+
+# claims are serialised, so every claim sees the leases committed by the others
+_CLAIM_LOCK = "SELECT pg_advisory_xact_lock(hashtext('search_outbox'))"
+_CLAIM = """
+    UPDATE "search_outbox" SET "claimed_until" = now() + make_interval(secs => $2)
+    WHERE "id" IN (
+        SELECT "o"."id" FROM "search_outbox" "o"
+        WHERE "o"."relayed_at" IS NULL AND ("o"."claimed_until" IS NULL OR "o"."claimed_until" < now())
+        AND NOT EXISTS (
+            SELECT 1 FROM "search_outbox" "c"
+            WHERE "c"."document_id" = "o"."document_id" AND "c"."claimed_until" >= now()
+        )
+        ORDER BY "o"."id" LIMIT $1 FOR UPDATE SKIP LOCKED
+    )
+    RETURNING "id", "index", "document_id"
+"""
+
+
+async def arelay_documents(
+    repository: type[IPostgresRepository],
+    search_repos: list[ISearchRepository],
+    ids: list[UUID],
+    full_documents: bool = False,
+) -> None:
+    """
+    Send current state of entities to search repositories - existing ones with one `aupsert_documents`,
+    missing (deleted) ones with one `adelete_documents`.
+
+    With `full_documents` the whole output documents (with `SEARCH_FETCH_FIELDS` relations) are sent,
+    otherwise column documents.
+    """
+    if not search_repos:
+        return
+
+    if full_documents:
+        read = dict(fetch_fields=list(repository.SEARCH_FETCH_FIELDS))
+    else:
+        # column documents - no relations are read
+        read = dict(fields=list(repository.columns()))
+    entities = await repository.aget_all_from_filter(limit=len(ids), id__in=ids, **read)
+    existing = {str(entity.id) for entity in entities}
+    documents = [repository.to_search_document(entity, full=full_documents) for entity in entities]
+    deleted = [id for id in ids if str(id) not in existing]
+
+    for search_repo in search_repos:
+        if documents:
+            await search_repo.aupsert_documents(documents=documents)
+        if deleted:
+            await search_repo.adelete_documents(document_ids=deleted)
+
+
+class OutboxCursor:
+    """
+    Reader of all `SearchOutbox` rows after its position, relayed or not (relayed rows are kept for a retention),
+    for consumers which have to see every change - in-process indexes of every app process, index rebuilds.
+
+    Row ids are taken from a sequence before the writing transactions commit, so a row can show up behind rows
+    read already - ids skipped by the cursor are looked up again until `gap_timeout`.
+    """
+
+    def __init__(self, batch_size: int = 1000, gap_timeout: float = 60.0):
+        self._batch_size = batch_size
+        self._gap_timeout = gap_timeout
+        self._position = 0
+        # skipped id -> monotonic time it was skipped at
+        self._gaps: dict[int, float] = {}
+        self._next: Optional[tuple[int, dict[int, float]]] = None
+
+    async def aseek(self) -> None:
+        """
+        Position the cursor after rows older than `gap_timeout`, newer ones may be still uncommitted behind them.
+        """
+        since = datetime.now(timezone.utc) - timedelta(seconds=self._gap_timeout)
+        row = (
+            await SearchOutbox.filter(created_at__lt=since)
+            .using_db(connections.get(PRIMARY))
+            .order_by("-id")
+            .first()
+            .values_list("id", flat=True)
+        )
+        self._position, self._gaps, self._next = row or 0, {}, None
+
+    async def aread(self) -> dict[str, list[UUID]]:
+        """
+        Read the next batch of rows, the cursor moves after them with `advance` once they are processed.
+
+        :return: Changed document ids by index, empty when the cursor caught up
+        """
+        condition = Q(id__gt=self._position)
+        if self._gaps:
+            condition |= Q(id__in=list(self._gaps))
+        rows = (
+            await SearchOutbox.filter(condition)
+            .using_db(connections.get(PRIMARY))
+            .order_by("id")
+            .limit(self._batch_size)
+            .values_list("id", "index", "document_id")
+        )
+
+        now, position, gaps = monotonic(), self._position, dict(self._gaps)
+        changes: dict[str, list[UUID]] = {}
+        for id, index, document_id in rows:
+            gaps.pop(id, None)
+            if id > position:
+                # transactions in flight are few, jumps of the sequence aren't tracked as a whole
+                gaps.update(dict.fromkeys(range(max(position + 1, id - self._batch_size), id), now))
+                position = id
+            changes.setdefault(index, []).append(document_id)
+        self._next = position, {id: since for id, since in gaps.items() if now - since < self._gap_timeout}
+        return {index: list(dict.fromkeys(ids)) for index, ids in changes.items()}
+
+    def advance(self) -> None:
+        """
+        Move the cursor after rows returned by the last `aread`.
+        """
+        if self._next is not None:
+            (self._position, self._gaps), self._next = self._next, None
+
+
+class OutboxRelay:
+    """
+    Worker synchronising search indexes from `SearchOutbox` rows with at-least-once delivery.
+
+    Batch of rows is claimed with a `lease` in a short transaction, so no transaction (and no row lock) stays open
+    across search engine calls. Rows of documents leased by another relay are not claimed, so relays of several
+    app instances never send one document concurrently - the one which read an older state can't send it last.
+    Entities of claimed rows are read in current state and sent to the search repository of the row index -
+    existing ones with one `aupsert_documents`, missing (deleted) ones with one `adelete_documents`.
+    Rows are marked relayed only after the search engine accepted the batch, on failure their lease is released
+    and the relay backs off. Rows of a relay which died are claimed again when their lease expires, so `lease`
+    has to be longer than relaying a batch takes. Several rows of one entity are a single document write.
+    Index can have several search repositories, each one gets the documents. Relayed rows are kept for `retention`,
+    so in-process indexes of every app process can follow them (see `OutboxFeed`), and pruned after it.
+
+    After search engine outage the relay catches up by draining the backlog, its size is the `outbox.depth` gauge
+    measured every `depth_interval` (when relayed rows are pruned).
+
+    It replaces the in-process batched index writer - writes are coalesced per document (the current state
+    is read, a missing entity is deleted), flushed every `poll_interval` in batches up to `batch_size` and retried
+    with backoff, while they survive restarts and don't depend on the instance which made them.
+
+    With `full_documents` the whole output documents (with `SEARCH_FETCH_FIELDS` relations) are indexed,
+    so lists can be served from search results alone.
+    """
+
+    def __init__(
+        self,
+        repositories: list[type[IPostgresRepository]],
+        search_repos: list[ISearchRepository],
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_backoff: float = 30.0,
+        full_documents: bool = False,
+        depth_interval: float = 10.0,
+        lease: float = 60.0,
+        retention: float = 600.0,
+    ):
+        search_repos_by_index: dict[str, list[ISearchRepository]] = {}
+        for search_repo in search_repos:
+            search_repos_by_index.setdefault(search_repo.INDEX, []).append(search_repo)
+        self._targets: dict[str, tuple[type[IPostgresRepository], list[ISearchRepository]]] = {
+            repository.SEARCH_INDEX: (repository, search_repos_by_index.get(repository.SEARCH_INDEX, []))
+            for repository in repositories
+        }
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_backoff = max_backoff
+        self._full_documents = full_documents
+        self._depth_interval = depth_interval
+        self._lease = lease
+        self._retention = retention
+        self._depth_measured_at: Optional[float] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def _aclaim(self) -> list[dict]:
+        async with in_transaction(PRIMARY) as connection:
+            await connection.execute_query(_CLAIM_LOCK)
+            return await connection.execute_query_dict(_CLAIM, [self._batch_size, self._lease])
+
+    async def arelay_batch(self) -> int:
+        """
+        Synchronise one batch of outbox rows.
+
+        :return: The number of relayed rows
+        """
+        rows = await self._aclaim()
+        if not rows:
+            return 0
+
+        ids = [row["id"] for row in rows]
+        try:
+            rows.sort(key=lambda row: (row["index"], row["id"]))
+            for index, group in groupby(rows, key=lambda row: row["index"]):
+                if index not in self._targets:
+                    logger.error(f"No search repository for outbox index {index}, rows are dropped")
+                    continue
+                repository, search_repos = self._targets[index]
+                await arelay_documents(
+                    repository,
+                    search_repos,
+                    list(dict.fromkeys(row["document_id"] for row in group)),
+                    full_documents=self._full_documents,
+                )
+        except Exception:
+            # rows are retried by the next batch without waiting for the lease to expire
+            await SearchOutbox.filter(id__in=ids).update(claimed_until=None)
+            raise
+
+        await SearchOutbox.filter(id__in=ids).update(relayed_at=datetime.now(timezone.utc), claimed_until=None)
+
+        metrics.inc(RELAYED, len(rows))
+        return len(rows)
+
+    async def adrain(self) -> int:
+        """
+        Synchronise outbox rows until the outbox is empty.
+
+        :return: The number of relayed rows
+        """
+        relayed = 0
+        while count := await self.arelay_batch():
+            relayed += count
+        return relayed
+
+    async def adepth(self) -> int:
+        """
+        Measure the number of outbox rows waiting for the relay, it is set as `outbox.depth` gauge.
+
+        :return: The number of waiting rows
+        """
+        depth = await SearchOutbox.filter(relayed_at__isnull=True).using_db(connections.get(PRIMARY)).count()
+        metrics.set(DEPTH, depth)
+        self._depth_measured_at = monotonic()
+        return depth
+
+    async def aprune(self) -> int:
+        """
+        Delete rows relayed more than `retention` ago, in-process indexes followed them meanwhile.
+
+        :return: The number of deleted rows
+        """
+        pruned = await SearchOutbox.filter(
+            relayed_at__lt=datetime.now(timezone.utc) - timedelta(seconds=self._retention)
+        ).delete()
+        metrics.inc(PRUNED, pruned)
+        return pruned
+
+    async def _amaintain(self) -> None:
+        if self._depth_measured_at is not None and monotonic() - self._depth_measured_at < self._depth_interval:
+            return
+        try:
+            await self.adepth()
+            await self.aprune()
+        except Exception as e:
+            logger.error(f"Error maintaining search outbox: {e}")
+
+    async def run(self) -> None:
+        backoff = self._poll_interval
+        while True:
+            # backlog grows while the search engine is down, so it is measured on failures too
+            await self._amaintain()
+            try:
+                await self.adrain()
+                backoff = self._poll_interval
+            except Exception as e:
+                metrics.inc(FAILURES)
+                backoff = min(backoff * 2, self._max_backoff)
+                logger.error(f"Error relaying search outbox, retry in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                continue
+
+            await asyncio.sleep(self._poll_interval)
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self.run())
+
+    async def aclose(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
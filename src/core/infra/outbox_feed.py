@@ -0,0 +1,123 @@
+import asyncio
+from time import monotonic
+from typing import Optional
+
+from loguru import logger
+
+from src.core.domain.repo.postgres import IPostgresRepository
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.infra.outbox import OutboxCursor, arelay_documents
+from src.core.infra.reindex import ReindexReport, areindex
+from src.core.utils.metrics import metrics
+
+FOLLOWED = "outbox_feed.followed"
+REBUILDS = "outbox_feed.rebuilds"
+FAILURES = "outbox_feed.failures"
+
+
+class OutboxFeed:
+    """
+    Worker keeping in-process search indexes (typeahead, embedded search engine) of this app process in sync.
+
+    Every outbox row is relayed by a single app instance (see `OutboxRelay`), so the relay can't feed indexes
+    kept by every process. Each process follows all outbox rows with its own `OutboxCursor` instead and sends
+    the current state of their entities to its indexes.
+
+    Indexes are built from db in background when the worker starts, until then they are empty. When the outbox
+    could not be read for longer than `retention` (relayed rows are pruned after it), the indexes are rebuilt.
+    """
+
+    def __init__(
+        self,
+        repositories: list[type[IPostgresRepository]],
+        search_repos: list[Optional[ISearchRepository]],
+        batch_size: int = 1000,
+        poll_interval: float = 1.0,
+        max_backoff: float = 30.0,
+        retention: float = 600.0,
+        gap_timeout: float = 60.0,
+    ):
+        search_repos_by_index: dict[str, list[ISearchRepository]] = {}
+        # disabled in-process indexes are None
+        for search_repo in filter(None, search_repos):
+            search_repos_by_index.setdefault(search_repo.INDEX, []).append(search_repo)
+        self._targets: dict[str, tuple[type[IPostgresRepository], list[ISearchRepository]]] = {
+            repository.SEARCH_INDEX: (repository, search_repos_by_index[repository.SEARCH_INDEX])
+            for repository in repositories
+            if repository.SEARCH_INDEX in search_repos_by_index
+        }
+        self._cursor = OutboxCursor(batch_size=batch_size, gap_timeout=gap_timeout)
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_backoff = max_backoff
+        self._retention = retention
+        self._followed_at: Optional[float] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def arebuild(self) -> list[ReindexReport]:
+        """
+        Build the indexes from db, changes written meanwhile are followed from the outbox afterwards.
+
+        :return: Reports of rebuilt indexes
+        """
+        await self._cursor.aseek()
+        reports = [
+            await areindex(repository, search_repo, batch_size=self._batch_size)
+            for repository, search_repos in self._targets.values()
+            for search_repo in search_repos
+        ]
+        self._followed_at = monotonic()
+        metrics.inc(REBUILDS)
+        return reports
+
+    async def afollow(self) -> int:
+        """
+        Send changes written since the last call to the indexes.
+
+        :return: The number of changed documents
+        """
+        followed = 0
+        while changes := await self._cursor.aread():
+            for index, ids in changes.items():
+                if index in self._targets:
+                    repository, search_repos = self._targets[index]
+                    await arelay_documents(repository, search_repos, ids)
+                    followed += len(ids)
+            self._cursor.advance()
+        # expires ids skipped for too long
+        self._cursor.advance()
+
+        self._followed_at = monotonic()
+        metrics.inc(FOLLOWED, followed)
+        return followed
+
+    async def run(self) -> None:
+        backoff = self._poll_interval
+        while True:
+            try:
+                if self._followed_at is None or monotonic() - self._followed_at > self._retention:
+                    for report in await self.arebuild():
+                        logger.info(str(report))
+                await self.afollow()
+                backoff = self._poll_interval
+            except Exception as e:
+                metrics.inc(FAILURES)
+                backoff = min(backoff * 2, self._max_backoff)
+                logger.error(f"Error following search outbox, retry in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                continue
+
+            await asyncio.sleep(self._poll_interval)
+
+    def start(self) -> None:
+        if self._targets and (self._worker is None or self._worker.done()):
+            self._worker = asyncio.get_running_loop().create_task(self.run())
+
+    async def aclose(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,100 @@
+import asyncio
+import resource
+from contextlib import suppress
+from dataclasses import dataclass
+from time import perf_counter
+from typing import AsyncIterator
+from uuid import UUID
+
+from loguru import logger
+from tortoise.utils import chunk
+
+from src.core.infra.outbox import OutboxCursor, arelay_documents
+from src.core.infra.repo.embeddedsearchrepo import EmbeddedSearchRepository
+from src.core.infra.repo.meilsearchrepo import MeiliSearchRepository
+from src.core.infra.repo.suggestrepo import PrefixSuggestRepository
+from src.core.infra.repo.tortoiserepo import TortoiseRepo
+
+
+@dataclass
+class ReindexReport:
+    index: str
+    documents: int
+    seconds: float
+    peak_memory_mb: float
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.index}: {self.documents} documents in {self.seconds:.1f}s "
+            f"({self.documents_per_second:.0f} docs/s), peak memory {self.peak_memory_mb:.0f} MB"
+        )
+
+
+async def areindex(
+    repository: type[TortoiseRepo],
+    search_repo: MeiliSearchRepository | EmbeddedSearchRepository | PrefixSuggestRepository,
+    batch_size: int = 1000,
+    concurrency: int = 4,
+    full_documents: bool = False,
+    poll_interval: float = 1.0,
+) -> ReindexReport:
+    """
+    Rebuild search index of repository table - rows are streamed with server-side cursor into a fresh index,
+    which replaces the current one (see `areindex` of search repositories).
+
+    Changes written while the index was rebuilt could have been relayed into the replaced index or be missed
+    by the stream - ids of their documents are collected from the outbox every `poll_interval` meanwhile
+    (before relayed rows are pruned) and their current state is sent to the new index after the swap,
+    deletes included. With `full_documents` whole output documents are indexed
+    (see `TortoiseRepo.to_search_document`).
+    """
+    start = perf_counter()
+    cursor = OutboxCursor(batch_size=batch_size)
+    await cursor.aseek()
+    # ordered set of changed document ids
+    changed: dict[UUID, None] = {}
+
+    async def collect() -> None:
+        while changes := await cursor.aread():
+            changed.update(dict.fromkeys(changes.get(repository.SEARCH_INDEX, [])))
+            cursor.advance()
+        cursor.advance()
+
+    async def follow() -> None:
+        while True:
+            await asyncio.sleep(poll_interval)
+            try:
+                await collect()
+            except Exception as e:
+                # rows not collected are read again by the last collect
+                logger.error(f"Error collecting changes of {search_repo.INDEX} written during reindex: {e}")
+
+    fetch_fields = repository.SEARCH_FETCH_FIELDS if full_documents else ()
+
+    async def documents() -> AsyncIterator[list[dict]]:
+        async for entities in repository.astream(batch_size, fetch_fields):
+            yield [repository.to_search_document(entity, full=full_documents) for entity in entities]
+
+    follower = asyncio.get_running_loop().create_task(follow())
+    try:
+        count = await search_repo.areindex(documents(), concurrency=concurrency)
+    finally:
+        follower.cancel()
+        with suppress(asyncio.CancelledError):
+            await follower
+
+    await collect()
+    for ids in chunk(list(changed), batch_size):
+        await arelay_documents(repository, [search_repo], ids, full_documents=full_documents)
+
+    return ReindexReport(
+        index=search_repo.INDEX,
+        documents=count,
+        seconds=perf_counter() - start,
+        # linux reports max rss in kilobytes
+        peak_memory_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    )
@@ -0,0 +1,350 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from math import log
+from typing import Any, AsyncIterable, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+
+# `SEARCH_ENGINE` setting selecting this engine
+EMBEDDED = "embedded"
+
+_TOKEN = re.compile(r"\w+")
+# tf is kept in unsigned short
+_MAX_TF = 0xFFFF
+
+
+def tokenize(value: Any) -> list[str]:
+    if value is None:
+        return []
+    return _TOKEN.findall(str(value).casefold())
+
+
+def document_key(document_id: UUID | str) -> str:
+    # outbox deletes with UUID, Meilisearch documents carry hex ids
+    try:
+        return str(UUID(str(document_id)))
+    except ValueError:
+        return str(document_id)
+
+
+class EmbeddedSearchRepository(ISearchRepository):
+    """
+    In-process search engine on top of an inverted index, for tests and small deployments without Meilisearch.
+
+    Documents get sequential numbers, every `SEARCH_FIELDS` field has posting lists (term -> document numbers
+    and term frequencies) kept in `array`, so the index of 1M documents is a few bytes per posting instead of
+    python objects. Every query word has to match some field term - the last one as a prefix (typeahead,
+    like Meilisearch). Documents are scored with BM25 summed over fields, prefix matches are weighted by
+    the matched part of the term.
+
+    Only `FIELDS_TO_GET`, `FILTERABLE_FIELDS` and `SORTABLE_FIELDS` values of documents are stored, as tuples.
+    Updated and deleted documents are tombstoned, once they are a fifth of the index they are dropped
+    from postings and live documents are renumbered, so memory follows the live documents.
+    """
+
+    INDEX: str = ""
+    SEARCH_FIELDS: list[str] | None = None
+    FIELDS_TO_GET: list[str] | None = None
+    FILTERABLE_FIELDS: list[str] | None = None
+    SORTABLE_FIELDS: list[str] | None = None
+    K1: float = 1.2
+    B: float = 0.75
+    # terms the last query word expands to, bounds latency of short prefixes
+    MAX_PREFIX_TERMS: int = 50
+    # tombstones kept before compaction at least
+    MIN_COMPACTED: int = 1000
+
+    def __init__(self, *args, **kwargs):
+        stored = ["id", *(self.FIELDS_TO_GET or []), *(self.FILTERABLE_FIELDS or []), *(self.SORTABLE_FIELDS or [])]
+        # stored field -> position in document tuples
+        self._fields: dict[str, int] = {field: idx for idx, field in enumerate(dict.fromkeys(stored))}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids: list[Optional[str]] = []
+        # document number -> stored field values, None when removed
+        self._documents: list[Optional[tuple]] = []
+        self._docnums: dict[str, int] = {}
+        self._postings: dict[str, dict[str, tuple[array, array]]] = {field: {} for field in self.SEARCH_FIELDS}
+        self._lengths: dict[str, array] = {field: array("I") for field in self.SEARCH_FIELDS}
+        self._total_lengths: dict[str, int] = dict.fromkeys(self.SEARCH_FIELDS, 0)
+        # sorted terms for prefix lookup, rebuilt lazily after new terms were indexed
+        self._terms: dict[str, list[str]] = {field: [] for field in self.SEARCH_FIELDS}
+        self._stale_terms: set[str] = set()
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _index(self, document: dict) -> None:
+        key = document_key(document["id"])
+        self._remove(key)
+
+        docnum = len(self._ids)
+        self._ids.append(key)
+        self._documents.append(tuple(document.get(field) for field in self._fields))
+        self._docnums[key] = docnum
+        for field, postings in self._postings.items():
+            counts = Counter(tokenize(document.get(field)))
+            length = sum(counts.values())
+            self._lengths[field].append(length)
+            self._total_lengths[field] += length
+            for term, tf in counts.items():
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = (array("I"), array("H"))
+                    self._stale_terms.add(field)
+                posting[0].append(docnum)
+                posting[1].append(min(tf, _MAX_TF))
+        self._live += 1
+
+    def _remove(self, key: str) -> None:
+        docnum = self._docnums.pop(key, None)
+        if docnum is None:
+            return
+
+        self._ids[docnum] = None
+        self._documents[docnum] = None
+        for field, lengths in self._lengths.items():
+            self._total_lengths[field] -= lengths[docnum]
+        self._live -= 1
+
+    def _maybe_compact(self) -> None:
+        dead = len(self._ids) - self._live
+        if dead > self.MIN_COMPACTED and dead * 4 > self._live:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Drop removed documents from postings and renumber the live ones in order, so postings stay sorted.
+        """
+        live = [docnum for docnum, key in enumerate(self._ids) if key is not None]
+        renumbered = array("i", [-1]) * len(self._ids)
+        for new, old in enumerate(live):
+            renumbered[old] = new
+
+        for field, postings in self._postings.items():
+            for term in list(postings):
+                docnums, tfs = postings[term]
+                kept = [(renumbered[docnum], tf) for docnum, tf in zip(docnums, tfs) if renumbered[docnum] >= 0]
+                if kept:
+                    postings[term] = (array("I", (docnum for docnum, _ in kept)), array("H", (tf for _, tf in kept)))
+                else:
+                    del postings[term]
+                    self._stale_terms.add(field)
+            lengths = self._lengths[field]
+            self._lengths[field] = array("I", (lengths[docnum] for docnum in live))
+
+        self._ids = [self._ids[docnum] for docnum in live]
+        self._documents = [self._documents[docnum] for docnum in live]
+        self._docnums = {key: docnum for docnum, key in enumerate(self._ids)}
+
+    def _expand(self, field: str, word: str, prefix: bool) -> list[tuple[str, float]]:
+        postings = self._postings[field]
+        if not prefix:
+            return [(word, 1.0)] if word in postings else []
+
+        if field in self._stale_terms:
+            self._terms[field] = sorted(postings)
+            self._stale_terms.discard(field)
+        terms = self._terms[field]
+        start = bisect_left(terms, word)
+        expanded = []
+        for term in terms[start : start + self.MAX_PREFIX_TERMS]:
+            if not term.startswith(word):
+                break
+            expanded.append((term, len(word) / len(term)))
+        return expanded
+
+    def _matches(self, word: str, prefix: bool, fields: list[str]) -> list[tuple[str, str, float]]:
+        return [
+            (field, term, weight)
+            for field in fields
+            if field in self._postings
+            for term, weight in self._expand(field, word, prefix)
+        ]
+
+    def _postings_size(self, matches: list[tuple[str, str, float]]) -> int:
+        return sum(len(self._postings[field][term][0]) for field, term, _ in matches)
+
+    def _scores(
+        self, matches: list[tuple[str, str, float]], candidates: Optional[dict[int, float]] = None
+    ) -> dict[int, float]:
+        """
+        BM25 scores of documents matching any of `matches` terms, only of `candidates` when given - they are
+        looked up in posting lists (sorted by document number) with binary search instead of a full scan.
+        """
+        scores: dict[int, float] = {}
+        for field, term, weight in matches:
+            docnums, tfs = self._postings[field][term]
+            lengths = self._lengths[field]
+            average_length = self._total_lengths[field] / self._live or 1.0
+            idf = log(1 + (self._live - len(docnums) + 0.5) / (len(docnums) + 0.5))
+
+            if candidates is None:
+                pairs = zip(docnums, tfs)
+            else:
+                pairs = []
+                for docnum in candidates:
+                    idx = bisect_left(docnums, docnum)
+                    if idx < len(docnums) and docnums[idx] == docnum:
+                        pairs.append((docnum, tfs[idx]))
+
+            for docnum, tf in pairs:
+                norm = self.K1 * (1 - self.B + self.B * lengths[docnum] / average_length)
+                scores[docnum] = scores.get(docnum, 0.0) + weight * idf * tf * (self.K1 + 1) / (tf + norm)
+        return scores
+
+    def _value(self, docnum: int, field: str) -> Any:
+        idx = self._fields.get(field)
+        return self._documents[docnum][idx] if idx is not None else None
+
+    def _project(self, docnum: int, fields_to_get: list[str]) -> dict:
+        document = self._documents[docnum]
+        if "*" in fields_to_get:
+            return dict(zip(self._fields, document))
+        return {field: document[self._fields[field]] for field in fields_to_get if field in self._fields}
+
+    def _matched(
+        self, query: str, search_fields: list[str] | None, filters: list[SearchFilter] | None
+    ) -> dict[int, float]:
+        """
+        Scores of live documents matching query words (all documents for empty query) and filters.
+        """
+        words = tokenize(query)
+        if words:
+            fields = search_fields or self.SEARCH_FIELDS
+            # the rarest word is scored first, other words are only looked up for its matches when they are fewer
+            word_matches = sorted(
+                (
+                    (self._postings_size(matches), matches)
+                    for matches in (
+                        self._matches(word, idx == len(words) - 1, fields) for idx, word in enumerate(words)
+                    )
+                ),
+                key=lambda item: item[0],
+            )
+            scores = self._scores(word_matches[0][1]) if self._live else {}
+            for size, matches in word_matches[1:]:
+                if not scores:
+                    break
+                other = self._scores(matches, scores if len(scores) * 8 < size else None)
+                scores = {docnum: score + other[docnum] for docnum, score in scores.items() if docnum in other}
+        else:
+            scores = dict.fromkeys(self._docnums.values(), 0.0)
+
+        documents, filters = self._documents, filters or []
+        return {
+            docnum: score
+            for docnum, score in scores.items()
+            if documents[docnum] is not None
+            and all(search_filter.matches(self._value(docnum, search_filter.field)) for search_filter in filters)
+        }
+
+    def _sorted(self, scores: dict[int, float], sort: list[SearchSort], count: int) -> list[int]:
+        docnums = sorted(scores, key=lambda docnum: (-scores[docnum], docnum))
+        # stable sorts from the last order to the first one, missing values last
+        for order in reversed(sort):
+            values = {docnum: self._value(docnum, order.field) for docnum in docnums}
+            if order.descending:
+                docnums.sort(key=lambda docnum: (values[docnum] is not None, values[docnum]), reverse=True)
+            else:
+                docnums.sort(key=lambda docnum: (values[docnum] is None, values[docnum]))
+        return docnums[:count]
+
+    async def asearch(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 100,
+        fields_to_get: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        """
+        Search for documents in the in-process index.
+
+        Returns: list[Any]
+
+        """
+        scores = self._matched(query, search_fields, filters)
+        if sort:
+            ranked = self._sorted(scores, sort, offset + limit)
+        else:
+            ranked = [docnum for _, docnum in heapq.nsmallest(offset + limit, ((-s, d) for d, s in scores.items()))]
+
+        fields_to_get = fields_to_get or self.FIELDS_TO_GET or ["*"]
+        hits = [self._project(docnum, fields_to_get) for docnum in ranked[offset:]]
+
+        logger.info("Embedded search result count: {result}", result=len(hits))
+        return hits
+
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        """
+        Counts of the most common values of `facets` fields among matching documents.
+        """
+        docnums = self._matched(query, None, filters)
+        counts = {}
+        for facet in facets:
+            values = Counter(
+                str(value) for docnum in docnums if (value := self._value(docnum, facet)) is not None
+            )
+            counts[facet] = dict(values.most_common(100))
+        return counts
+
+    async def aget_create_index(self, *args, **kwargs) -> Any:
+        return self
+
+    async def acreate_document(self, document: dict, *args, **kwargs) -> None:
+        self._index(document)
+
+    async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
+        self._remove(document_key(document_id))
+        self._maybe_compact()
+
+    async def aupdate_document(self, document_id: UUID, document: dict, *args, **kwargs) -> None:
+        self._index(document)
+        self._maybe_compact()
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        for document in documents:
+            self._index(document)
+        self._maybe_compact()
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        for document_id in document_ids:
+            self._remove(document_key(document_id))
+        self._maybe_compact()
+
+    async def areindex(self, batches: AsyncIterable[list[dict]], concurrency: int = 1) -> int:
+        """
+        Rebuild the index from batches of documents, searches see the old index until it is built.
+
+        :param batches: Async iterable of document batches
+        :param concurrency: Unused, the index is built in-process
+        :return: The number of indexed documents
+        """
+        fresh = type(self)()
+        async for batch in batches:
+            for document in batch:
+                fresh._index(document)
+
+        self.__dict__.update(fresh.__dict__)
+        return self._live
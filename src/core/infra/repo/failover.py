@@ -0,0 +1,96 @@
+from time import monotonic
+from typing import Any
+from uuid import UUID
+
+from loguru import logger
+
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+from src.core.utils.metrics import metrics
+
+FAILOVERS = "search.{index}.failovers"
+FALLBACK_SEARCHES = "search.{index}.fallback_searches"
+
+
+class FailoverSearchRepository(ISearchRepository):
+    """
+    Search repository which fails over from `primary` (Meilisearch) to `fallback` (Postgres full-text search).
+
+    When primary search fails, it is skipped for `retry_after` seconds and searches go straight to fallback,
+    so an outage costs one failed request per period, not one per search. Document writes go to primary only
+    and errors are raised - the outbox relay retries them once primary is back.
+    """
+
+    def __init__(self, primary: ISearchRepository, fallback: ISearchRepository, retry_after: float = 30.0):
+        self._primary = primary
+        self._fallback = fallback
+        self._retry_after = retry_after
+        self._primary_down_until = 0.0
+
+    @property
+    def INDEX(self) -> str:
+        return self._primary.INDEX
+
+    async def _afailover(self, method: str, *args, **kwargs) -> Any:
+        if monotonic() >= self._primary_down_until:
+            try:
+                return await getattr(self._primary, method)(*args, **kwargs)
+            except Exception as e:
+                self._primary_down_until = monotonic() + self._retry_after
+                metrics.inc(FAILOVERS.format(index=self.INDEX))
+                logger.error(f"Error searching {self.INDEX}, failing over for {self._retry_after}s: {e}")
+
+        metrics.inc(FALLBACK_SEARCHES.format(index=self.INDEX))
+        return await getattr(self._fallback, method)(*args, **kwargs)
+
+    async def asearch(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 100,
+        fields_to_get: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        return await self._afailover(
+            "asearch", query, offset, limit, fields_to_get, search_fields, filters, sort, *args, **kwargs
+        )
+
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        return await self._afailover("afacets", query, facets, filters, *args, **kwargs)
+
+    async def aget_create_index(self, *args, **kwargs) -> Any:
+        return await self._primary.aget_create_index(*args, **kwargs)
+
+    async def acreate_document(self, document: dict, *args, **kwargs) -> None:
+        await self._primary.acreate_document(document, *args, **kwargs)
+
+    async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
+        await self._primary.adelete_document(document_id, *args, **kwargs)
+
+    async def aupdate_document(self, document_id: UUID, document: dict, *args, **kwargs) -> None:
+        await self._primary.aupdate_document(document_id, document, *args, **kwargs)
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        await self._primary.aupsert_documents(documents, *args, **kwargs)
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        await self._primary.adelete_documents(document_ids, *args, **kwargs)
+
+    def invalidate(self) -> None:
+        self._primary.invalidate()
+        self._fallback.invalidate()
+
+    async def aclose(self) -> None:
+        await self._primary.aclose()
+        await self._fallback.aclose()
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional, Any
+from uuid import UUID
+
+from tortoise.models import Model
+
+from src.core.domain.entity import Entity
+from src.core.utils.metrics import metrics
+
+HITS = "identity_map.hits"
+MISSES = "identity_map.misses"
+
+_current: ContextVar[Optional["IdentityMap"]] = ContextVar("identity_map", default=None)
+
+
+class IdentityMap:
+    """
+    Request scoped first level cache of entities loaded by id, keyed by `(model, id)`.
+
+    Entry remembers relations fetched into the entity, so lookup is a hit only when it covers requested
+    `fetch_fields`. Any write of a model drops its written ids and every entry loaded with relations
+    (those may embed rows of the written model).
+
+    Map is active only inside `IdentityMap.scope()` (one per http request, see `RequestScopeMiddleware`),
+    outside of it repositories always read from db.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[type[Model], str], tuple[Entity, frozenset[str]]] = {}
+
+    @staticmethod
+    def current() -> Optional["IdentityMap"]:
+        return _current.get()
+
+    @classmethod
+    @contextmanager
+    def scope(cls) -> Iterator["IdentityMap"]:
+        identity_map = cls()
+        token = _current.set(identity_map)
+        try:
+            yield identity_map
+        finally:
+            _current.reset(token)
+
+    def get(self, model: type[Model], id: UUID | Any, fetch_fields: Iterable[str] = ()) -> Entity | None:
+        entry = self._entries.get((model, str(id)))
+        if entry is not None and entry[1].issuperset(fetch_fields):
+            metrics.inc(HITS)
+            return entry[0]
+
+        metrics.inc(MISSES)
+        return None
+
+    def add(self, model: type[Model], id: UUID | Any, entity: Entity, fetch_fields: Iterable[str] = ()) -> None:
+        self._entries[(model, str(id))] = (entity, frozenset(fetch_fields))
+
+    def invalidate(self, model: type[Model], ids: Iterable[UUID | Any] = ()) -> None:
+        for id in ids:
+            self._entries.pop((model, str(id)), None)
+        self._entries = {key: entry for key, entry in self._entries.items() if not entry[1]}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,159 @@
+from dataclasses import MISSING, fields as dataclass_fields, is_dataclass
+from typing import Any, Generic, Type, TypeVar
+
+from tortoise import fields
+from tortoise.fields import ReverseRelation
+from tortoise.models import Model
+
+from src.core.domain.entity import Entity
+from src.core.domain.value_object import PrecisedFloat
+
+ModelType = TypeVar("ModelType", bound=Model)
+EntityType = TypeVar("EntityType", bound=Entity)
+
+TORTOISE_STATE_ATTRS = frozenset(("_partial", "_saved_in_db", "_custom_generated_pk"))
+
+_dataclass_field_names: dict[type, tuple[str, ...]] = {}
+
+
+def _field_names(dataclass_type: type) -> tuple[str, ...]:
+    names = _dataclass_field_names.get(dataclass_type)
+    if names is None:
+        names = _dataclass_field_names[dataclass_type] = tuple(f.name for f in dataclass_fields(dataclass_type))
+    return names
+
+
+def _keep(value: Any) -> bool:
+    return bool(value) if isinstance(value, list) else value is not None
+
+
+def project(value: Any) -> Any:
+    """
+    Single pass projection of entity / tortoise record into plain python structures consumed by pydantic DTOs.
+
+    Output has the same shape as `TortoiseRepo.convert_snapshot(entity.snapshot)`:
+        * dataclasses become dicts without None values and empty lists (like `Entity.snapshot`),
+        * tortoise records become dicts of their `__dict__` with `_` prefix removed and tortoise state dropped,
+        * reverse relations and lists become lists.
+
+    Leaf values (uuids, floats, dates, enums) are passed by reference - nothing is deep copied,
+    pydantic validates them in place.
+    """
+    if isinstance(value, Model):
+        return {
+            (key[1:] if key[0] == "_" else key): project(item)
+            for key, item in value.__dict__.items()
+            if key not in TORTOISE_STATE_ATTRS
+        }
+    if isinstance(value, (list, tuple, ReverseRelation)):
+        return [project(item) for item in value]
+    if is_dataclass(value) and not isinstance(value, type):
+        values = value.__dict__
+        result = {}
+        for name in _field_names(type(value)):
+            item = values[name]
+            if _keep(item):
+                result[name] = project(item)
+        return result
+    if isinstance(value, dict):
+        return {key: project(item) for key, item in value.items()}
+    return value
+
+
+def record_from_json(model: Type[ModelType], data: dict[str, Any]) -> ModelType:
+    """
+    Tortoise record from row serialized by postgres (`to_jsonb(table)`), json values (uuids, dates, enums)
+    are converted to the same python values driver returns for plain columns.
+    """
+    meta = model._meta
+    return model._init_from_db(
+        **{
+            column: meta.fields_map[meta.fields_db_projection_reverse[column]].to_python_value(value)
+            for column, value in data.items()
+            if column in meta.fields_db_projection_reverse
+        }
+    )
+
+
+class EntityMapper(Generic[ModelType, EntityType]):
+    """
+    Mapping plan from tortoise record to domain entity, compiled once per (model, entity) pair.
+
+    Plan is built from the entity dataclass fields and the model meta:
+        * columns - plain db columns (and `<fk>_id` source fields) copied as is,
+        * float columns - float db columns wrapped into `PrecisedFloat`,
+        * relations - fetched relations which tortoise caches on record under `_<name>` attribute.
+
+    Partial records (`.only()` projection) are mapped to lightweight entities - fields which were not selected
+    are None.
+
+    Thanks to that mapping a row is a couple of dict lookups, without `vars()` walk,
+    key normalization and `isinstance` check for every value.
+    """
+
+    def __init__(self, model: Type[ModelType], entity: Type[EntityType]):
+        self.model = model
+        self.entity = entity
+
+        meta = model._meta
+        entity_fields = [field.name for field in dataclass_fields(entity)]
+        fk_columns = {f"{name}_id" for name in meta.fk_fields | meta.o2o_fields}
+        relational = meta.fetch_fields | meta.fk_fields | meta.o2o_fields | meta.m2m_fields
+
+        self.columns: tuple[str, ...] = tuple(
+            name
+            for name in entity_fields
+            if name in fk_columns or (name in meta.fields_map and name not in relational)
+        )
+        self.float_columns: tuple[str, ...] = tuple(
+            name for name in self.columns if isinstance(meta.fields_map.get(name), fields.FloatField)
+        )
+        self.plain_columns: tuple[str, ...] = tuple(name for name in self.columns if name not in self.float_columns)
+        self.relations: tuple[tuple[str, str], ...] = tuple(
+            (name, f"_{name}") for name in entity_fields if name not in self.columns
+        )
+        # partial records (`.only()` projection) leave these None
+        self.required: tuple[str, ...] = tuple(
+            field.name
+            for field in dataclass_fields(entity)
+            if field.default is MISSING and field.default_factory is MISSING
+        )
+
+    def __repr__(self):
+        return f"EntityMapper[{self.model.__name__} -> {self.entity.__name__}]"
+
+    def to_entity(self, record: ModelType | None) -> EntityType | None:
+        if record is None:
+            return None
+
+        values: dict[str, Any] = record.__dict__
+        kwargs = {name: values[name] for name in self.plain_columns if name in values}
+
+        for name in self.float_columns:
+            if name in values:
+                value = values[name]
+                kwargs[name] = PrecisedFloat(value) if value is not None else None
+
+        for name, attr in self.relations:
+            if attr in values:
+                kwargs[name] = values[attr]
+
+        if values.get("_partial"):
+            for name in self.required:
+                kwargs.setdefault(name, None)
+
+        return self.entity(**kwargs)
+
+    def to_columns(self, entity: EntityType, columns: tuple[str, ...] | None = None) -> dict[str, Any]:
+        """
+        Reverse mapping - db columns set on entity. None values are skipped (like in `Entity.snapshot`),
+        so they fall back to db defaults on insert and stay untouched on update.
+        """
+        values = entity.__dict__
+        return {
+            name: values[name] for name in (columns or self.columns) if values.get(name) is not None
+        }
+
+    def to_entities(self, records: list[ModelType]) -> list[EntityType]:
+        to_entity = self.to_entity
+        return [to_entity(record) for record in records]
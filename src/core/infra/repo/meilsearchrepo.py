@@ -1,13 +1,19 @@
-from contextlib import asynccontextmanager
-from typing import Any
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, AsyncIterable
 from uuid import UUID
 
 from loguru import logger
 from meilisearch_python_sdk import AsyncClient, AsyncIndex
+from meilisearch_python_sdk.errors import MeilisearchApiError
 from meilisearch_python_sdk.json_handler import BuiltinHandler
 from meilisearch_python_sdk.models.search import SearchResults
+from meilisearch_python_sdk.models.settings import MeilisearchSettings
+from uuid6 import uuid6
 
 from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
 from src.core.utils.encoder import CustomJsonEncoder
 
 
@@ -15,29 +21,82 @@ class MeiliSearchRepository(ISearchRepository):
     """
     Meilisearch repository class as a search engine.
 
+    Repository owns one long-lived client (keep-alive http connection pool) and caches the index handle,
+    so search / document call is a single http request. Provide it as a singleton and close it
+    with `aclose` on app shutdown.
+
     https://www.meilisearch.com/
     """
 
     INDEX: str = ""
     SEARCH_FIELDS: list[str] | None = None
     FIELDS_TO_GET: list[str] | None = None
+    FILTERABLE_FIELDS: list[str] | None = None
+    SORTABLE_FIELDS: list[str] | None = None
+    # Meilisearch default rules, `sort` before `exactness` lets explicit sort win over exact matches
+    RANKING_RULES: list[str] = ["words", "typo", "proximity", "attribute", "sort", "exactness"]
 
     def __init__(self, meilisearch_url: str, meilisearch_master_key: str):
         self._meilisearch_url = meilisearch_url
         self._meilisearch_master_key = meilisearch_master_key
+        self._client_instance: AsyncClient | None = None
+        self._index: AsyncIndex | None = None
 
-    @asynccontextmanager
-    async def _client(self) -> AsyncClient:
-        client = AsyncClient(
-            url=self._meilisearch_url,
-            api_key=self._meilisearch_master_key,
-            json_handler=BuiltinHandler(serializer=CustomJsonEncoder),
-        )
+    @property
+    def client(self) -> AsyncClient:
+        if self._client_instance is None:
+            self._client_instance = AsyncClient(
+                url=self._meilisearch_url,
+                api_key=self._meilisearch_master_key,
+                json_handler=BuiltinHandler(serializer=CustomJsonEncoder),
+            )
+        return self._client_instance
+
+    @staticmethod
+    def _document_id(document_id: UUID | str) -> str:
+        # documents are serialized by `CustomJsonEncoder`, which writes uuid ids as hex
         try:
-            yield client
-        finally:
+            return UUID(str(document_id)).hex
+        except ValueError:
+            return str(document_id)
+
+    async def aclose(self) -> None:
+        """
+        Close the client connection pool, next call opens a new one.
+        """
+        client, self._client_instance, self._index = self._client_instance, None, None
+        if client is not None:
             await client.aclose()
 
+    @staticmethod
+    def _filter_expression(filters: list[SearchFilter] | None) -> list[str] | None:
+        if not filters:
+            return None
+        # numbers are compared as numbers, other values as quoted strings
+        return [
+            f"{search_filter.field} {search_filter.operator} "
+            + (search_filter.value if search_filter.number is not None else json.dumps(search_filter.value))
+            for search_filter in filters
+        ]
+
+    @staticmethod
+    def _sort_expression(sort: list[SearchSort] | None) -> list[str] | None:
+        if not sort:
+            return None
+        return [f"{order.field}:{'desc' if order.descending else 'asc'}" for order in sort]
+
+    async def _search(self, **search_kwargs) -> SearchResults:
+        index: AsyncIndex = await self.aget_create_index()
+        try:
+            return await index.search(**search_kwargs)
+        except MeilisearchApiError as e:
+            if e.status_code != HTTPStatus.NOT_FOUND:
+                raise
+            # index was removed after it was cached
+            self._index = None
+            index = await self.aget_create_index()
+            return await index.search(**search_kwargs)
+
     async def asearch(
         self,
         query: str,
@@ -45,41 +104,79 @@ class MeiliSearchRepository(ISearchRepository):
         limit: int = 100,
         fields_to_get: list[str] | None = None,
         search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
         *args,
         **kwargs,
     ) -> list[Any]:
         """
-        Search for documents in the Meilisearch index.
+        Search for documents in the Meilisearch index, filters and sort are applied by Meilisearch
+        (fields have to be in `FILTERABLE_FIELDS` / `SORTABLE_FIELDS` settings).
 
         Returns: list[Any]
 
         """
-
-        async with self._client() as client:
-            index: AsyncIndex = await self.aget_create_index(client=client)
-            result: SearchResults = await index.search(
-                query=query,
-                offset=offset,
-                limit=limit,
-                attributes_to_retrieve=self.FIELDS_TO_GET or fields_to_get,
-                attributes_to_search_on=self.SEARCH_FIELDS or search_fields,
-            )
-
+        result = await self._search(
+            query=query,
+            offset=offset,
+            limit=limit,
+            attributes_to_retrieve=fields_to_get or self.FIELDS_TO_GET,
+            attributes_to_search_on=search_fields or self.SEARCH_FIELDS,
+            filter=self._filter_expression(filters),
+            sort=self._sort_expression(sort),
+        )
         result_hints = result.hits
 
         logger.info("Search result count: {result}", result=len(result_hints))
         return result_hints
 
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        """
+        Facet distribution of the Meilisearch index, without fetching any document.
+        """
+        result = await self._search(
+            query=query,
+            limit=0,
+            attributes_to_search_on=self.SEARCH_FIELDS,
+            filter=self._filter_expression(filters),
+            facets=facets,
+        )
+        return result.facet_distribution or {}
+
+    async def aapply_settings(self) -> None:
+        """
+        Send filterable / sortable fields and ranking rules to the index, Meilisearch applies them in background.
+        """
+        settings = MeilisearchSettings(
+            filterable_attributes=self.FILTERABLE_FIELDS,
+            sortable_attributes=self.SORTABLE_FIELDS,
+            ranking_rules=self.RANKING_RULES,
+        )
+        index: AsyncIndex = await self.aget_create_index()
+        await index.update_settings(settings)
+        logger.info("Index {index} settings updated.", index=self.INDEX)
+
     async def aget_create_index(
         self,
-        client: AsyncClient,
         *args,
         **kwargs,
     ) -> AsyncIndex:
-        return await client.get_or_create_index(
-            uid=self.INDEX,
-            primary_key="id",
-        )
+        """
+        Get the index handle, index is fetched (or created) only on the first call.
+        """
+        if self._index is None:
+            self._index = await self.client.get_or_create_index(
+                uid=self.INDEX,
+                primary_key="id",
+            )
+        return self._index
 
     async def acreate_document(self, document: dict, *args, **kwargs) -> None:
         """
@@ -91,14 +188,13 @@ class MeiliSearchRepository(ISearchRepository):
         Returns: None
 
         """
-        async with self._client() as client:
-            index: AsyncIndex = await self.aget_create_index(client=client)
+        index: AsyncIndex = await self.aget_create_index()
 
-            await index.add_documents(
-                documents=[document],
-                primary_key="id",
-            )
-            logger.info("Document created.")
+        await index.add_documents(
+            documents=[document],
+            primary_key="id",
+        )
+        logger.info("Document created.")
 
     async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
         """
@@ -110,11 +206,10 @@ class MeiliSearchRepository(ISearchRepository):
         Returns: None
 
         """
-        async with self._client() as client:
-            index: AsyncIndex = await self.aget_create_index(client=client)
+        index: AsyncIndex = await self.aget_create_index()
 
-            await index.delete_document(document_id=str(document_id))
-            logger.info("Document with {document_id} id deleted.", document_id=document_id)
+        await index.delete_document(document_id=self._document_id(document_id))
+        logger.info("Document with {document_id} id deleted.", document_id=document_id)
 
     async def aupdate_document(
         self,
@@ -133,7 +228,82 @@ class MeiliSearchRepository(ISearchRepository):
         Returns: None
 
         """
-        async with self._client() as client:
-            index: AsyncIndex = await self.aget_create_index(client=client)
-            await index.update_documents(documents=[document], primary_key="id")
-            logger.info("Document updated {document_id}.", document_id=document_id)
+        index: AsyncIndex = await self.aget_create_index()
+        await index.update_documents(documents=[document], primary_key="id")
+        logger.info("Document updated {document_id}.", document_id=document_id)
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        """
+        Create or replace documents in the Meilisearch index with one request.
+        """
+        index: AsyncIndex = await self.aget_create_index()
+        await index.add_documents(documents=documents, primary_key="id")
+        logger.info("Documents upserted: {count}.", count=len(documents))
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        """
+        Delete documents from the Meilisearch index with one request.
+        """
+        index: AsyncIndex = await self.aget_create_index()
+        await index.delete_documents(ids=[self._document_id(document_id) for document_id in document_ids])
+        logger.info("Documents deleted: {count}.", count=len(document_ids))
+
+    async def areindex(self, batches: AsyncIterable[list[dict]], concurrency: int = 4) -> int:
+        """
+        Rebuild the index from scratch - documents are pushed into a fresh index (with settings of the current one),
+        which is swapped with the current index once all of them are indexed.
+
+        Up to `concurrency` batches are uploaded in parallel, next batch is taken from `batches` only when
+        an upload slot is free, so memory holds at most `concurrency + 1` batches.
+        Searches keep using the current index until the swap.
+
+        :param batches: The async iterable of document batches
+        :param concurrency: The number of batches uploaded in parallel
+        :return: The number of indexed documents
+        """
+        client = self.client
+        try:
+            settings = await (await client.get_index(self.INDEX)).get_settings()
+        except MeilisearchApiError as e:
+            if e.status_code != HTTPStatus.NOT_FOUND:
+                raise
+            settings = None
+
+        uid = f"{self.INDEX}-reindex-{uuid6().hex}"
+        index = await client.create_index(uid, primary_key="id", settings=settings)
+        slots = asyncio.Semaphore(concurrency)
+        uploads: set[asyncio.Task] = set()
+        task_uids: list[int] = []
+        count = 0
+
+        async def upload(documents: list[dict]) -> None:
+            try:
+                task_uids.append((await index.add_documents(documents=documents, primary_key="id")).task_uid)
+            finally:
+                slots.release()
+
+        try:
+            async for documents in batches:
+                await slots.acquire()
+                for done in [upload for upload in uploads if upload.done()]:
+                    uploads.discard(done)
+                    done.result()
+                uploads.add(asyncio.create_task(upload(documents)))
+                count += len(documents)
+            await asyncio.gather(*uploads)
+
+            for task_uid in task_uids:
+                await client.wait_for_task(task_uid, timeout_in_ms=None, raise_for_status=True)
+
+            await self.aget_create_index()
+            swap = await client.swap_indexes([(self.INDEX, uid)])
+            await client.wait_for_task(swap.task_uid, timeout_in_ms=None, raise_for_status=True)
+        finally:
+            for pending in uploads:
+                pending.cancel()
+            # after the swap it holds documents of the previous index
+            await client.delete_index_if_exists(uid)
+
+        self._index = None
+        logger.info("Index {index} rebuilt with {count} documents.", index=self.INDEX, count=count)
+        return count
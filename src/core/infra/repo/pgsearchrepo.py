@@ -0,0 +1,172 @@
+import re
+from typing import Any, Type
+from uuid import UUID
+
+from loguru import logger
+from tortoise.fields import BigIntField, FloatField, IntField, SmallIntField
+from tortoise.models import Model
+
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+
+_TOKEN = re.compile(r"\w+")
+# filters of these columns compare numbers, others compare case insensitive text
+NUMERIC_FIELDS = (FloatField, IntField, BigIntField, SmallIntField)
+
+
+class PostgresSearchRepository(ISearchRepository):
+    """
+    Postgres full-text search as a search engine, used when Meilisearch is unavailable (see `FailoverSearchRepository`).
+
+    Rows match when `SEARCH_VECTOR` generated `tsvector` column (of `SEARCH_FIELDS`) matches every query word
+    as a prefix, or when some of `SEARCH_FIELDS` contains the whole query (`ILIKE`, served by `pg_trgm` GIN indexes).
+    Results are ranked by `ts_rank`, filters, sort and facets are plain sql conditions, order and grouping.
+    Table rows are the documents, so document writes are no-op.
+
+    Column and indexes are created by migrations, `vector_column_sql` is the column definition.
+    """
+
+    MODEL: Type[Model] = None
+    INDEX: str = ""
+    SEARCH_FIELDS: list[str] | None = None
+    FIELDS_TO_GET: list[str] | None = None
+    SEARCH_VECTOR: str = "search_vector"
+    TEXT_SEARCH_CONFIG: str = "simple"
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def vector_expression(cls) -> str:
+        document = " || ' ' || ".join(f"coalesce(\"{field}\", '')" for field in cls.SEARCH_FIELDS)
+        return f"to_tsvector('{cls.TEXT_SEARCH_CONFIG}'::regconfig, {document})"
+
+    @classmethod
+    def vector_column_sql(cls) -> str:
+        table = cls.MODEL._meta.db_table
+        return (
+            f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{cls.SEARCH_VECTOR}" tsvector '
+            f"GENERATED ALWAYS AS ({cls.vector_expression()}) STORED"
+        )
+
+    @staticmethod
+    def _ts_query(query: str) -> str:
+        return " & ".join(f"{token}:*" for token in _TOKEN.findall(query.lower()))
+
+    @staticmethod
+    def _like_pattern(query: str) -> str:
+        return "%" + re.sub(r"([\\%_])", r"\\\1", query.strip()) + "%"
+
+    def _columns(self, fields_to_get: list[str] | None) -> list[str]:
+        fields_to_get = fields_to_get or self.FIELDS_TO_GET or ["id"]
+        if "*" in fields_to_get:
+            return list(self.MODEL._meta.fields_db_projection.values())
+        return [self.MODEL._meta.fields_db_projection.get(field, field) for field in fields_to_get]
+
+    def _column(self, field: str) -> str:
+        # only model columns get into sql, they are validated by services anyway
+        if field not in self.MODEL._meta.fields_db_projection:
+            raise ValueError(f"Unknown field {field} of {self.MODEL.__name__}")
+        return self.MODEL._meta.fields_db_projection[field]
+
+    def _where(self, query: str, search_fields: list[str] | None, filters: list[SearchFilter] | None) -> tuple:
+        """
+        Sql condition of matching rows and its parameters - tsquery ($1) and like pattern ($2) of non-empty query,
+        then filter values. Empty query matches all rows.
+        """
+        params: list[Any] = []
+        conditions = []
+        if query.strip():
+            # query without words (only punctuation) is an empty tsquery, it matches only as a substring
+            params = [self._ts_query(query), self._like_pattern(query)]
+            contains = " OR ".join(f'"{field}" ILIKE $2' for field in search_fields or self.SEARCH_FIELDS)
+            conditions.append(
+                f"(\"{self.SEARCH_VECTOR}\" @@ to_tsquery('{self.TEXT_SEARCH_CONFIG}', $1) OR {contains})"
+            )
+
+        for search_filter in filters or []:
+            column = self._column(search_filter.field)
+            if isinstance(self.MODEL._meta.fields_map[search_filter.field], NUMERIC_FIELDS):
+                if search_filter.number is None:
+                    raise ValueError(f"Field {search_filter.field} is numeric")
+                params.append(search_filter.number)
+                conditions.append(f'"{column}" {search_filter.operator} ${len(params)}')
+            else:
+                params.append(search_filter.value)
+                conditions.append(f'lower("{column}") {search_filter.operator} lower(${len(params)})')
+
+        return " AND ".join(conditions) or "TRUE", params
+
+    async def asearch(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 100,
+        fields_to_get: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        """
+        Search for rows with Postgres full-text search.
+
+        Returns: list[Any]
+
+        """
+        columns = ", ".join(f'"{column}"' for column in self._columns(fields_to_get))
+        where, params = self._where(query, search_fields, filters)
+        order = [f'"{self._column(order.field)}" {"DESC" if order.descending else "ASC"}' for order in sort or []]
+        if query.strip():
+            order.append(f"ts_rank(\"{self.SEARCH_VECTOR}\", to_tsquery('{self.TEXT_SEARCH_CONFIG}', $1)) DESC")
+        order += ['"created_at"', '"id"']
+        sql = (
+            f'SELECT {columns} FROM "{self.MODEL._meta.db_table}" WHERE {where} '
+            f"ORDER BY {', '.join(order)} OFFSET ${len(params) + 1} LIMIT ${len(params) + 2}"
+        )
+        rows = await self.MODEL._choose_db().execute_query_dict(sql, [*params, offset, limit])
+
+        logger.info("Postgres search result count: {result}", result=len(rows))
+        return rows
+
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        """
+        Counts of the most common values of `facets` columns among matching rows.
+        """
+        where, params = self._where(query, None, filters)
+        counts = {}
+        for facet in facets:
+            column = self._column(facet)
+            rows = await self.MODEL._choose_db().execute_query_dict(
+                f'SELECT "{column}" AS value, count(*) AS count FROM "{self.MODEL._meta.db_table}" '
+                f'WHERE {where} AND "{column}" IS NOT NULL GROUP BY "{column}" ORDER BY count DESC LIMIT 100',
+                params,
+            )
+            counts[facet] = {str(row["value"]): row["count"] for row in rows}
+        return counts
+
+    async def aget_create_index(self, *args, **kwargs) -> Any:
+        return self.MODEL._meta.db_table
+
+    async def acreate_document(self, document: dict, *args, **kwargs) -> None:
+        pass
+
+    async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
+        pass
+
+    async def aupdate_document(self, document_id: UUID, document: dict, *args, **kwargs) -> None:
+        pass
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        pass
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        pass
@@ -0,0 +1,185 @@
+import json
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, NamedTuple
+from uuid import UUID
+
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+from src.core.utils.encoder import CustomJsonEncoder
+from src.core.utils.metrics import metrics
+
+HITS = "search_cache.{index}.hits"
+MISSES = "search_cache.{index}.misses"
+HIT_RATIO = "search_cache.{index}.hit_ratio"
+EVICTIONS = "search_cache.{index}.evictions"
+SIZE_BYTES = "search_cache.{index}.bytes"
+ENTRIES = "search_cache.{index}.entries"
+
+
+class _Entry(NamedTuple):
+    version: int
+    expires_at: float
+    size: int
+    results: Any
+
+
+class CachedSearchRepository(ISearchRepository):
+    """
+    Search repository decorator caching search results in an in-process LRU cache with TTL.
+
+    Results (and facet counts) are keyed by index, query, paging, fields, filters and sort, the cache is bounded
+    by `max_bytes` of JSON encoded results (least recently used entries are evicted first).
+    Every document write bumps the index version, entries cached under older version are misses,
+    so results never outlive writes of this process. Search engines apply writes asynchronously and
+    other app instances write too - `ttl` bounds how long such results stay cached, zero `ttl` disables the cache.
+    """
+
+    def __init__(self, repository: ISearchRepository, max_bytes: int = 16 * 1024 * 1024, ttl: float = 30.0):
+        self._repository = repository
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def INDEX(self) -> str:
+        return getattr(self._repository, "INDEX", "")
+
+    def _metric(self, name: str) -> str:
+        return name.format(index=self.INDEX)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self) -> None:
+        """
+        Bump the index version, cached results are dropped lazily.
+        """
+        self._version += 1
+
+    def _evict(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+            metrics.inc(self._metric(HITS))
+        else:
+            self._misses += 1
+            metrics.inc(self._metric(MISSES))
+        metrics.set(self._metric(HIT_RATIO), self._hits / (self._hits + self._misses))
+
+    def _get(self, key: tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != self._version or entry.expires_at <= monotonic():
+            self._evict(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.results
+
+    def _put(self, key: tuple, version: int, results: Any) -> None:
+        if version != self._version or self._ttl <= 0:
+            # index was written while searching, results may miss the write
+            return
+        size = len(json.dumps(results, cls=CustomJsonEncoder))
+        if size > self._max_bytes:
+            return
+
+        if key in self._entries:
+            self._evict(key)
+        while self._entries and self._bytes + size > self._max_bytes:
+            self._evict(next(iter(self._entries)))
+            metrics.inc(self._metric(EVICTIONS))
+        self._entries[key] = _Entry(version, monotonic() + self._ttl, size, results)
+        self._bytes += size
+
+        metrics.set(self._metric(SIZE_BYTES), self._bytes)
+        metrics.set(self._metric(ENTRIES), len(self._entries))
+
+    async def _acached(self, key: tuple, search: Callable[[], Awaitable[Any]]) -> Any:
+        results = self._get(key)
+        self._record(hit=results is not None)
+        if results is not None:
+            return results
+
+        version = self._version
+        results = await search()
+        self._put(key, version, results)
+        return results
+
+    async def asearch(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 100,
+        fields_to_get: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        # repr keeps unhashable arguments (lists of filters) usable as a key
+        key = (
+            self.INDEX,
+            query,
+            offset,
+            limit,
+            repr((fields_to_get, search_fields, filters, sort, args, sorted(kwargs.items()))),
+        )
+
+        async def search() -> list[Any]:
+            return list(
+                await self._repository.asearch(
+                    query, offset, limit, fields_to_get, search_fields, filters, sort, *args, **kwargs
+                )
+            )
+
+        return list(await self._acached(key, search))
+
+    async def afacets(
+        self,
+        query: str,
+        facets: list[str],
+        filters: list[SearchFilter] | None = None,
+        *args,
+        **kwargs,
+    ) -> dict[str, dict[str, int]]:
+        key = (self.INDEX, query, "facets", repr((facets, filters, args, sorted(kwargs.items()))))
+        return await self._acached(key, lambda: self._repository.afacets(query, facets, filters, *args, **kwargs))
+
+    async def aget_create_index(self, *args, **kwargs) -> Any:
+        return await self._repository.aget_create_index(*args, **kwargs)
+
+    async def acreate_document(self, document: dict, *args, **kwargs) -> None:
+        self.invalidate()
+        await self._repository.acreate_document(document, *args, **kwargs)
+
+    async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
+        self.invalidate()
+        await self._repository.adelete_document(document_id, *args, **kwargs)
+
+    async def aupdate_document(self, document_id: UUID, document: dict, *args, **kwargs) -> None:
+        self.invalidate()
+        await self._repository.aupdate_document(document_id, document, *args, **kwargs)
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        self.invalidate()
+        await self._repository.aupsert_documents(documents, *args, **kwargs)
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        self.invalidate()
+        await self._repository.adelete_documents(document_ids, *args, **kwargs)
+
+    async def aclose(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        await self._repository.aclose()
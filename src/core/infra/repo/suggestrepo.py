@@ -0,0 +1,203 @@
+import heapq
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, AsyncIterable, Optional
+from uuid import UUID
+
+from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.search import SearchFilter, SearchSort
+from src.core.infra.repo.embeddedsearchrepo import document_key, tokenize
+
+# sorts after every character, `prefix + _LAST` closes the range of keys starting with prefix
+_LAST = "\U0010ffff"
+
+
+class PrefixSuggestRepository(ISearchRepository):
+    """
+    In-process typeahead index - documents whose `SUGGEST_FIELDS` start with the query, ranked by popularity.
+
+    Every field value is keyed by each of its word starts ("peanut butter" -> "peanut butter", "butter"),
+    keys with their document numbers are kept in a sorted array and looked up with binary search.
+    New keys go to a small sorted buffer merged into the array when it grows.
+    Best `TOP_K` documents of short prefixes and of other wide ranges are cached and updated in place on writes,
+    narrow ranges are ranked on the fly.
+
+    It is fed with documents by the outbox relay like search engines, `apopularity` gives ranking scores
+    when the index is rebuilt. `SUGGEST_FIELDS` have to be a part of `FIELDS_TO_GET`, which are stored.
+    """
+
+    INDEX: str = ""
+    SUGGEST_FIELDS: list[str] | None = None
+    FIELDS_TO_GET: list[str] | None = None
+    TOP_K: int = 10
+    # best documents are cached for prefixes up to this length or matching more than `CACHED_RANGE` keys
+    SHORT_PREFIX: int = 4
+    CACHED_RANGE: int = 256
+    MAX_WORD_STARTS: int = 5
+    MERGE_THRESHOLD: int = 10_000
+
+    def __init__(self, *args, **kwargs):
+        self._reset()
+
+    def _reset(self) -> None:
+        # document number -> stored `FIELDS_TO_GET` values, None when removed
+        self._documents: list[Optional[tuple]] = []
+        self._scores = array("q")
+        self._docnums: dict[str, int] = {}
+        self._popularity: dict[str, int] = {}
+        self._keys: list[str] = []
+        self._key_docnums = array("I")
+        self._pending: list[tuple[str, int]] = []
+        # cached prefix -> best document numbers, best first
+        self._top: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docnums)
+
+    async def apopularity(self) -> dict[str, int]:
+        """
+        Popularity of documents by id, higher is suggested first.
+        """
+        return {}
+
+    def _suggest_keys(self, values: dict) -> set[str]:
+        keys = set()
+        for field in self.SUGGEST_FIELDS:
+            words = tokenize(values.get(field))
+            for start in range(min(len(words), self.MAX_WORD_STARTS)):
+                keys.add(" ".join(words[start:]))
+        return keys
+
+    def _stored(self, docnum: int) -> dict:
+        return dict(zip(self.FIELDS_TO_GET, self._documents[docnum]))
+
+    def _rank(self, docnum: int) -> tuple[int, int]:
+        # the most popular first, older documents first on a tie
+        return self._scores[docnum], -docnum
+
+    def _add(self, document: dict) -> list[tuple[str, int]]:
+        key = document_key(document["id"])
+        self._remove(key)
+
+        docnum = len(self._documents)
+        self._documents.append(tuple(document.get(field) for field in self.FIELDS_TO_GET))
+        self._scores.append(self._popularity.get(key, 0))
+        self._docnums[key] = docnum
+        return [(suggest_key, docnum) for suggest_key in self._suggest_keys(document)]
+
+    def _index(self, document: dict) -> None:
+        entries = self._add(document)
+        docnum = len(self._documents) - 1
+        for entry in entries:
+            insort(self._pending, entry)
+
+        prefixes = {suggest_key[:n] for suggest_key, _ in entries for n in range(1, len(suggest_key) + 1)}
+        for prefix in prefixes & self._top.keys():
+            top = self._top[prefix]
+            if docnum not in top:
+                top.append(docnum)
+                top.sort(key=self._rank, reverse=True)
+                del top[self.TOP_K :]
+
+        if len(self._pending) > self.MERGE_THRESHOLD:
+            self._merge()
+
+    def _remove(self, key: str) -> None:
+        # cached top lists keep removed documents, they are recomputed when read
+        docnum = self._docnums.pop(key, None)
+        if docnum is not None:
+            self._documents[docnum] = None
+
+    def _merge(self) -> None:
+        documents = self._documents
+        entries = sorted(
+            [entry for entry in zip(self._keys, self._key_docnums) if documents[entry[1]] is not None]
+            + [entry for entry in self._pending if documents[entry[1]] is not None]
+        )
+        self._keys = [suggest_key for suggest_key, _ in entries]
+        self._key_docnums = array("I", (docnum for _, docnum in entries))
+        self._pending = []
+
+    def _matching(self, prefix: str) -> set[int]:
+        documents = self._documents
+        start, end = bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + _LAST)
+        docnums = {docnum for docnum in self._key_docnums[start:end] if documents[docnum] is not None}
+
+        start, end = bisect_left(self._pending, (prefix,)), bisect_left(self._pending, (prefix + _LAST,))
+        docnums.update(docnum for _, docnum in self._pending[start:end] if documents[docnum] is not None)
+        return docnums
+
+    def _best(self, prefix: str, count: int) -> list[int]:
+        top = self._top.get(prefix)
+        if top is not None and count <= self.TOP_K and all(self._documents[docnum] is not None for docnum in top):
+            return top[:count]
+
+        matching = self._matching(prefix)
+        best = heapq.nlargest(max(count, self.TOP_K), matching, key=self._rank)
+        if top is not None or len(prefix) <= self.SHORT_PREFIX or len(matching) > self.CACHED_RANGE:
+            self._top[prefix] = best[: self.TOP_K]
+        return best[:count]
+
+    async def asearch(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 10,
+        fields_to_get: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        filters: list[SearchFilter] | None = None,
+        sort: list[SearchSort] | None = None,
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        """
+        Suggest documents whose field starts with the query words, the last one may be incomplete.
+        Suggestions are always ranked by popularity, `filters` and `sort` are not supported.
+
+        Returns: list[Any]
+
+        """
+        prefix = " ".join(tokenize(query))
+        if not prefix:
+            return []
+
+        return [self._stored(docnum) for docnum in self._best(prefix, offset + limit)[offset:]]
+
+    async def aget_create_index(self, *args, **kwargs) -> Any:
+        return self
+
+    async def acreate_document(self, document: dict, *args, **kwargs) -> None:
+        self._index(document)
+
+    async def adelete_document(self, document_id: UUID, *args, **kwargs) -> None:
+        self._remove(document_key(document_id))
+
+    async def aupdate_document(self, document_id: UUID, document: dict, *args, **kwargs) -> None:
+        self._index(document)
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        for document in documents:
+            self._index(document)
+
+    async def adelete_documents(self, document_ids: list[UUID | str], *args, **kwargs) -> None:
+        for document_id in document_ids:
+            self._remove(document_key(document_id))
+
+    async def areindex(self, batches: AsyncIterable[list[dict]], concurrency: int = 1) -> int:
+        """
+        Rebuild the index from batches of documents with fresh `apopularity`,
+        suggestions come from the old index until it is built.
+
+        :param batches: Async iterable of document batches
+        :param concurrency: Unused, the index is built in-process
+        :return: The number of indexed documents
+        """
+        fresh = type(self)()
+        fresh._popularity = await self.apopularity()
+        async for batch in batches:
+            for document in batch:
+                fresh._pending.extend(fresh._add(document))
+        fresh._merge()
+
+        self.__dict__.update(fresh.__dict__)
+        return len(self._docnums)
@@ -1,22 +1,31 @@
+import json
 from abc import ABCMeta
-from copy import deepcopy
-from typing import TypeVar, Generic, Type, List, Optional, Any
+from itertools import groupby
+from typing import TypeVar, Generic, Type, List, Optional, Any, Iterable, AsyncIterator
 from uuid import UUID
 
 from asyncpg import ObjectInUseError
 from loguru import logger
 
-from tortoise.exceptions import BaseORMException
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import BaseORMException, DoesNotExist
+from tortoise.expressions import Q
 from tortoise.fields import Field, ReverseRelation
-from tortoise.models import Model
+from tortoise.models import MetaInfo, Model
 from pydantic import BaseModel
 from tortoise.queryset import QuerySet, QuerySetSingle
 from tortoise.transactions import in_transaction
+from tortoise.utils import chunk
 
 from src.core.domain.entity import Entity
-from src.core.domain.errors import DBError
+from src.core.domain.errors import DBError, ValidationError
+from src.core.domain.pagination import Cursor
 from src.core.domain.repo.postgres import IPostgresRepository
-from src.core.domain.value_object import PrecisedFloat
+from src.core.domain.repo.search_engine import FULL_DOCUMENT
+from src.core.infra.model import SearchOutbox
+from src.core.infra.repo.identity_map import IdentityMap
+from src.core.infra.repo.mapper import EntityMapper, project, record_from_json
+from src.core.infra.router import ReadYourWrites
 
 ModelType = TypeVar("ModelType", bound=Model)
 PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
@@ -44,53 +53,154 @@ class TortoiseRepo(Generic[ModelType, EntityType], IPostgresRepository, metaclas
     model = ModelType
     entity = EntityType
 
+    BULK_BATCH_SIZE: int = 500
+    # `(reverse relation, its foreign key)` loaded together with the record by `aget_aggregate_by_id`,
+    # e.g. `("products", "product")` for a day with its products
+    AGGREGATE_RELATION: Optional[tuple[str, str]] = None
+    # always selected by `fields` projection - entity identity and pagination cursor need them
+    PROJECTION_FIELDS: tuple[str, ...] = ("id", "created_at", "updated_at")
+    # search index synchronised with the table - every write adds `SearchOutbox` rows in its transaction
+    SEARCH_INDEX: Optional[str] = None
+    # relations embedded in full search documents (see `to_search_document`)
+    SEARCH_FETCH_FIELDS: tuple[str, ...] = ()
+
+    _mapper: EntityMapper[ModelType, EntityType]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if isinstance(cls.model, type) and isinstance(cls.entity, type):
+            cls._mapper = EntityMapper(cls.model, cls.entity)
+
     @staticmethod
     def _convert_key(key: str) -> str:
         return key[1:] if key.startswith("_") else key
 
+    @classmethod
+    def columns(cls) -> tuple[str, ...]:
+        """
+        Entity fields stored in table columns, usable as `fields` projection without relations.
+        """
+        return cls._mapper.columns
+
     @classmethod
     def _to_entity(cls, record: ModelType) -> EntityType | None:
-        def convert_value(value) -> PrecisedFloat | list[dict] | None:
-            if isinstance(value, float):
-                return PrecisedFloat(value)
-            return value
+        return cls._mapper.to_entity(record)
 
-        def should_be_skipped(key: str) -> bool:
-            return key in ["_partial", "_saved_in_db", "_custom_generated_pk"]
+    @classmethod
+    def _fetch_fields(cls, fetch_fields: Optional[list[str]] = None) -> list[str]:
+        """
+        Relations read by public methods - the given ones, or (when none are given) all relations of the entity.
+        """
+        return fetch_fields or _get_fetch_fields(cls.entity.__init__, cls.model)
 
-        if record:
-            _dict = {
-                cls._convert_key(key): convert_value(value)
-                for key, value in vars(record).items()
-                if not should_be_skipped(key)
-            }
-            return cls.entity(**_dict)
+    @classmethod
+    async def _prefetch(cls, queryset: QuerySet | QuerySetSingle, fetch_fields: list[str]):
+        return await queryset.prefetch_related(*fetch_fields)
 
-        return None
+    @classmethod
+    async def _fetch_related(cls, records: ModelType | list[ModelType], fetch_fields: list[str]):
+        """
+        Load relations of already fetched records, planned as a whole: one `IN (...)` query per relation level
+        for all records (`products` and `products__product` is two queries, not three), sibling relations
+        are loaded concurrently.
+        """
+        records = records if isinstance(records, list) else [records]
+        if records and fetch_fields:
+            await cls.model.fetch_for_list(records, *fetch_fields)
 
     @classmethod
-    async def _prefetch(
-        cls,
-        queryset: QuerySet | QuerySetSingle,
-        fetch_fields: Optional[list[str]] = None,
-    ):
-        fetch_fields = fetch_fields or _get_fetch_fields(cls.entity.__init__, cls.model)
-        return await queryset.prefetch_related(*fetch_fields)
+    def _projection(cls, fields: list[str], fetch_fields: Optional[list[str]] = None) -> tuple[list[str], list[str]]:
+        """
+        Split `fields` projection into columns to `SELECT` and relations to fetch.
+
+        Relation is fetched only when it is in `fields`, together with its nested `fetch_fields`
+        (`products_for_recipe` in fields keeps `products_for_recipe__product`).
+
+        :raises ValidationError: When field is neither entity column nor relation
+        """
+        meta = cls.model._meta
+        columns = dict.fromkeys(cls.PROJECTION_FIELDS)
+        relations = []
+        for name in fields:
+            if name in cls._mapper.columns:
+                columns[name] = None
+            elif name in meta.fetch_fields:
+                relations.append(name)
+                if name in meta.fk_fields or name in meta.o2o_fields:
+                    columns[meta.fields_map[name].source_field] = None
+            else:
+                raise ValidationError(f"Unknown field: {name}")
+
+        fetch = [field for field in cls._fetch_fields(fetch_fields) if field.partition("__")[0] in relations]
+        fetch += [relation for relation in relations if relation not in {field.partition("__")[0] for field in fetch}]
+        return list(columns), fetch
 
     @classmethod
-    async def _fetch_related(
-        cls,
-        queryset: QuerySet | QuerySetSingle,
-        fetch_fields: Optional[list[str]] = None,
-    ):
-        fetch_fields = fetch_fields or _get_fetch_fields(cls.entity.__init__, cls.model)
-        for field in fetch_fields:
-            await queryset.fetch_related(field)
+    def _written(cls, ids: Iterable[UUID] = ()) -> None:
+        """
+        Hook called after every write - drops written rows from the request identity map (if there is one)
+        and keeps rest of the request reading from primary database (see `ReadYourWrites`).
+        """
+        ReadYourWrites.mark()
+        identity_map = IdentityMap.current()
+        if identity_map is not None:
+            identity_map.invalidate(cls.model, ids)
 
     @classmethod
-    def convert_snapshot(cls, snapshot: dict) -> dict:
-        snapshot = deepcopy(snapshot)
+    async def _aoutbox(cls, ids: Iterable[UUID], connection: BaseDBAsyncClient) -> None:
+        """
+        Record written ids in `SearchOutbox` (when repository has `SEARCH_INDEX`), `connection` is the transaction
+        of the write, so the change and its outbox rows are committed or rolled back together.
+        """
+        if cls.SEARCH_INDEX:
+            records = [SearchOutbox(index=cls.SEARCH_INDEX, document_id=id) for id in ids]
+            if records:
+                await SearchOutbox.bulk_create(records, batch_size=cls.BULK_BATCH_SIZE, using_db=connection)
+
+    @classmethod
+    def to_search_document(cls, entity: EntityType, full: bool = False) -> dict[str, Any]:
+        """
+        Search index document of entity - its columns, without relations.
+
+        `full` document is the whole entity with `SEARCH_FETCH_FIELDS` relations fetched into it
+        (the same data `to_dto` builds output DTO from), marked with `FULL_DOCUMENT`, so search results
+        can be returned without reading db.
+        """
+        if full:
+            return {**project(entity), FULL_DOCUMENT: True}
+        return {name: value for name, value in entity.snapshot.items() if name in cls._mapper.columns}
+
+    @classmethod
+    def to_dto(cls, entity: EntityType, dto: Type[PydanticModel], **extra: Any) -> PydanticModel:
+        """
+        Build output DTO straight from entity (and tortoise records fetched into it) in a single pass,
+        without `snapshot` / `convert_snapshot` intermediate copies.
+
+        :param entity: The entity to project
+        :param dto: The pydantic output DTO class
+        :param extra: Additional DTO fields, they override entity values
+        :return: The DTO instance
+        """
+        data = project(entity)
+        data.update(extra)
+        return dto(**data)
+
+    @classmethod
+    def to_sparse(cls, entity: EntityType, fields: list[str], **extra: Any) -> dict[str, Any]:
+        """
+        Sparse output - only requested `fields` of (usually projected) entity, e.g. for `?fields=id,name`.
+
+        :param entity: The entity to project
+        :param fields: The output fields
+        :param extra: Additional output values, they override entity values
+        :return: The dict with exactly `fields` keys
+        """
+        data = project(entity)
+        data.update(extra)
+        return {name: data.get(name) for name in fields}
 
+    @classmethod
+    def convert_snapshot(cls, snapshot: dict) -> dict:
         def _convert_value(value: Any):
             if isinstance(value, ReverseRelation):
                 return [{cls._convert_key(k): _convert_value(v) for k, v in vars(val).items()} for val in value]
@@ -104,33 +214,175 @@ class TortoiseRepo(Generic[ModelType, EntityType], IPostgresRepository, metaclas
     @classmethod
     async def asave(cls, entity: EntityType) -> EntityType:
         try:
-            async with in_transaction():
+            async with in_transaction(cls.model._meta.default_connection) as connection:
                 entity = await cls.model.create(**entity.snapshot)
+                await cls._aoutbox([entity.id], connection)
                 logger.info("Object {entity} saved in db", entity=entity)
                 return entity
 
         except (BaseORMException, ObjectInUseError) as e:
             raise DBError(e)
+        finally:
+            cls._written()
 
     @classmethod
-    async def aget_by_id(cls, id: UUID, fetch_fields: Optional[list[str]] = None) -> EntityType | None:
+    async def aget_by_id(
+        cls,
+        id: UUID,
+        fetch_fields: Optional[list[str]] = None,
+        fields: Optional[list[str]] = None,
+        fresh: bool = False,
+    ) -> EntityType | None:
+        """
+        Get entity by id, inside http request it is read from db only once (see `IdentityMap`)
+        until it is written.
+
+        With `fields` only those columns (and relations) are selected and lightweight entity is returned,
+        projected reads bypass identity map. So do `fresh` reads - entity about to be changed in place
+        is a private copy, state which fails to be written doesn't leak to other readers.
+        """
+        if fields:
+            columns, fetch_fields = cls._projection(fields, fetch_fields)
+            model = await cls.model.filter(id=id).only(*columns).get()
+            await cls._fetch_related(model, fetch_fields)
+            return cls._to_entity(model)
+
+        fetch_fields = cls._fetch_fields(fetch_fields)
+        identity_map = None if fresh else IdentityMap.current()
+        if identity_map is not None and (entity := identity_map.get(cls.model, id, fetch_fields)) is not None:
+            return entity
+
         model = await cls.model.get(id=id)
 
         await cls._fetch_related(model, fetch_fields)
 
-        return cls._to_entity(model)
+        entity = cls._to_entity(model)
+        if identity_map is not None:
+            identity_map.add(cls.model, id, entity, fetch_fields)
+        return entity
+
+    @classmethod
+    def _aggregate_fetch_fields(cls) -> list[str]:
+        relation, related = cls.AGGREGATE_RELATION
+        return [relation, f"{relation}__{related}"]
+
+    @classmethod
+    def _aggregate_query(cls) -> str:
+        meta = cls.model._meta
+        relation, related = cls.AGGREGATE_RELATION
+        relation_field = meta.fields_map[relation]
+        child_meta = relation_field.related_model._meta
+        related_field = child_meta.fields_map[related]
+        related_meta = related_field.related_model._meta
+
+        pk, child_pk, related_pk = meta.db_pk_column, child_meta.db_pk_column, related_meta.db_pk_column
+        parent_column = child_meta.fields_db_projection[relation_field.relation_field]
+        related_column = child_meta.fields_db_projection[related_field.source_field]
+
+        # columns of model fields only - other table columns (e.g. generated `search_vector`) are not read
+        def json_row(alias: str, row_meta: MetaInfo) -> str:
+            columns = row_meta.fields_db_projection.values()
+            pairs = ", ".join(f"'{column}', \"{alias}\".\"{column}\"" for column in columns)
+            return f"json_build_object({pairs})"
+
+        parent_columns = ", ".join(f'"p"."{column}"' for column in meta.fields_db_projection.values())
+        related_row = f'CASE WHEN "r"."{related_pk}" IS NULL THEN NULL ELSE {json_row("r", related_meta)} END'
+        return (
+            f"SELECT {parent_columns}, COALESCE("
+            f"json_agg(json_build_object('row', {json_row('c', child_meta)}, 'related', {related_row}) "
+            f'ORDER BY "c"."created_at", "c"."{child_pk}") FILTER (WHERE "c"."{child_pk}" IS NOT NULL), '
+            "'[]') AS \"__aggregate\" "
+            f'FROM "{meta.db_table}" "p" '
+            f'LEFT JOIN "{child_meta.db_table}" "c" ON "c"."{parent_column}" = "p"."{pk}" '
+            f'LEFT JOIN "{related_meta.db_table}" "r" ON "r"."{related_pk}" = "c"."{related_column}" '
+            f'WHERE "p"."{pk}" = $1 GROUP BY "p"."{pk}"'
+        )
+
+    @classmethod
+    async def aget_aggregate_by_id(cls, id: UUID) -> EntityType:
+        """
+        Get entity with its `AGGREGATE_RELATION` (e.g. day with products and their product) in one round trip -
+        `LEFT JOIN` of both relations aggregated with `json_agg` into a single row.
+
+        Result is the same as `aget_by_id(id, fetch_fields=[relation, "relation__related"])`,
+        repositories without `AGGREGATE_RELATION` fall back to `aget_by_id`.
+
+        :raises DoesNotExist: When there is no record with given id
+        """
+        if not cls.AGGREGATE_RELATION:
+            return await cls.aget_by_id(id)
+
+        fetch_fields = cls._aggregate_fetch_fields()
+        identity_map = IdentityMap.current()
+        if identity_map is not None and (entity := identity_map.get(cls.model, id, fetch_fields)) is not None:
+            return entity
+
+        rows = await cls.model._choose_db().execute_query_dict(
+            cls._aggregate_query(), [cls.model._meta.pk.to_db_value(id, cls.model)]
+        )
+        if not rows:
+            raise DoesNotExist(f"{cls.model.__name__} with id {id} does not exist")
+
+        row = rows[0]
+        children = row.pop("__aggregate")
+        children = json.loads(children) if isinstance(children, str) else children
+
+        relation, related = cls.AGGREGATE_RELATION
+        relation_field = cls.model._meta.fields_map[relation]
+        related_model = relation_field.related_model._meta.fields_map[related].related_model
+        records = []
+        for child in children:
+            record = record_from_json(relation_field.related_model, child["row"])
+            setattr(record, related, record_from_json(related_model, child["related"]) if child["related"] else None)
+            records.append(record)
+
+        model = cls.model._init_from_db(**row)
+        getattr(model, relation)._set_result_for_query(records)
+
+        entity = cls._to_entity(model)
+        if identity_map is not None:
+            identity_map.add(cls.model, id, entity, fetch_fields)
+        return entity
+
+    @staticmethod
+    def _paginate(queryset: QuerySet, limit: int, offset: int, cursor: Optional[Cursor] = None) -> QuerySet:
+        """
+        Order rows by `(created_at, id)` and take a page of them. With cursor it is keyset pagination -
+        rows after the cursor are read straight from the `(created_at, id)` index, instead of
+        scanning and discarding `offset` rows.
+        """
+        if cursor:
+            queryset = queryset.filter(
+                Q(created_at__gt=cursor.created_at) | Q(created_at=cursor.created_at, id__gt=cursor.id)
+            )
+        else:
+            queryset = queryset.offset(offset)
+        return queryset.order_by("created_at", "id").limit(limit)
 
     @classmethod
-    async def aget_all(cls, limit=100, offset=0, fetch_fields: Optional[list[str]] = None) -> list[EntityType]:
-        queryset = cls.model.all().limit(limit).offset(offset)
-        return [cls._to_entity(record) for record in await cls._prefetch(queryset, fetch_fields)]
+    async def aget_all(
+        cls,
+        limit=100,
+        offset=0,
+        fetch_fields: Optional[list[str]] = None,
+        cursor: Optional[Cursor] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[EntityType]:
+        queryset = cls.model.all()
+        if fields:
+            columns, fetch_fields = cls._projection(fields, fetch_fields)
+            queryset = queryset.only(*columns)
+        else:
+            fetch_fields = cls._fetch_fields(fetch_fields)
+        queryset = cls._paginate(queryset, limit, offset, cursor)
+        return cls._mapper.to_entities(await cls._prefetch(queryset, fetch_fields))
 
     @classmethod
     async def aget_first_from_filter(
         cls, fetch_fields: Optional[list[str]] = None, *args, **kwargs
     ) -> EntityType | None:
         queryset = cls.model.filter(*args, **kwargs).first()
-        return cls._to_entity(await cls._prefetch(queryset, fetch_fields))
+        return cls._to_entity(await cls._prefetch(queryset, cls._fetch_fields(fetch_fields)))
 
     @classmethod
     async def aget_all_from_filter(
@@ -138,28 +390,182 @@ class TortoiseRepo(Generic[ModelType, EntityType], IPostgresRepository, metaclas
         limit=100,
         offset=0,
         fetch_fields: Optional[list[str]] = None,
+        cursor: Optional[Cursor] = None,
+        fields: Optional[list[str]] = None,
         *args,
         **kwargs,
     ) -> list[EntityType]:
-        queryset = cls.model.filter(*args, **kwargs).limit(limit).offset(offset).all()
-        return [cls._to_entity(record) for record in await cls._prefetch(queryset, fetch_fields)]
+        queryset = cls.model.filter(*args, **kwargs)
+        if fields:
+            columns, fetch_fields = cls._projection(fields, fetch_fields)
+            queryset = queryset.only(*columns)
+        else:
+            fetch_fields = cls._fetch_fields(fetch_fields)
+        queryset = cls._paginate(queryset, limit, offset, cursor)
+        return cls._mapper.to_entities(await cls._prefetch(queryset, fetch_fields))
+
+    @classmethod
+    async def astream(
+        cls,
+        batch_size: Optional[int] = None,
+        fetch_fields: Iterable[str] = (),
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[list[EntityType]]:
+        """
+        Stream (filtered) entities in batches with server-side cursor - only the batch being consumed is in memory,
+        whatever the table size. `fetch_fields` relations are loaded per batch.
+
+        :param batch_size: The batch size (and cursor prefetch), defaults to `BULK_BATCH_SIZE`
+        :param fetch_fields: The relations to load
+        :return: The async iterator of entity batches
+        """
+        batch_size = batch_size or cls.BULK_BATCH_SIZE
+        query = cls.model.filter(*args, **kwargs).sql()
+        records = []
+        async with cls.model._choose_db().acquire_connection() as connection:
+            async with connection.transaction():
+                async for row in connection.cursor(query, prefetch=batch_size):
+                    records.append(cls.model._init_from_db(**dict(row)))
+                    if len(records) >= batch_size:
+                        await cls._fetch_related(records, list(fetch_fields))
+                        yield cls._mapper.to_entities(records)
+                        records = []
+        if records:
+            await cls._fetch_related(records, list(fetch_fields))
+            yield cls._mapper.to_entities(records)
 
     @classmethod
     async def aupdate(cls, entity: EntityType) -> None:
-        snapshot = deepcopy(entity.snapshot)
         clean_snapshot = {
-            k: v for k, v in snapshot.items() if k != "id" and not isinstance(v, (Field, ReverseRelation, Model))
+            k: v for k, v in entity.snapshot.items() if k != "id" and not isinstance(v, (Field, ReverseRelation, Model))
         }
         try:
-            async with in_transaction():
+            async with in_transaction(cls.model._meta.default_connection) as connection:
                 await cls.model.filter(id=entity.id).update(**clean_snapshot)
+                await cls._aoutbox([entity.id], connection)
         except BaseORMException as e:
             raise DBError(e)
+        finally:
+            cls._written([entity.id])
 
     @classmethod
     async def adelete(cls, entity: EntityType) -> None:
         try:
-            async with in_transaction():
+            async with in_transaction(cls.model._meta.default_connection) as connection:
                 await cls.model.filter(id=entity.id).delete()
+                await cls._aoutbox([entity.id], connection)
+        except BaseORMException as e:
+            raise DBError(e)
+        finally:
+            cls._written([entity.id])
+
+    @classmethod
+    async def abulk_save(cls, entities: Iterable[EntityType], batch_size: Optional[int] = None) -> None:
+        """
+        Insert entities with multi-row `executemany`, one round trip per chunk of `batch_size` rows.
+
+        :param entities: The entities to insert
+        :param batch_size: The chunk size, defaults to `BULK_BATCH_SIZE`
+        """
+        records = [cls.model(**cls._mapper.to_columns(entity)) for entity in entities]
+        if not records:
+            return
+
+        try:
+            async with in_transaction(cls.model._meta.default_connection) as connection:
+                await cls.model.bulk_create(
+                    records,
+                    batch_size=batch_size or cls.BULK_BATCH_SIZE,
+                    using_db=connection,
+                )
+                await cls._aoutbox([record.id for record in records], connection)
+                logger.info("{count} object(s) of {model} saved in db", count=len(records), model=cls.model.__name__)
+        except (BaseORMException, ObjectInUseError) as e:
+            raise DBError(e)
+        finally:
+            cls._written()
+
+    @classmethod
+    async def abulk_update(
+        cls,
+        entities: Iterable[EntityType],
+        fields: Optional[list[str]] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """
+        Update entities with `executemany`, one round trip per chunk of `batch_size` rows.
+
+        Only changed columns are written, None values included - `fields` when given, otherwise the fields
+        assigned on entity since it was loaded or last written (`Entity.changed_fields`). Concurrent writers
+        changing other columns of the same rows don't lose their changes. Entities not tracking changes
+        write all their columns which are set. Entities are grouped by their set of changed columns,
+        so every group is a single prepared `UPDATE ... WHERE id = $n` statement.
+
+        :param entities: The entities to update
+        :param fields: The columns to update, defaults to changed columns of every entity
+        :param batch_size: The chunk size, defaults to `BULK_BATCH_SIZE`
+        """
+        meta = cls.model._meta
+        columns = tuple(name for name in cls._mapper.columns if name not in ("id", "created_at"))
+
+        def changed_columns(entity: EntityType) -> dict[str, Any]:
+            changed = fields if fields is not None else entity.changed_fields
+            if changed is None:
+                return cls._mapper.to_columns(entity, columns)
+            values = entity.__dict__
+            return {name: values[name] for name in columns if name in changed}
+
+        entities = list(entities)
+        rows = [(entity.id, changed_columns(entity)) for entity in entities]
+        rows.sort(key=lambda row: tuple(row[1]))
+
+        try:
+            async with in_transaction(cls.model._meta.default_connection) as connection:
+                for changed, group in groupby(rows, key=lambda row: tuple(row[1])):
+                    if not changed:
+                        continue
+                    assignments = ", ".join(
+                        f'"{meta.fields_db_projection[name]}" = ${idx}' for idx, name in enumerate(changed, start=1)
+                    )
+                    query = (
+                        f'UPDATE "{meta.db_table}" SET {assignments} '
+                        f'WHERE "{meta.db_pk_column}" = ${len(changed) + 1}'
+                    )
+                    to_db = [meta.fields_map[name].to_db_value for name in changed]
+                    for rows_chunk in chunk(list(group), batch_size or cls.BULK_BATCH_SIZE):
+                        await connection.execute_many(
+                            query,
+                            [
+                                [convert(values[name], cls.model) for convert, name in zip(to_db, changed)] + [id]
+                                for id, values in rows_chunk
+                            ],
+                        )
+                await cls._aoutbox([id for id, values in rows if values], connection)
+        except BaseORMException as e:
+            raise DBError(e)
+        finally:
+            cls._written([id for id, _ in rows])
+
+        for entity in entities:
+            entity.mark_written(fields)
+
+    @classmethod
+    async def abulk_delete(cls, entities: Iterable[EntityType | UUID], batch_size: Optional[int] = None) -> None:
+        """
+        Delete entities (or ids) with `DELETE ... WHERE id IN (...)`, one round trip per chunk of `batch_size` ids.
+
+        :param entities: The entities or their ids to delete
+        :param batch_size: The chunk size, defaults to `BULK_BATCH_SIZE`
+        """
+        ids = [entity if isinstance(entity, UUID) else entity.id for entity in entities]
+
+        try:
+            async with in_transaction(cls.model._meta.default_connection) as connection:
+                for ids_chunk in chunk(ids, batch_size or cls.BULK_BATCH_SIZE):
+                    await cls.model.filter(id__in=ids_chunk).using_db(connection).delete()
+                await cls._aoutbox(ids, connection)
         except BaseORMException as e:
             raise DBError(e)
+        finally:
+            cls._written(ids)
@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import cycle
+from typing import Iterator, Optional, Type
+
+from tortoise.backends.base.client import BaseTransactionWrapper
+from tortoise.connection import connections
+from tortoise.models import Model
+
+PRIMARY = "default"
+REPLICA_PREFIX = "replica_"
+
+_current: ContextVar[Optional["ReadYourWrites"]] = ContextVar("read_your_writes", default=None)
+
+
+class ReadYourWrites:
+    """
+    Request scoped read-your-writes flag - after the first write rest of the request reads from primary,
+    so it never sees replica lag of its own writes.
+
+    Scope is opened for every http request by `RequestScopeMiddleware`, writes are marked by `TortoiseRepo`.
+    """
+
+    def __init__(self):
+        self.wrote = False
+
+    @staticmethod
+    def current() -> Optional["ReadYourWrites"]:
+        return _current.get()
+
+    @classmethod
+    @contextmanager
+    def scope(cls) -> Iterator["ReadYourWrites"]:
+        read_your_writes = cls()
+        token = _current.set(read_your_writes)
+        try:
+            yield read_your_writes
+        finally:
+            _current.reset(token)
+
+    @classmethod
+    def mark(cls) -> None:
+        read_your_writes = _current.get()
+        if read_your_writes is not None:
+            read_your_writes.wrote = True
+
+
+def replica_connections(replica_urls: list[str]) -> dict[str, str]:
+    """
+    Tortoise `connections` entries of replicas - `replica_0`, `replica_1`, ...
+    """
+    return {f"{REPLICA_PREFIX}{idx}": url for idx, url in enumerate(replica_urls)}
+
+
+class ReplicaRouter:
+    """
+    Tortoise router (`"routers"` in tortoise config) - reads go to replica connections round-robin,
+    writes go to primary.
+
+    Reads stay on primary when:
+        * there are no `replica_*` connections configured,
+        * they run inside transaction (e.g. `TortoiseUnitOfWork`), which lives on primary connection,
+        * current request already wrote something (see `ReadYourWrites`).
+    Outside of request scope (scripts, workers) reads are not sticky.
+    """
+
+    def __init__(self, replicas: Optional[tuple[str, ...]] = None):
+        self._replicas = replicas
+        self._cycle: Optional[Iterator[str]] = cycle(replicas) if replicas else None
+
+    @property
+    def replicas(self) -> tuple[str, ...]:
+        if self._replicas is None:
+            self._replicas = tuple(name for name in connections.db_config if name.startswith(REPLICA_PREFIX))
+            self._cycle = cycle(self._replicas) if self._replicas else None
+        return self._replicas
+
+    @staticmethod
+    def _in_transaction() -> bool:
+        return isinstance(connections.get(PRIMARY), BaseTransactionWrapper)
+
+    def db_for_read(self, model: Type[Model]) -> Optional[str]:
+        if not self.replicas or self._in_transaction():
+            return None
+
+        read_your_writes = ReadYourWrites.current()
+        if read_your_writes is not None and read_your_writes.wrote:
+            return None
+
+        return next(self._cycle)
+
+    def db_for_write(self, model: Type[Model]) -> Optional[str]:
+        ReadYourWrites.mark()
+        return None
@@ -0,0 +1,137 @@
+from contextvars import ContextVar
+from itertools import groupby
+from typing import Any
+
+from tortoise.backends.base.client import BaseDBAsyncClient, TransactionContext
+from tortoise.transactions import in_transaction
+
+from src.core.domain.entity import Entity
+from src.core.domain.repo.postgres import IPostgresRepository
+from src.core.domain.unit_of_work import IUnitOfWork
+from src.core.infra.repo.identity_map import IdentityMap
+from src.core.infra.router import PRIMARY
+
+SAVE = "abulk_save"
+UPDATE = "abulk_update"
+DELETE = "abulk_delete"
+
+
+class _Transaction:
+    """
+    State of one outermost `async with` block of a unit of work.
+    """
+
+    def __init__(self, context: TransactionContext, connection: BaseDBAsyncClient):
+        self.context = context
+        self.connection = connection
+        self.depth = 1
+        self.pending: list[tuple[str, IPostgresRepository, Entity]] = []
+
+
+class TortoiseUnitOfWork(IUnitOfWork):
+    """
+    Unit of Work on top of tortoise `in_transaction`.
+
+    Every repository call inside `async with` block runs on the same connection and transaction
+    (tortoise routes queries to the current transaction). Registered writes are flushed in registration order,
+    consecutive writes of the same kind to the same repository are sent as one bulk call
+    (`abulk_save` / `abulk_update` / `abulk_delete`).
+
+    One unit is shared by every call of a service, so transaction state is kept in a context variable -
+    concurrent requests (tasks) each get their own transaction and pending writes.
+    Nested `async with` on the same unit in the same task joins the outer one, it is committed when the outermost
+    block exits. On rollback the request identity map is cleared - it may hold rows read inside the rolled back
+    transaction.
+    """
+
+    def __init__(self, connection_name: str = PRIMARY):
+        self._connection_name = connection_name
+        self._transaction: ContextVar[_Transaction | None] = ContextVar(
+            f"unit_of_work_{id(self)}", default=None
+        )
+
+    @property
+    def _current(self) -> _Transaction:
+        transaction = self._transaction.get()
+        if transaction is None:
+            raise RuntimeError("Unit of work is used outside of `async with` block.")
+        return transaction
+
+    async def __aenter__(self) -> "TortoiseUnitOfWork":
+        transaction = self._transaction.get()
+        if transaction is not None:
+            transaction.depth += 1
+            return self
+
+        context = in_transaction(self._connection_name)
+        connection = await context.__aenter__()
+        self._transaction.set(_Transaction(context, connection))
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        transaction = self._current
+        transaction.depth -= 1
+        if transaction.depth:
+            return
+
+        try:
+            if exc_type is None:
+                await self.flush()
+        except Exception as e:
+            transaction.pending = []
+            self._transaction.set(None)
+            self._clear_identity_map()
+            await transaction.context.__aexit__(type(e), e, e.__traceback__)
+            raise
+
+        transaction.pending = []
+        self._transaction.set(None)
+        if exc_type is not None:
+            self._clear_identity_map()
+        await transaction.context.__aexit__(exc_type, exc_val, exc_tb)
+
+    @staticmethod
+    def _clear_identity_map() -> None:
+        identity_map = IdentityMap.current()
+        if identity_map is not None:
+            identity_map.clear()
+
+    def _register(self, operation: str, repository: IPostgresRepository, entity: Entity) -> None:
+        self._current.pending.append((operation, repository, entity))
+
+    def save(self, repository: IPostgresRepository, entity: Entity) -> None:
+        self._register(SAVE, repository, entity)
+
+    def update(self, repository: IPostgresRepository, entity: Entity) -> None:
+        # entity which is not inserted yet is going to be inserted with its latest state anyway
+        if not any(
+            operation == SAVE and pending_repository is repository and pending.id == entity.id
+            for operation, pending_repository, pending in self._current.pending
+        ):
+            self._register(UPDATE, repository, entity)
+
+    def delete(self, repository: IPostgresRepository, entity: Entity) -> None:
+        self._register(DELETE, repository, entity)
+
+    async def flush(self) -> None:
+        """
+        Send pending writes to db inside the current transaction, without committing it.
+        """
+        transaction = self._current
+        pending, transaction.pending = transaction.pending, []
+        for (operation, repository), group in groupby(pending, key=lambda item: item[:2]):
+            entities = {entity.id: entity for *_, entity in group}
+            await getattr(repository, operation)(list(entities.values()))
+
+    async def commit(self) -> None:
+        """
+        Flush pending writes and commit the transaction, writes registered later are executed without transaction.
+        """
+        await self.flush()
+        await self._current.connection.commit()
+
+    async def rollback(self) -> None:
+        transaction = self._current
+        transaction.pending = []
+        self._clear_identity_map()
+        await transaction.connection.rollback()
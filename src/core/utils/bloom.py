@@ -0,0 +1,42 @@
+import hashlib
+from math import ceil, log
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Compact set membership filter - `in` is never false for added keys, false positives are
+    at most `error_rate` for up to `capacity` keys. Keys can't be removed, the filter is rebuilt instead.
+
+    Bits are kept in a `bytearray` (~1.2 bytes per key at 1% error rate, ~1.8 bytes at 0.1%),
+    bit positions come from one BLAKE2b digest by double hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, keys: Iterable[str] = ()):
+        capacity = max(capacity, 1)
+        self._size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + idx * second) % self._size for idx in range(self._hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
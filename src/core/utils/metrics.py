@@ -0,0 +1,39 @@
+from collections import defaultdict
+from threading import Lock
+
+
+class Metrics:
+    """
+    In-process registry of counters and gauges for monitoring, exposed by `GET /metrics`.
+
+    Names are dotted, grouped by component, e.g. `identity_map.hits`.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._gauges.get(name, self._counters.get(name, 0))
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {**self._counters, **self._gauges}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+metrics = Metrics()
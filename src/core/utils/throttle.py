@@ -0,0 +1,132 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from math import ceil
+from time import monotonic, time
+from typing import Any
+
+from src.core.domain.errors import TooManyRequests
+from src.core.utils.metrics import metrics
+
+# `AUTH_THROTTLE_BACKEND` settings selecting the bucket store
+MEMORY = "memory"
+REDIS = "redis"
+
+ALLOWED = "throttle.{name}.allowed"
+THROTTLED = "throttle.{name}.throttled"
+
+
+class IBucketStore(ABC):
+    """
+    Token buckets - every bucket holds up to `burst` tokens and is refilled with `rate` tokens per second.
+    """
+
+    @abstractmethod
+    async def atake(self, key: str, rate: float, burst: int) -> float:
+        """
+        Take one token from the bucket.
+
+        :return: 0 when the token was taken, otherwise seconds until the bucket has one
+        """
+
+
+class MemoryBucketStore(IBucketStore):
+    """
+    Buckets of this process, least recently used are dropped above `max_keys` - dropped bucket starts full.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._max_keys = max_keys
+        # key -> (tokens, refilled at)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def atake(self, key: str, rate: float, burst: int) -> float:
+        now = monotonic()
+        tokens, refilled_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - refilled_at) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class RedisBucketStore(IBucketStore):
+    """
+    Buckets in Redis shared by all app workers, refilled and taken atomically in a Lua script.
+    Buckets expire once they would be full again.
+    """
+
+    _SCRIPT = """
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "refilled_at")
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+local tokens = math.min(burst, (tonumber(bucket[1]) or burst) + elapsed * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "refilled_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+    def __init__(self, redis_url: str, prefix: str = "throttle:"):
+        self._redis_url = redis_url
+        self._prefix = prefix
+        self._redis: Any = None
+
+    def _client(self) -> Any:
+        if self._redis is None:
+            import aioredis
+
+            self._redis = aioredis.from_url(self._redis_url)
+        return self._redis
+
+    async def atake(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._client().eval(self._SCRIPT, 1, self._prefix + key, rate, burst, time()))
+
+    async def aclose(self) -> None:
+        redis, self._redis = self._redis, None
+        if redis is not None:
+            await redis.close()
+
+
+class Throttle:
+    """
+    Rate limit of one kind of requests (e.g. logins per username) with token buckets per key.
+
+    Allows bursts of `burst` requests, then `rate` requests per second. Rejected requests raise
+    `TooManyRequests` - callers check the throttle before any expensive work.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, store: IBucketStore | None = None):
+        self._name = name
+        self._rate = rate
+        self._burst = burst
+        self._store = store if store is not None else MemoryBucketStore()
+
+    async def acheck(self, key: str) -> None:
+        """
+        Take a request from the `key` bucket.
+
+        :raises TooManyRequests: When the bucket is empty
+        """
+        retry_after = await self._store.atake(f"{self._name}:{key}", self._rate, self._burst)
+        if retry_after > 0:
+            metrics.inc(THROTTLED.format(name=self._name))
+            raise TooManyRequests(f"Too many requests, try again in {ceil(retry_after)}s.")
+        metrics.inc(ALLOWED.format(name=self._name))
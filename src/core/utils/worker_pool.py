@@ -0,0 +1,104 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, TypeVar
+
+from src.core.utils.metrics import metrics
+
+T = TypeVar("T")
+
+TASKS = "{name}.tasks"
+PENDING = "{name}.pending"
+QUEUE_TIME = "{name}.queue_time"
+QUEUE_SECONDS = "{name}.queue_seconds"
+RUN_SECONDS = "{name}.run_seconds"
+
+
+def _timed(func: Callable[[], T]) -> tuple[float, float, T]:
+    # runs in the worker, monotonic clock is system-wide so worker processes measure on the caller clock
+    started_at = monotonic()
+    result = func()
+    return started_at, monotonic(), result
+
+
+class WorkerPool:
+    """
+    Bounded pool running blocking CPU work (e.g. password hashing) off the event loop.
+
+    At most `max_workers` calls run at once, others wait in the pool queue. Queue time of every call
+    (`{name}.queue_time` - the last one, `{name}.queue_seconds` - the total), run time and the number of
+    queued and running calls (`{name}.pending`) are exposed in metrics.
+
+    Threads are enough for work releasing the GIL, `processes` run the rest (e.g. `crypt` holds the GIL) -
+    their functions and arguments have to be picklable.
+    """
+
+    def __init__(self, name: str, max_workers: int | None = None, processes: bool = False):
+        self._name = name
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._processes = processes
+        self._executor: Executor | None = None
+        self._lock = Lock()
+        self._pending = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def _metric(self, name: str) -> str:
+        return name.format(name=self._name)
+
+    def configure(self, max_workers: int) -> None:
+        """
+        Set the concurrency limit, calls submitted before finish in the old pool.
+        """
+        with self._lock:
+            self._max_workers = max_workers
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self._processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix=self._name
+                    )
+            return self._executor
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._pending += delta
+            pending = self._pending
+        metrics.set(self._metric(PENDING), pending)
+
+    async def arun(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run `func` in the pool and wait for its result without blocking the event loop.
+        """
+        metrics.inc(self._metric(TASKS))
+        self._track(1)
+        submitted_at = monotonic()
+        try:
+            started_at, finished_at, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed, partial(func, *args, **kwargs)
+            )
+        finally:
+            self._track(-1)
+
+        metrics.set(self._metric(QUEUE_TIME), started_at - submitted_at)
+        metrics.inc(self._metric(QUEUE_SECONDS), started_at - submitted_at)
+        metrics.inc(self._metric(RUN_SECONDS), finished_at - started_at)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "search_outbox" ADD "claimed_until" TIMESTAMPTZ;
+        CREATE INDEX "idx_search_outb_documen_5c2f7e" ON "search_outbox" ("document_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "idx_search_outb_documen_5c2f7e";
+        ALTER TABLE "search_outbox" DROP COLUMN "claimed_until";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "search_outbox" ADD "relayed_at" TIMESTAMPTZ;
+        CREATE INDEX "idx_search_outb_pending_8a41d3" ON "search_outbox" ("id") WHERE "relayed_at" IS NULL;
+        CREATE INDEX "idx_search_outb_relayed_2b97e0" ON "search_outbox" ("relayed_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "idx_search_outb_relayed_2b97e0";
+        DROP INDEX "idx_search_outb_pending_8a41d3";
+        ALTER TABLE "search_outbox" DROP COLUMN "relayed_at";"""
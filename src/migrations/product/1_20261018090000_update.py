@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX "idx_product_created_606179" ON "product" ("created_at", "id");
+        CREATE INDEX "idx_daily_user__user_id_d527a7" ON "daily_user_consumption" ("user_id", "created_at", "id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "idx_product_created_606179";
+        DROP INDEX "idx_daily_user__user_id_d527a7";"""
@@ -0,0 +1,32 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TEMPORARY TABLE "daily_user_consumption_duplicate" ON COMMIT DROP AS
+    SELECT "id", FIRST_VALUE("id") OVER (PARTITION BY "user_id", "date" ORDER BY "created_at", "id") AS "keep_id"
+    FROM "daily_user_consumption";
+        UPDATE "daily_user_product" AS p SET "day_id" = d."keep_id"
+    FROM "daily_user_consumption_duplicate" AS d WHERE p."day_id" = d."id" AND d."id" <> d."keep_id";
+        UPDATE "daily_user_consumption" AS c SET
+    "summary_calories" = s."summary_calories",
+    "summary_proteins" = s."summary_proteins",
+    "summary_fats" = s."summary_fats",
+    "summary_carbohydrates" = s."summary_carbohydrates"
+    FROM (
+        SELECT d."keep_id",
+            SUM(c."summary_calories") AS "summary_calories",
+            SUM(c."summary_proteins") AS "summary_proteins",
+            SUM(c."summary_fats") AS "summary_fats",
+            SUM(c."summary_carbohydrates") AS "summary_carbohydrates"
+        FROM "daily_user_consumption" AS c JOIN "daily_user_consumption_duplicate" AS d ON c."id" = d."id"
+        GROUP BY d."keep_id" HAVING COUNT(*) > 1
+    ) AS s WHERE c."id" = s."keep_id";
+        DELETE FROM "daily_user_consumption" AS c USING "daily_user_consumption_duplicate" AS d
+    WHERE c."id" = d."id" AND d."id" <> d."keep_id";
+        CREATE UNIQUE INDEX "uid_daily_user__user_id_87debc" ON "daily_user_consumption" ("user_id", "date");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "uid_daily_user__user_id_87debc";"""
@@ -0,0 +1,25 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        ALTER TABLE "product" ADD COLUMN IF NOT EXISTS "search_vector" tsvector GENERATED ALWAYS AS (
+            to_tsvector(
+                'simple'::regconfig,
+                coalesce("name", '') || ' ' || coalesce("brand", '') || ' ' || coalesce("category", '')
+            )
+        ) STORED;
+        CREATE INDEX "idx_product_search_vector" ON "product" USING GIN ("search_vector");
+        CREATE INDEX "idx_product_name_trgm" ON "product" USING GIN ("name" gin_trgm_ops);
+        CREATE INDEX "idx_product_brand_trgm" ON "product" USING GIN ("brand" gin_trgm_ops);
+        CREATE INDEX "idx_product_category_trgm" ON "product" USING GIN ("category" gin_trgm_ops);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "idx_product_category_trgm";
+        DROP INDEX "idx_product_brand_trgm";
+        DROP INDEX "idx_product_name_trgm";
+        DROP INDEX "idx_product_search_vector";
+        ALTER TABLE "product" DROP COLUMN "search_vector";"""
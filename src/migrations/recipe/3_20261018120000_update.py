@@ -0,0 +1,20 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        ALTER TABLE "recipe" ADD COLUMN IF NOT EXISTS "search_vector" tsvector GENERATED ALWAYS AS (
+            to_tsvector('simple'::regconfig, coalesce("name", '') || ' ' || coalesce("description", ''))
+        ) STORED;
+        CREATE INDEX "idx_recipe_search_vector" ON "recipe" USING GIN ("search_vector");
+        CREATE INDEX "idx_recipe_name_trgm" ON "recipe" USING GIN ("name" gin_trgm_ops);
+        CREATE INDEX "idx_recipe_description_trgm" ON "recipe" USING GIN ("description" gin_trgm_ops);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX "idx_recipe_description_trgm";
+        DROP INDEX "idx_recipe_name_trgm";
+        DROP INDEX "idx_recipe_search_vector";
+        ALTER TABLE "recipe" DROP COLUMN "search_vector";"""
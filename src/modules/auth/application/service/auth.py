@@ -1,18 +1,24 @@
 import time
+from uuid import UUID
 
-import jwt
+from tortoise.exceptions import DoesNotExist
 
 from src.core.app.service import IAuthService
+from src.core.domain.errors import NotSupportedError, TooManyRequests
+from src.core.utils.throttle import Throttle
 from src.core.domain.repo.postgres import IPostgresRepository
 from src.modules.auth.application.dto import (
     UserAuthInputDto,
     TokenOutputDto,
 )
-from src.modules.auth.domain.entity.user import User
+from src.modules.auth.domain.entity.user import TokenPrincipal, User
 from src.modules.auth.domain.errors import (
     InvalidToken,
     BadCredentials,
 )
+from src.modules.auth.infra.cache import PrincipalCache
+from src.modules.auth.infra.keys import TokenKeys
+from src.modules.auth.infra.revocation import RevocationList
 
 
 class AuthenticationService(IAuthService):
@@ -21,44 +27,73 @@ class AuthenticationService(IAuthService):
         user_repository: [IPostgresRepository],
         secret_key: str,
         algorithm: str,
+        principal_cache: PrincipalCache | None = None,
+        key_id: str | None = None,
+        public_keys: dict[str, str] | None = None,
+        revocations: RevocationList | None = None,
+        stateless: bool = False,
+        user_throttle: Throttle | None = None,
+        ip_throttle: Throttle | None = None,
     ):
         self._user_repository = user_repository
-        self._secret_key = secret_key
-        self._algorithm = algorithm
+        self._keys = TokenKeys(algorithm, secret_key, key_id=key_id, public_keys=public_keys)
+        self._principal_cache = principal_cache
+        self._revocations = revocations
+        self._stateless = stateless
+        self._user_throttle = user_throttle
+        self._ip_throttle = ip_throttle
+
+    def _create_token(self, user: User) -> str:
+        return user.create_token(
+            secret_key=self._keys.signing_key, algorithm=self._keys.algorithm, key_id=self._keys.key_id
+        )
+
+    async def _throttle(self, action: str, subject: str, client_ip: str | None) -> None:
+        """
+        Reject too frequent requests of the user or client before any password hashing.
+        """
+        if self._ip_throttle is not None and client_ip:
+            await self._ip_throttle.acheck(f"{action}:{client_ip}")
+        if self._user_throttle is not None:
+            await self._user_throttle.acheck(f"{action}:{subject}")
 
     async def authenticate(
         self,
         credentials: UserAuthInputDto,
+        client_ip: str | None = None,
         *args,
         **kwargs,
-    ) -> TokenOutputDto | BadCredentials:
+    ) -> TokenOutputDto | BadCredentials | TooManyRequests:
         """
         Authenticate user with given credentials.
 
         Args:
             credentials: UserAuthInputDto: User credentials.
+            client_ip: str | None: Address of the client, throttled next to the username.
 
-        Returns: TokenOutputDto | BadCredentials
+        Returns: TokenOutputDto | BadCredentials | TooManyRequests
 
         """
+        await self._throttle("login", credentials.username, client_ip)
         user: User = await self._user_repository.aget_first_from_filter(username=credentials.username)
         if not user:
             raise BadCredentials("User not found for given credentials.")
 
-        if user.correct_password(credentials.password):
+        if await user.acorrect_password(credentials.password):
             return TokenOutputDto(
-                api_token=user.create_token(secret_key=self._secret_key, algorithm=self._algorithm),
+                api_token=self._create_token(user),
                 user_id=user.id,
             )
 
         raise BadCredentials("Incorrect password.")
 
-    def refresh_token(self, user: User):
+    async def refresh_token(self, user: User, client_ip: str | None = None) -> TokenOutputDto | TooManyRequests:
         """
         Refresh token for user.
         """
+        await self._throttle("refresh", str(user.id), client_ip)
         return TokenOutputDto(
-            api_token=user.create_token(secret_key=self._secret_key, algorithm=self._algorithm),
+            api_token=self._create_token(user),
             user_id=user.id,
         )
 
@@ -81,45 +116,83 @@ class AuthenticationService(IAuthService):
         if expires < time.time():
             raise InvalidToken("Token expired.")
 
-    @classmethod
-    def _decode_jwt(cls, secret_key: str, algorithm: str, credentials: str) -> dict:
+    def _decode(self, token: str) -> dict:
+        decoded_jwt = self._keys.decode(token)
+        self._verify_time(decoded_jwt)
+        return decoded_jwt
+
+    async def _verify_not_revoked(self, user_id: UUID | str, jti: str | None, expires: float | None) -> None:
+        if self._revocations is not None and await self._revocations.ais_revoked(user_id, jti, expires):
+            raise InvalidToken("Token revoked.")
+
+    async def verify(self, token: str) -> User | BadCredentials:
         """
-        Decode JWT token.
+        Verify token and return user with settings and macro targets loaded in one query, so request handlers
+        don't query them again. Users verified before are served from `principal_cache` until the token expires,
+        without decoding the token and querying db - only revocations (in-memory filter) are checked again.
 
         Args:
-            secret_key: str: Secret key.
-            algorithm:  str: Algorithm.
-            credentials: str: JWT token.
+            token: str: JWT token.
 
-        Returns: dict
+        Returns: User | BadCredentials
 
         """
+        if self._principal_cache is not None and (cached := self._principal_cache.get(token)):
+            await self._verify_not_revoked(cached.user.id, cached.jti, cached.expires)
+            return cached.user
 
+        decoded_jwt = self._decode(token)
+        await self._verify_not_revoked(decoded_jwt["user_id"], decoded_jwt.get("jti"), decoded_jwt["expires"])
         try:
-            return jwt.decode(jwt=credentials, key=secret_key, algorithms=algorithm)
-        except jwt.ExpiredSignatureError:
-            raise InvalidToken("Token expired.")
-        except jwt.InvalidTokenError:
-            raise InvalidToken("Invalid token. Can't decode.")
+            user: User = await self._user_repository.aget_principal(
+                **User.get_user_filter_by_decoded_token(decoded_jwt)
+            )
+        except DoesNotExist:
+            raise BadCredentials("Invalid token, User not found.")
 
-    async def verify(self, token: str) -> User | BadCredentials:
+        if self._principal_cache is not None:
+            self._principal_cache.put(token, user, expires=decoded_jwt["expires"], jti=decoded_jwt.get("jti"))
+        return user
+
+    async def authorize(self, token: str) -> TokenPrincipal | User:
         """
-        Verify token and return user.
+        Authorize request by token. In `stateless` mode the principal is built from token claims - signature,
+        expiration and revocations (in-memory filter) are checked without querying db, so only `id` and
+        `is_admin` of the principal are available. Otherwise, and for tokens issued without claims,
+        the user is loaded by `verify`.
 
         Args:
             token: str: JWT token.
 
-        Returns: User | BadCredentials
+        Returns: TokenPrincipal | User
 
         """
+        if not self._stateless:
+            return await self.verify(token)
 
-        decoded_jwt = self._decode_jwt(secret_key=self._secret_key, algorithm=self._algorithm, credentials=token)
-        self._verify_time(decoded_jwt)
-        user: User | None = await self._user_repository.aget_first_from_filter(
-            **User.get_user_filter_by_decoded_token(decoded_jwt)
-        )
+        decoded_jwt = self._decode(token)
+        if "type" not in decoded_jwt:
+            return await self.verify(token)
 
-        if not user:
-            raise BadCredentials("Invalid token, User not found.")
+        await self._verify_not_revoked(decoded_jwt["user_id"], decoded_jwt.get("jti"), decoded_jwt["expires"])
+        return TokenPrincipal(id=UUID(decoded_jwt["user_id"]), type=decoded_jwt["type"])
 
-        return user
+    async def logout(self, token: str) -> None:
+        """
+        Revoke token, it is rejected by all app instances after their revocations refresh at the latest.
+
+        Args:
+            token: str: JWT token.
+
+        Returns: None | InvalidToken
+
+        """
+        decoded_jwt = self._decode(token)
+        if self._revocations is None:
+            raise NotSupportedError(message="Token revocation is not configured.")
+        if "jti" not in decoded_jwt:
+            raise InvalidToken("Token without id can't be revoked.")
+
+        await self._revocations.arevoke_token(decoded_jwt["jti"], expires=decoded_jwt["expires"])
+        if self._principal_cache is not None:
+            self._principal_cache.discard(token)
@@ -7,9 +7,11 @@ from src.core.domain.errors import NotSupportedError
 from src.core.domain.repo.postgres import IPostgresRepository
 from src.modules.auth.application.dto import UserSettingsDto, UserSettingsUpdateDto
 from src.modules.auth.domain.entity.settings import Macro, UserSettings
+from src.modules.auth.domain.entity.user import User
 from src.modules.auth.domain.errors import (
     UserSettingsNotFound,
 )
+from src.modules.auth.infra.cache import PrincipalCache
 
 
 class UserSettingsService(ICrudService):
@@ -17,9 +19,11 @@ class UserSettingsService(ICrudService):
         self,
         settings_repository: IPostgresRepository,
         macro_repository: IPostgresRepository,
+        principal_cache: PrincipalCache | None = None,
     ) -> None:
         self._settings_repository = settings_repository
         self._macro_repository = macro_repository
+        self._principal_cache = principal_cache
 
     async def create(self, *args, **kwargs) -> NotSupportedError:
         raise NotSupportedError(message="User can't create settings by himself")
@@ -56,6 +60,9 @@ class UserSettingsService(ICrudService):
         await self._settings_repository.aupdate(entity=settings)
 
         settings.macro = macro
+        # verified users carry their settings
+        if self._principal_cache is not None:
+            self._principal_cache.invalidate(user_id)
 
         return UserSettingsDto(**settings.snapshot)
 
@@ -64,9 +71,15 @@ class UserSettingsService(ICrudService):
         skip: int,
         limit: int,
         query: str | None = None,
+        fields: list[str] | None = None,
+        filters: list[str] | None = None,
+        sort: list[str] | None = None,
     ):
         raise NotSupportedError(message="Not supported `get all` for seetings")
 
+    async def get_page(self, limit: int, cursor: str | None = None, skip: int = 0, fields: list[str] | None = None):
+        raise NotSupportedError(message="Not supported `get page` for seetings")
+
     async def get_by_id(self, id: UUID):
         raise NotSupportedError(message="Not supported `get_by_id` for user seetings")
 
@@ -74,3 +87,11 @@ class UserSettingsService(ICrudService):
         settings = await self._settings_repository.aget_first_from_filter(user_id=user_id, fetch_fields=["macro"])
 
         return UserSettingsDto(**self._settings_repository.convert_snapshot(settings.snapshot))
+
+    def from_principal(self, user: User) -> UserSettingsDto | None:
+        """
+        Settings of user verified by `AuthenticationService.verify`, loaded together with the user.
+        """
+        if user.settings is None:
+            return None
+        return UserSettingsDto.model_validate(user.settings, from_attributes=True)
@@ -1,3 +1,6 @@
+from uuid import UUID
+
+from pydantic import BaseModel
 from tortoise.exceptions import DoesNotExist
 
 from src.core.app.service import BaseCrudService
@@ -13,6 +16,8 @@ from src.modules.auth.domain.errors import (
     UserNotFound,
     UserNotRecordOwner,
 )
+from src.modules.auth.infra.cache import PrincipalCache
+from src.modules.auth.infra.revocation import RevocationList
 
 
 class UserCrudService(BaseCrudService):
@@ -27,6 +32,8 @@ class UserCrudService(BaseCrudService):
         "settings",
         "settings__macro",
     ]
+    # fields carried by (or deciding about) issued tokens, their change revokes the tokens
+    PRIVILEGE_FIELDS = ("type", "status")
 
     def __init__(
         self,
@@ -34,13 +41,17 @@ class UserCrudService(BaseCrudService):
         settings_repository: [IPostgresRepository],
         macro_repository: [IPostgresRepository],
         search_repo: [ISearchRepository] = None,
+        principal_cache: PrincipalCache | None = None,
+        revocations: RevocationList | None = None,
     ):
         super().__init__(repository, search_repo)
         self._settings_repository = settings_repository
         self._macro_repository = macro_repository
+        self._principal_cache = principal_cache
+        self._revocations = revocations
 
     async def create(self, input_dto: UserInputDto, **kwargs) -> UserOutputDto:
-        user = User.create(
+        user = await User.acreate(
             username=input_dto.username,
             password=input_dto.password,
             email=input_dto.email,
@@ -71,3 +82,32 @@ class UserCrudService(BaseCrudService):
         user.settings = settings
 
         return UserOutputDto(**user.snapshot)
+
+    async def _privilege_changed(self, id: UUID, input_dto: BaseModel) -> bool:
+        changes = {
+            field: value for field, value in input_dto.dict().items() if field in self.PRIVILEGE_FIELDS
+        }
+        if not changes:
+            return False
+
+        user: User = await self._repository.aget_by_id(id)
+        return any(getattr(user, field) != value for field, value in changes.items())
+
+    async def update(self, id: UUID, input_dto: BaseModel, user_id: UUID = None, is_admin=False) -> UserOutputDto:
+        privilege_changed = self._revocations is not None and await self._privilege_changed(id, input_dto)
+        output = await super().update(id, input_dto, user_id=user_id, is_admin=is_admin)
+        # verified users of old tokens would keep the old password, type and status
+        if self._principal_cache is not None:
+            self._principal_cache.invalidate(id)
+        # tokens authorized by claims alone would keep the old type (e.g. admin rights) until they expire
+        if privilege_changed:
+            await self._revocations.arevoke_user(id)
+        return output
+
+    async def delete(self, id: UUID, user_id: UUID = None, is_admin=False) -> None:
+        await super().delete(id, user_id=user_id, is_admin=is_admin)
+        if self._principal_cache is not None:
+            self._principal_cache.invalidate(id)
+        # tokens authorized by claims alone don't notice the user is gone
+        if self._revocations is not None:
+            await self._revocations.arevoke_user(id)
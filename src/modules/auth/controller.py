@@ -1,8 +1,9 @@
+from http import HTTPStatus
 from uuid import UUID
 
 from classy_fastapi import post, patch, get
 from dependency_injector.wiring import inject
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from src.config.di import AppContainer
@@ -21,6 +22,10 @@ from src.modules.auth.application.dto import (
 from src.modules.auth.application.service.auth import AuthenticationService
 
 
+def _client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
 class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
     prefix = "/users"
     tag = "users"
@@ -47,11 +52,12 @@ class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
     async def login(
         self,
         credentials: UserAuthInputDto,
+        request: Request,
         auth_service: AuthenticationService = dependency(AppContainer.auth.auth_service),
     ) -> TokenOutputDto:
         """Endpoint to authenticate user."""
 
-        return await auth_service.authenticate(credentials)
+        return await auth_service.authenticate(credentials, client_ip=_client_ip(request))
 
     @post(
         path="/refresh_token",
@@ -60,6 +66,7 @@ class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
     @inject
     async def refresh_token(
         self,
+        request: Request,
         token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
         auth_service: IAuthService = dependency(AppContainer.auth.auth_service),
     ) -> TokenOutputDto:
@@ -67,7 +74,18 @@ class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
 
         user = await auth_service.verify(token.credentials)
 
-        return auth_service.refresh_token(user=user)
+        return await auth_service.refresh_token(user=user, client_ip=_client_ip(request))
+
+    @post(path="/logout", status_code=HTTPStatus.NO_CONTENT)
+    @inject
+    async def logout(
+        self,
+        token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+        auth_service: IAuthService = dependency(AppContainer.auth.auth_service),
+    ) -> None:
+        """Endpoint to revoke user token."""
+
+        await auth_service.logout(token.credentials)
 
     @patch(path="/settings", response_model=UserSettingsDto)
     @inject
@@ -78,7 +96,7 @@ class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
         token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
         auth_service: AuthenticationService = dependency(AppContainer.auth.auth_service),
     ):
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
 
         return await settings_service.update(user_id=user.id, input_dto=settings, id=None)
 
@@ -90,6 +108,6 @@ class UserViewSet(BaseModelView[UserInputDto, UserOutputDto]):
         auth_service: AuthenticationService = dependency(AppContainer.auth.auth_service),
         settings_service: ICrudService = dependency(AppContainer.auth.user_settings_service),
     ):
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
 
         return await settings_service.get_by_user_id(user_id=user.id)
@@ -1,24 +1,69 @@
 from dependency_injector import containers, providers
 
+from src.core.utils.throttle import MemoryBucketStore, RedisBucketStore, Throttle
 from src.modules.auth.application.service.auth import AuthenticationService
 from src.modules.auth.application.service.user import UserCrudService
 from src.modules.auth.application.service.settings import UserSettingsService
+from src.modules.auth.infra.cache import PrincipalCache
 from src.modules.auth.infra.repo.settings import (
     UserSettingsTortoiseRepo,
     MacroTortoiseRepo,
 )
 from src.modules.auth.infra.repo.user import UserTortoiseRepo
+from src.modules.auth.infra.revocation import RevocationList
 
 
 class AuthContainer(containers.DeclarativeContainer):
     container_config = providers.Configuration()
     api_config = providers.ItemGetter()
 
+    # shared by auth service verifying tokens and user / settings services invalidating updated users
+    principal_cache = providers.Singleton(
+        PrincipalCache,
+        max_entries=api_config.AUTH_CACHE_MAX_ENTRIES,
+        ttl=api_config.AUTH_CACHE_TTL,
+    )
+
+    # refreshed in background, shared by auth service checking tokens and user service revoking deleted users
+    revocations = providers.Singleton(
+        RevocationList,
+        capacity=api_config.AUTH_REVOCATION_CAPACITY,
+        refresh_interval=api_config.AUTH_REVOCATION_REFRESH_INTERVAL,
+    )
+
+    # login and token refresh attempts, checked before password hashing
+    throttle_store = providers.Selector(
+        api_config.AUTH_THROTTLE_BACKEND,
+        memory=providers.Singleton(MemoryBucketStore),
+        redis=providers.Singleton(RedisBucketStore, redis_url=api_config.REDIS_URL),
+    )
+    user_throttle = providers.Singleton(
+        Throttle,
+        name="auth_user",
+        rate=api_config.AUTH_USER_THROTTLE_RATE,
+        burst=api_config.AUTH_USER_THROTTLE_BURST,
+        store=throttle_store,
+    )
+    ip_throttle = providers.Singleton(
+        Throttle,
+        name="auth_ip",
+        rate=api_config.AUTH_IP_THROTTLE_RATE,
+        burst=api_config.AUTH_IP_THROTTLE_BURST,
+        store=throttle_store,
+    )
+
     auth_service = providers.Factory(
         AuthenticationService,
         user_repository=UserTortoiseRepo,
         secret_key=api_config.SECRET_KEY,
         algorithm=api_config.ALGORITHM,
+        principal_cache=principal_cache,
+        key_id=api_config.JWT_KEY_ID,
+        public_keys=api_config.JWT_PUBLIC_KEYS,
+        revocations=revocations,
+        stateless=api_config.AUTH_STATELESS,
+        user_throttle=user_throttle,
+        ip_throttle=ip_throttle,
     )
 
     user_service = providers.Factory(
@@ -26,9 +71,12 @@ class AuthContainer(containers.DeclarativeContainer):
         repository=UserTortoiseRepo,
         settings_repository=UserSettingsTortoiseRepo,
         macro_repository=MacroTortoiseRepo,
+        principal_cache=principal_cache,
+        revocations=revocations,
     )
     user_settings_service = providers.Factory(
         UserSettingsService,
         settings_repository=UserSettingsTortoiseRepo,
         macro_repository=MacroTortoiseRepo,
+        principal_cache=principal_cache,
     )
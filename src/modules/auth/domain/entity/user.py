@@ -1,5 +1,6 @@
 import time
 import typing
+import uuid
 from dataclasses import dataclass
 
 import jwt
@@ -7,12 +8,41 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from src.core.domain.entity import Entity
+from src.core.utils.worker_pool import WorkerPool
 from src.modules.auth.domain.enums import StatusEnum, TypeEnum
 
 if typing.TYPE_CHECKING:
     from src.modules.auth.domain.entity.settings import UserSettings
 
+# seconds tokens are valid for
+TOKEN_LIFETIME = 2400
+
 hash_helper = CryptContext(schemes=["bcrypt"])
+# bcrypt takes ~100s of ms of CPU, async code hashes and verifies passwords in this pool off the event loop -
+# processes, `crypt` backend of passlib holds the GIL
+password_pool = WorkerPool("password_hashing", processes=True)
+
+
+def hash_password(password: str) -> str:
+    return hash_helper.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return hash_helper.verify(secret=password, hash=password_hash)
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    User authorized by token claims alone, without loading it from db.
+    """
+
+    id: uuid.UUID
+    type: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.type == TypeEnum.ADMIN.value
 
 
 @dataclass
@@ -33,13 +63,13 @@ class User(Entity):
 
     @staticmethod
     def _hash_pswd(password: str) -> str:
-        return hash_helper.hash(password)
+        return hash_password(password)
 
     @classmethod
-    def create(
+    def _new(
         cls,
         username: str,
-        password: str,
+        password_hash: str,
         email: str,
         first_name: str = "",
         last_name: str = "",
@@ -49,7 +79,7 @@ class User(Entity):
         return cls(
             id=cls.create_id(),
             username=username,
-            password=cls._hash_pswd(password),
+            password=password_hash,
             email=email,
             first_name=first_name,
             last_name=last_name,
@@ -59,21 +89,64 @@ class User(Entity):
             updated_at=cls.create_now_time(),
         )
 
+    @classmethod
+    def create(
+        cls,
+        username: str,
+        password: str,
+        email: str,
+        first_name: str = "",
+        last_name: str = "",
+        status: str = StatusEnum.INACTIVE.value,
+        type: str = TypeEnum.USER.value,
+    ) -> "User":
+        return cls._new(username, cls._hash_pswd(password), email, first_name, last_name, status, type)
+
+    @classmethod
+    async def acreate(
+        cls,
+        username: str,
+        password: str,
+        email: str,
+        first_name: str = "",
+        last_name: str = "",
+        status: str = StatusEnum.INACTIVE.value,
+        type: str = TypeEnum.USER.value,
+    ) -> "User":
+        """
+        `create` with password hashed in `password_pool`.
+        """
+        password_hash = await password_pool.arun(hash_password, password)
+        return cls._new(username, password_hash, email, first_name, last_name, status, type)
+
     def correct_password(self, password: str) -> bool:
-        return hash_helper.verify(secret=password, hash=self.password)
+        return verify_password(password, self.password)
+
+    async def acorrect_password(self, password: str) -> bool:
+        return await password_pool.arun(verify_password, password, self.password)
 
     def create_token(
         self,
         secret_key: str,
         algorithm: str,
+        key_id: str | None = None,
     ) -> str:
+        """
+        Token carries user type, so requests can be authorized without loading the user (see
+        `AuthenticationService.authorize`), and its own id (`jti`) to be revoked on logout.
+        `key_id` (`kid` header) selects the verification key when signing keys are rotated.
+        """
         return jwt.encode(
             payload={
                 "user_id": str(self.id),
-                "expires": time.time() + 2400,
+                "jti": uuid.uuid4().hex,
+                "type": self.type,
+                "is_admin": self.is_admin,
+                "expires": time.time() + TOKEN_LIFETIME,
             },
             key=secret_key,
             algorithm=algorithm,
+            headers={"kid": key_id} if key_id else None,
         )
 
     @staticmethod
@@ -85,3 +158,9 @@ class User(Entity):
             input_dto.password = self._hash_pswd(input_dto.password)
 
         return super(User, self).update(input_dto)
+
+    async def aupdate(self, input_dto: BaseModel) -> "Entity":
+        if input_dto.password:
+            input_dto.password = await password_pool.arun(hash_password, input_dto.password)
+
+        return super(User, self).update(input_dto)
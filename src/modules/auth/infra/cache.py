@@ -0,0 +1,128 @@
+import hashlib
+from copy import deepcopy
+from collections import OrderedDict
+from time import monotonic, time
+from typing import NamedTuple
+from uuid import UUID
+
+from src.core.utils.metrics import metrics
+from src.modules.auth.domain.entity.user import User
+
+HITS = "principal_cache.hits"
+MISSES = "principal_cache.misses"
+HIT_RATIO = "principal_cache.hit_ratio"
+EVICTIONS = "principal_cache.evictions"
+INVALIDATIONS = "principal_cache.invalidations"
+ENTRIES = "principal_cache.entries"
+
+
+class CachedPrincipal(NamedTuple):
+    expires_at: float
+    user: User
+    # id and expiration of the cached token, revocations are still checked for cached principals
+    jti: str | None = None
+    expires: float | None = None
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache of users verified by token, so authenticated requests don't decode the token
+    and query the user table every time.
+
+    Entries are keyed by SHA-256 of the token (tokens themselves are not kept) and live for `ttl`,
+    never longer than the token `expires` claim. Users updated or deleted through this process are
+    invalidated right away, other app instances see such writes after `ttl` at the latest -
+    zero `ttl` disables the cache.
+
+    Cache keeps its own copy of the user and every `get` returns a new copy, so requests changing
+    their user in place don't change the cached one, nor the user of concurrent requests.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 60.0):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, CachedPrincipal] = OrderedDict()
+        # user id -> keys of tokens verified for the user
+        self._keys: dict[str, set[str]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+            metrics.inc(HITS)
+        else:
+            self._misses += 1
+            metrics.inc(MISSES)
+        metrics.set(HIT_RATIO, self._hits / (self._hits + self._misses))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        user_id = str(entry.user.id)
+        keys = self._keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys[user_id]
+
+    def get(self, token: str) -> CachedPrincipal | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= monotonic():
+            self._evict(key)
+            entry = None
+
+        self._record(hit=entry is not None)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry._replace(user=deepcopy(entry.user))
+
+    def put(self, token: str, user: User, expires: float, jti: str | None = None) -> None:
+        """
+        Cache user verified by token, `expires` is the token expiration unix timestamp and `jti` its id.
+        """
+        ttl = min(self._ttl, expires - time())
+        if ttl <= 0 or self._max_entries <= 0:
+            return
+
+        key = self._key(token)
+        if key in self._entries:
+            self._evict(key)
+        while len(self._entries) >= self._max_entries:
+            self._evict(next(iter(self._entries)))
+            metrics.inc(EVICTIONS)
+        self._entries[key] = CachedPrincipal(monotonic() + ttl, deepcopy(user), jti, expires)
+        self._keys.setdefault(str(user.id), set()).add(key)
+        metrics.set(ENTRIES, len(self._entries))
+
+    def discard(self, token: str) -> None:
+        """
+        Drop the cached token (logout).
+        """
+        key = self._key(token)
+        if key in self._entries:
+            self._evict(key)
+            metrics.inc(INVALIDATIONS)
+            metrics.set(ENTRIES, len(self._entries))
+
+    def invalidate(self, user_id: UUID | str) -> None:
+        """
+        Drop all cached tokens of the user.
+        """
+        for key in self._keys.pop(str(user_id), set()):
+            self._entries.pop(key, None)
+        metrics.inc(INVALIDATIONS)
+        metrics.set(ENTRIES, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+        metrics.set(ENTRIES, 0)
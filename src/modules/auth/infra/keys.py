@@ -0,0 +1,66 @@
+from typing import Any
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+from src.core.domain.errors import NotSupportedError
+from src.modules.auth.domain.errors import InvalidToken
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256")
+
+
+class TokenKeys:
+    """
+    Keys signing and verifying tokens.
+
+    HMAC algorithms (`HS256`) sign and verify with the shared `secret_key`. Asymmetric ones (`EdDSA`, `ES256`)
+    sign with `secret_key` - PEM private key - and verify with its public key, so instances verifying tokens
+    don't need the private key. Tokens carry `key_id` in `kid` header - on rotation the new key signs
+    while `public_keys` (key id -> PEM public key) still verify tokens signed by the old ones until they expire.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret_key: str,
+        key_id: str | None = None,
+        public_keys: dict[str, str] | None = None,
+    ):
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise NotSupportedError(
+                message=f"JWT algorithm {algorithm} is not supported, asymmetric ones require `cryptography` package"
+            )
+
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self.signing_key: Any = secret_key
+        self._verifying_key: Any = secret_key
+        self._public_keys: dict[str, Any] = {}
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            prepare_key = algorithms[algorithm].prepare_key
+            self.signing_key = prepare_key(secret_key)
+            self._verifying_key = self.signing_key.public_key()
+            self._public_keys = {kid: prepare_key(key) for kid, key in (public_keys or {}).items()}
+        if key_id:
+            self._public_keys[key_id] = self._verifying_key
+
+    def _key_for(self, token: str) -> Any:
+        try:
+            key_id = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError:
+            raise InvalidToken("Invalid token. Can't decode.")
+
+        if key_id is None:
+            return self._verifying_key
+        if key_id not in self._public_keys:
+            raise InvalidToken("Invalid token. Unknown signing key.")
+        return self._public_keys[key_id]
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(jwt=token, key=self._key_for(token), algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise InvalidToken("Token expired.")
+        except jwt.InvalidTokenError:
+            raise InvalidToken("Invalid token. Can't decode.")
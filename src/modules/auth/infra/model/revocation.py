@@ -0,0 +1,19 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class RevokedToken(Model):
+    """
+    Revoked tokens (`token:<jti>`, logged out) and users (`user:<id>`, every token issued
+    to the user before - deleted or with changed type or status),
+    rows are kept until the last revoked token expires. See `RevocationList`.
+    """
+
+    id = fields.BigIntField(pk=True)
+    key = fields.CharField(max_length=255, index=True)
+    expires_at = fields.DatetimeField(index=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        app = "auth"
+        table = "revoked_token"
@@ -24,3 +24,4 @@ class User(BaseModel):
     class Meta:
         app = "auth"
         table = "user"
+        indexes = (("created_at", "id"),)
@@ -1,3 +1,6 @@
+from uuid import UUID
+
+from src.core.infra.repo.identity_map import IdentityMap
 from src.core.infra.repo.tortoiserepo import TortoiseRepo
 from src.modules.auth.domain.entity import user as entity
 from src.modules.auth.infra.model import user as model
@@ -6,3 +9,21 @@ from src.modules.auth.infra.model import user as model
 class UserTortoiseRepo(TortoiseRepo[model.User, entity.User]):
     model = model.User
     entity = entity.User
+    PRINCIPAL_FETCH_FIELDS = ("settings", "settings__macro")
+
+    @classmethod
+    async def aget_principal(cls, id: UUID) -> "entity.User":
+        """
+        Get user authenticated by token with settings and macro targets, in one joined query.
+        Inside http request the user is added to identity map, later reads by id don't query it again.
+
+        :raises DoesNotExist: When there is no user with given id
+        """
+        identity_map = IdentityMap.current()
+        if identity_map is not None and (user := identity_map.get(cls.model, id, cls.PRINCIPAL_FETCH_FIELDS)):
+            return user
+
+        user = cls._to_entity(await cls.model.filter(id=id).select_related(*cls.PRINCIPAL_FETCH_FIELDS).get())
+        if identity_map is not None:
+            identity_map.add(cls.model, id, user, cls.PRINCIPAL_FETCH_FIELDS)
+        return user
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from loguru import logger
+from tortoise import connections
+from tortoise.expressions import Q
+
+from src.core.infra.router import PRIMARY
+from src.core.utils.bloom import BloomFilter
+from src.core.utils.metrics import metrics
+from src.modules.auth.domain.entity.user import TOKEN_LIFETIME
+from src.modules.auth.infra.model.revocation import RevokedToken
+
+CHECKS = "revocations.checks"
+POSITIVES = "revocations.positives"
+FALSE_POSITIVES = "revocations.false_positives"
+ENTRIES = "revocations.entries"
+FILTER_BYTES = "revocations.filter_bytes"
+FAILURES = "revocations.failures"
+
+
+def user_key(user_id: UUID | str) -> str:
+    return f"user:{user_id}"
+
+
+def token_key(jti: str) -> str:
+    return f"token:{jti}"
+
+
+class RevocationList:
+    """
+    Revoked tokens (logged out) and users (deleted or with changed type) checked without db on every request.
+
+    Revocations are rows of `RevokedToken` table, kept until the tokens they revoke expire. Every app instance
+    keeps a Bloom filter of them refreshed every `refresh_interval` - keys missing in the filter are not revoked,
+    the rare positives (revoked or false positive) are confirmed with the table. Revocations made by other
+    instances are seen after `refresh_interval` at the latest.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001, refresh_interval: float = 30.0):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._refresh_interval = refresh_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        # keys revoked while the filter is rebuilt, the rebuilt one may have been read before them
+        self._refreshing: list[str] | None = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._filter)
+
+    def might_be_revoked(self, user_id: UUID | str, jti: str | None = None) -> bool:
+        metrics.inc(CHECKS)
+        return user_key(user_id) in self._filter or (jti is not None and token_key(jti) in self._filter)
+
+    async def ais_revoked(self, user_id: UUID | str, jti: str | None = None, expires: float | None = None) -> bool:
+        """
+        Check if token of the user is revoked, db is queried only for Bloom filter positives.
+
+        With token `expires` (unix timestamp) given, revocation of the user applies only to tokens issued
+        before it, so the user can log in again (e.g. after the type change).
+        """
+        if not self.might_be_revoked(user_id, jti):
+            return False
+
+        metrics.inc(POSITIVES)
+        revoked_user = Q(key=user_key(user_id))
+        if expires is not None:
+            # user revocation expires when the last token issued before it does
+            revoked_user &= Q(expires_at__gte=datetime.fromtimestamp(expires, timezone.utc))
+        condition = revoked_user | Q(key=token_key(jti)) if jti is not None else revoked_user
+        # replicas may lag behind a revocation made a moment ago
+        revoked = (
+            await RevokedToken.filter(condition, expires_at__gt=datetime.now(timezone.utc))
+            .using_db(connections.get(PRIMARY))
+            .exists()
+        )
+        if not revoked:
+            metrics.inc(FALSE_POSITIVES)
+        return revoked
+
+    async def _arevoke(self, key: str, expires_at: datetime) -> None:
+        await RevokedToken.create(key=key, expires_at=expires_at)
+        self._filter.add(key)
+        if self._refreshing is not None:
+            self._refreshing.append(key)
+        metrics.set(ENTRIES, len(self._filter))
+
+    async def arevoke_token(self, jti: str, expires: float) -> None:
+        """
+        Revoke single token (logout), `expires` is the token expiration unix timestamp.
+        """
+        await self._arevoke(token_key(jti), datetime.fromtimestamp(expires, timezone.utc))
+
+    async def arevoke_user(self, user_id: UUID | str) -> None:
+        """
+        Revoke all tokens issued to the user so far (deleted user, changed type or status).
+        """
+        await self._arevoke(user_key(user_id), datetime.now(timezone.utc) + timedelta(seconds=TOKEN_LIFETIME))
+
+    async def arefresh(self) -> int:
+        """
+        Rebuild the Bloom filter from unexpired revocations and drop the expired ones.
+
+        :return: The number of revocations in the filter
+        """
+        now = datetime.now(timezone.utc)
+        self._refreshing = []
+        try:
+            await RevokedToken.filter(expires_at__lte=now).delete()
+            keys = await RevokedToken.filter(expires_at__gt=now).values_list("key", flat=True)
+            # filter sized for the actual count keeps false positive rate when revocations outgrow `capacity`
+            self._filter = BloomFilter(max(self._capacity, len(keys)), self._error_rate, keys + self._refreshing)
+        finally:
+            self._refreshing = None
+
+        metrics.set(ENTRIES, len(self._filter))
+        metrics.set(FILTER_BYTES, self._filter.size_bytes)
+        return len(self._filter)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.arefresh()
+            except Exception as e:
+                metrics.inc(FAILURES)
+                logger.error(f"Error refreshing token revocations, retry in {self._refresh_interval}s: {e}")
+
+            await asyncio.sleep(self._refresh_interval)
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self.run())
+
+    async def aclose(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
@@ -21,3 +21,9 @@ class ProductInputDto(BaseModel):
 
 class ProductOutputDto(ProductInputDto):
     id: UUID
+
+
+class ProductSuggestionDto(BaseModel):
+    id: UUID
+    name: Optional[str] = None
+    brand: Optional[str] = None
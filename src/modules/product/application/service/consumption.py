@@ -5,6 +5,8 @@ from typing import Any
 from tortoise.exceptions import DoesNotExist
 from uuid6 import UUID
 
+from src.core.domain.pagination import Cursor, Page
+from src.core.domain.unit_of_work import IUnitOfWork
 from src.core.infra.repo.tortoiserepo import IPostgresRepository
 from src.modules.product.application.dto.consumption import (
     DailyUserConsumptionOutputDto,
@@ -25,6 +27,12 @@ class IUserSettingsService(ABC):
     async def get_by_user_id(self, user_id: UUID) -> Any:
         pass
 
+    def from_principal(self, user: Any) -> Any | None:
+        """
+        Settings loaded together with authenticated user, None when they have to be queried by user id.
+        """
+        return None
+
 
 class ConsumptionService:
     """
@@ -37,14 +45,27 @@ class ConsumptionService:
         daily_product_repository: [IPostgresRepository],
         consumption_repository: [IPostgresRepository],
         settings_service: IUserSettingsService,
+        unit_of_work: IUnitOfWork,
     ):
         self._consumption_repository: IPostgresRepository = consumption_repository
         self._product_repository: IPostgresRepository = product_repository
         self._daily_product_repository: IPostgresRepository = daily_product_repository
         self._user_settings_service: IUserSettingsService = settings_service
+        self._unit_of_work: IUnitOfWork = unit_of_work
+
+    async def _user_macro(self, user_id: UUID, principal: Any = None) -> dict:
+        """
+        Macro targets of the user, taken from authenticated `principal` when its settings are loaded.
+        """
+        user_settings = None
+        if principal is not None:
+            user_settings = self._user_settings_service.from_principal(principal)
+        if user_settings is None:
+            user_settings = await self._user_settings_service.get_by_user_id(user_id=user_id)
+        return user_settings.macro.model_dump()
 
     async def get_all_user_days(
-        self, user_id: UUID, skip: int = 0, limit: int = 10
+        self, user_id: UUID, skip: int = 0, limit: int = 10, principal: Any = None
     ) -> list[DailyUserConsumptionOutputDto]:
         """
         Method to get all days of a user with their daily consumption.
@@ -53,26 +74,52 @@ class ConsumptionService:
             user_id: UUID
             skip: int
             limit: int
+            principal: Any - authenticated user, its settings are not queried again
 
         Returns: list[DailyUserConsumptionOutputDto]
 
+        """
+        page = await self.get_user_days_page(user_id=user_id, skip=skip, limit=limit, principal=principal)
+        return page.items
+
+    async def get_user_days_page(
+        self, user_id: UUID, limit: int = 10, cursor: str | None = None, skip: int = 0, principal: Any = None
+    ) -> Page[DailyUserConsumptionOutputDto]:
+        """
+        Method to get page of user days ordered by `(created_at, id)`.
+
+        Args:
+            user_id: UUID
+            limit: int
+            cursor: str | None - `next_cursor` of the previous page, when given `skip` is ignored
+            skip: int
+            principal: Any - authenticated user, its settings are not queried again
+
+        Returns: Page[DailyUserConsumptionOutputDto]
+
         """
         days = await self._consumption_repository.aget_all_from_filter(
             user_id=user_id,
             offset=skip,
             limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
             fetch_fields=["products", "products__product"],
         )
 
-        user_settings = await self._user_settings_service.get_by_user_id(user_id=user_id)
-
-        return [
-            DailyUserConsumptionOutputDto(
-                user=user_settings.macro.model_dump(),
-                **self._consumption_repository.convert_snapshot(snapshot=day.snapshot),
-            )
-            for day in days
-        ]
+        macro = await self._user_macro(user_id, principal)
+
+        return Page.from_entities(
+            days,
+            items=[
+                self._consumption_repository.to_dto(
+                    day,
+                    DailyUserConsumptionOutputDto,
+                    user=macro,
+                )
+                for day in days
+            ],
+            limit=limit,
+        )
 
     async def get_day_by_id(self, day_id: UUID) -> DailyUserConsumptionOutputDto:
         """
@@ -85,27 +132,28 @@ class ConsumptionService:
 
         """
         try:
-            day = await self._consumption_repository.aget_by_id(
-                id=day_id,
-                fetch_fields=["products", "products__product"],
-            )
+            day = await self._consumption_repository.aget_aggregate_by_id(id=day_id)
         except DoesNotExist:
             raise DailyUserConsumptionNotFound(f"Daily consumption with id {day_id} not found.")
 
         user_settings = await self._user_settings_service.get_by_user_id(user_id=day.user_id)
 
-        return DailyUserConsumptionOutputDto(
+        return self._consumption_repository.to_dto(
+            day,
+            DailyUserConsumptionOutputDto,
             user=user_settings.macro.model_dump(),
-            **self._consumption_repository.convert_snapshot(snapshot=day.snapshot),
         )
 
-    async def get_day_by_datetime(self, date: datetime, user_id: UUID) -> DailyUserConsumptionOutputDto:
+    async def get_day_by_datetime(
+        self, date: datetime, user_id: UUID, principal: Any = None
+    ) -> DailyUserConsumptionOutputDto:
         """
         Method to get a day by its datetime.
 
         Args:
             date: str
             user_id: UUID
+            principal: Any - authenticated user, its settings are not queried again
 
         Returns: DailyUserConsumptionOutputDto
 
@@ -118,92 +166,87 @@ class ConsumptionService:
         if day is None:
             raise DailyUserConsumptionNotFound(f"Daily consumption with date {date} not found for user {user_id}.")
 
-        user_settings = await self._user_settings_service.get_by_user_id(user_id=day.user_id)
-
-        return DailyUserConsumptionOutputDto(
-            user=user_settings.macro.model_dump(),
-            **self._consumption_repository.convert_snapshot(snapshot=day.snapshot),
+        return self._consumption_repository.to_dto(
+            day,
+            DailyUserConsumptionOutputDto,
+            user=await self._user_macro(day.user_id, principal),
         )
 
-    async def add_meal(self, user_id: UUID, input_dto: DailyUserProductInputDto) -> DailyUserConsumptionOutputDto:
+    async def add_meal(
+        self, user_id: UUID, input_dto: DailyUserProductInputDto, principal: Any = None
+    ) -> DailyUserConsumptionOutputDto:
         """
         Method to add a meal to the daily consumption of a user.
 
         Meal will be calculated based on the weight of the product and the macros of the product.
-        Daily consumption will be created if it does not exist, otherwise it will be updated
-        with recalculated macros / calories.
+        Daily consumption is upserted by `(user_id, date)` - created if it does not exist, otherwise
+        meal macros / calories are added to its summary atomically in db.
 
         Args:
             user_id: UUID
             input_dto: DailyUserProductInputDto
+            principal: Any - authenticated user, its settings are not queried again
 
         Returns: DailyUserConsumptionOutputDto
 
         """
 
-        try:
-            product = await self._product_repository.aget_by_id(input_dto.product_id)
-        except DoesNotExist:
-            raise ProductNotFound(f"Product with id {input_dto.product_id} not found")
-
-        day: DailyUserConsumption = await self._consumption_repository.aget_first_from_filter(
-            user_id=user_id,
-            date=input_dto.date,
-        )
-
-        if day is None:
-            entity = DailyUserConsumption.create(user_id=user_id)
-            await self._consumption_repository.asave(entity=entity)
-            day: DailyUserConsumption = await self._consumption_repository.aget_by_id(entity.id)
-
-        daily_product = DailyUserProduct.create(
-            product=product,
-            day=day,
-            weight_in_grams=input_dto.weight_in_grams,
-            type=input_dto.type,
-        )
-
-        await self._daily_product_repository.asave(entity=daily_product)
-        await self._consumption_repository.aupdate(entity=day)
+        async with self._unit_of_work as uow:
+            try:
+                product = await self._product_repository.aget_by_id(input_dto.product_id)
+            except DoesNotExist:
+                raise ProductNotFound(f"Product with id {input_dto.product_id} not found")
+
+            delta = DailyUserConsumption.create(user_id=user_id, date=input_dto.date)
+            daily_product = DailyUserProduct.create(
+                product=product,
+                day=delta,
+                weight_in_grams=input_dto.weight_in_grams,
+                type=input_dto.type,
+            )
+            day: DailyUserConsumption = await self._consumption_repository.aupsert_summary(delta)
 
-        updated_day: DailyUserConsumption = await self._consumption_repository.aget_by_id(
-            id=day.id,
-            fetch_fields=["products", "products__product"],
-        )
+            daily_product.day_id = day.id
+            uow.save(self._daily_product_repository, daily_product)
+            await uow.flush()
 
-        user_settings = await self._user_settings_service.get_by_user_id(user_id=user_id)
+            updated_day: DailyUserConsumption = await self._consumption_repository.aget_aggregate_by_id(id=day.id)
 
-        return DailyUserConsumptionOutputDto(
-            user=user_settings.macro.model_dump(),
-            **self._consumption_repository.convert_snapshot(snapshot=updated_day.snapshot),
+        return self._consumption_repository.to_dto(
+            updated_day,
+            DailyUserConsumptionOutputDto,
+            user=await self._user_macro(user_id, principal),
         )
 
-    async def delete_meal(self, user_id: UUID, daily_product_id: UUID) -> DailyUserConsumptionOutputDto:
-        try:
-            product = await self._daily_product_repository.aget_by_id(daily_product_id)
-        except DoesNotExist:
-            raise DailyProductNotFound(f"Product with id {daily_product_id} not found")
+    async def delete_meal(
+        self, user_id: UUID, daily_product_id: UUID, principal: Any = None
+    ) -> DailyUserConsumptionOutputDto:
+        async with self._unit_of_work as uow:
+            try:
+                product = await self._daily_product_repository.aget_by_id(daily_product_id)
+            except DoesNotExist:
+                raise DailyProductNotFound(f"Product with id {daily_product_id} not found")
+
+            day: DailyUserConsumption = await self._consumption_repository.aget_by_id(
+                id=product.day_id,
+            )
 
-        day: DailyUserConsumption = await self._consumption_repository.aget_by_id(
-            id=product.day_id,
-        )
+            if day.user_id != user_id:
+                raise DailyUserConsumptionNotRecordOwner(
+                    f"Daily consumption with id {day.id} does not belong to user {user_id}."
+                )
 
-        if day.user_id != user_id:
-            raise DailyUserConsumptionNotRecordOwner(
-                f"Daily consumption with id {day.id} does not belong to user {user_id}."
-            )
+            delta = DailyUserConsumption.create(user_id=day.user_id, date=day.date)
+            delta.delete_product(product)
 
-        day.delete_product(product)
-        await self._daily_product_repository.adelete(entity=product)
-        await self._consumption_repository.aupdate(entity=day)
+            uow.delete(self._daily_product_repository, product)
+            await uow.flush()
+            await self._consumption_repository.aupsert_summary(delta)
 
-        updated_day: DailyUserConsumption = await self._consumption_repository.aget_by_id(
-            id=day.id,
-            fetch_fields=["products", "products__product"],
-        )
-        user_settings = await self._user_settings_service.get_by_user_id(user_id=user_id)
+            updated_day: DailyUserConsumption = await self._consumption_repository.aget_aggregate_by_id(id=day.id)
 
-        return DailyUserConsumptionOutputDto(
-            user=user_settings.macro.model_dump(),
-            **self._consumption_repository.convert_snapshot(snapshot=updated_day.snapshot),
+        return self._consumption_repository.to_dto(
+            updated_day,
+            DailyUserConsumptionOutputDto,
+            user=await self._user_macro(user_id, principal),
         )
@@ -1,12 +1,14 @@
 from uuid import UUID
 
-from loguru import logger
 from tortoise.exceptions import DoesNotExist
 
 from src.core.app.service import BaseCrudService
+from src.core.domain.repo.postgres import IPostgresRepository
+from src.core.domain.repo.search_engine import ISearchRepository
 from src.modules.product.application.dto.product import (
     ProductInputDto,
     ProductOutputDto,
+    ProductSuggestionDto,
 )
 from src.modules.product.domain.entity.product import Product
 from src.modules.product.domain.errors import ProductNotRecordOwner, ProductNotFound
@@ -20,6 +22,25 @@ class ProductCrudService(BaseCrudService):
     )
     NOT_FOUND_ERROR = (ProductNotFound, "Product not found with {id} id.")
     DOES_NOT_EXIST_ERROR = DoesNotExist
+    SEARCH_SORT_FIELDS = (
+        "name",
+        "energy_kcal_100g",
+        "fat_100g",
+        "carbohydrates_100g",
+        "sugars_100g",
+        "proteins_100g",
+    )
+    SEARCH_FILTER_FIELDS = ("category", "groups", "brand", *SEARCH_SORT_FIELDS[1:])
+
+    def __init__(
+        self,
+        repository: [IPostgresRepository],
+        search_repo: [ISearchRepository] = None,
+        search_served: bool = False,
+        suggest_repo: [ISearchRepository] = None,
+    ):
+        super().__init__(repository, search_repo, search_served)
+        self._suggest_repo = suggest_repo
 
     async def create(
         self, input_dto: ProductInputDto, user_id: UUID = None, **kwargs
@@ -30,9 +51,18 @@ class ProductCrudService(BaseCrudService):
         product = Product.create(**input_as_dict)
         await self._repository.asave(product)
 
-        try:
-            await self._search_repo.acreate_document(document=product.snapshot)
-        except Exception as e:
-            logger.error(f"Error creating document in search index: {e}")
-
         return ProductOutputDto(**product.snapshot)
+
+    async def suggest(self, query: str, limit: int = 10) -> list[ProductSuggestionDto]:
+        """
+        Typeahead suggestions of products by name or brand prefix, the most eaten first.
+        Served from the in-process index without db and search engine calls, from search engine prefix search
+        (ranked by relevance) when the in-process index is disabled.
+        """
+        if self._suggest_repo is None:
+            documents = await self._search_repo.asearch(
+                query, limit=limit, fields_to_get=list(ProductSuggestionDto.model_fields)
+            )
+        else:
+            documents = await self._suggest_repo.asearch(query, limit=limit)
+        return [ProductSuggestionDto(**document) for document in documents]
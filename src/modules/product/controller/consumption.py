@@ -8,6 +8,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from src.config.di import AppContainer
 from src.core.app.service import IAuthService
+from src.core.controller.crud import NEXT_CURSOR_HEADER
 from src.core.controller.di import dependency
 from src.modules.product.application.dto.consumption import (
     DailyUserConsumptionOutputDto,
@@ -21,8 +22,10 @@ router = APIRouter(prefix="/consumption", tags=["consumption"])
 @router.get("/by_user_id/")
 @inject
 async def get_user_all_days(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
     token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
     service: ConsumptionService = dependency(AppContainer.consumption.service),
     auth_service: IAuthService = dependency(AppContainer.auth.auth_service),
@@ -32,11 +35,16 @@ async def get_user_all_days(
 
     Day is a list of products consumed by a user on a specific day.
 
+    Next page cursor is returned in `X-Next-Cursor` header, pass it as ?cursor to get the next page.
+
     """
 
     user = await auth_service.verify(token.credentials)
 
-    return await service.get_all_user_days(user_id=user.id, skip=skip, limit=limit)
+    page = await service.get_user_days_page(user_id=user.id, skip=skip, limit=limit, cursor=cursor, principal=user)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/by_day_id/{day_id}")
@@ -64,7 +72,7 @@ async def get_day_by_datetime(
     """
     user = await auth_service.verify(token.credentials)
 
-    return await service.get_day_by_datetime(date=datetime, user_id=user.id)
+    return await service.get_day_by_datetime(date=datetime, user_id=user.id, principal=user)
 
 
 @router.post("/")
@@ -82,6 +90,6 @@ async def add_meal(
 
     user = await auth_service.verify(token.credentials)
 
-    await service.add_meal(user_id=user.id, input_dto=dto)
+    await service.add_meal(user_id=user.id, input_dto=dto, principal=user)
 
     return Response(status_code=HTTPStatus.CREATED)
@@ -1,4 +1,6 @@
+from classy_fastapi import get
 from dependency_injector.wiring import inject
+from fastapi import Query
 
 from src.config.di import AppContainer
 from src.core.controller.crud import BaseModelView
@@ -6,6 +8,7 @@ from src.core.controller.di import dependency
 from src.modules.product.application.dto.product import (
     ProductInputDto,
     ProductOutputDto,
+    ProductSuggestionDto,
 )
 
 
@@ -27,3 +30,13 @@ class ProductViewSet(BaseModelView[ProductInputDto, ProductOutputDto]):
             update_dto=ProductInputDto,
             output_dto=ProductOutputDto,
         )
+
+    @get(path="/suggest", response_model=list[ProductSuggestionDto])
+    async def suggest(
+        self,
+        q: str,
+        limit: int = Query(default=10, ge=1, le=10),
+    ) -> list[ProductSuggestionDto]:
+        """Typeahead endpoint - products whose name or brand words start with ?q, the most eaten first."""
+
+        return await self._service.suggest(q, limit=limit)
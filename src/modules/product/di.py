@@ -1,10 +1,19 @@
 from dependency_injector import containers, providers
 
+from src.core.infra.repo.failover import FailoverSearchRepository
+from src.core.infra.repo.search_cache import CachedSearchRepository
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
 from src.modules.product.application.service.consumption import ConsumptionService
 from src.modules.product.application.service.product import ProductCrudService
+from src.modules.product.infra.repo.embedded.product import (
+    ProductEmbeddedSearchEngineRepo,
+)
 from src.modules.product.infra.repo.meilsearch.product import (
     ProductMeiliSearchEngineRepo,
 )
+from src.modules.product.infra.repo.pgsearch.product import (
+    ProductPostgresSearchEngineRepo,
+)
 from src.modules.product.infra.repo.postgres.consumption import (
     DailyUserConsumptionTortoiseRepo,
 )
@@ -12,20 +21,46 @@ from src.modules.product.infra.repo.postgres.daily_product import (
     DailyUserProductTortoiseRepo,
 )
 from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+from src.modules.product.infra.repo.suggest.product import ProductSuggestRepo
 
 
 class ProductContainer(containers.DeclarativeContainer):
     container_config = providers.Configuration()
     api_config = providers.ItemGetter()
 
+    meili_search_repo = providers.Singleton(
+        ProductMeiliSearchEngineRepo,
+        meilisearch_url=api_config.MEILISEARCH_URL,
+        meilisearch_master_key=api_config.MEILISEARCH_MASTER_KEY,
+    )
+    search_repo = providers.Selector(
+        api_config.SEARCH_ENGINE,
+        meilisearch=providers.Singleton(
+            FailoverSearchRepository,
+            primary=providers.Singleton(
+                CachedSearchRepository,
+                repository=meili_search_repo,
+                max_bytes=api_config.SEARCH_CACHE_MAX_BYTES,
+                ttl=api_config.SEARCH_CACHE_TTL,
+            ),
+            fallback=providers.Singleton(ProductPostgresSearchEngineRepo),
+            retry_after=api_config.SEARCH_FAILOVER_RETRY_AFTER,
+        ),
+        embedded=providers.Singleton(ProductEmbeddedSearchEngineRepo),
+    )
+
+    suggest_repo = providers.Selector(
+        api_config.SUGGEST_BACKEND,
+        memory=providers.Singleton(ProductSuggestRepo),
+        search=providers.Object(None),
+    )
+
     service = providers.Factory(
         ProductCrudService,
         repository=ProductTortoiseRepo,
-        search_repo=providers.Factory(
-            ProductMeiliSearchEngineRepo,
-            meilisearch_url=api_config.MEILISEARCH_URL,
-            meilisearch_master_key=api_config.MEILISEARCH_MASTER_KEY,
-        ),
+        search_repo=search_repo,
+        search_served=api_config.SEARCH_SERVED_LISTS,
+        suggest_repo=suggest_repo,
     )
 
 
@@ -40,4 +75,5 @@ class ConsumptionContainer(containers.DeclarativeContainer):
         daily_product_repository=DailyUserProductTortoiseRepo,
         consumption_repository=DailyUserConsumptionTortoiseRepo,
         settings_service=settings_service,
+        unit_of_work=providers.Factory(TortoiseUnitOfWork),
     )
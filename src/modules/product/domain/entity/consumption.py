@@ -19,14 +19,19 @@ class DailyUserConsumption(Entity):
     summary_calories: PrecisedFloat = PrecisedFloat(0.0)
 
     @classmethod
-    def create(cls, user_id: UUID) -> "DailyUserConsumption":
+    def create(cls, user_id: UUID, date: datetime | date | None = None) -> "DailyUserConsumption":
         now = cls.create_now_time()
+        if date is None:
+            date = now.date()
+        elif isinstance(date, datetime):
+            date = date.date()
+
         entity = cls(
             id=cls.create_id(),
             updated_at=now,
             created_at=now,
             user_id=user_id,
-            date=date(now.year, now.month, now.day),
+            date=date,
         )
         return entity
 
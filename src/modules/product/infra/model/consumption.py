@@ -23,3 +23,5 @@ class DailyUserConsumption(BaseModel):
     class Meta:
         app = "product"
         table = "daily_user_consumption"
+        indexes = (("user_id", "created_at", "id"),)
+        unique_together = (("user_id", "date"),)
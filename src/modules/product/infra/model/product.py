@@ -25,3 +25,4 @@ class Product(BaseModel):
     class Meta:
         app = "product"
         table = "product"
+        indexes = (("created_at", "id"),)
@@ -0,0 +1,15 @@
+from src.core.infra.repo.embeddedsearchrepo import EmbeddedSearchRepository
+from src.modules.product.infra.repo.meilsearch.product import ProductMeiliSearchEngineRepo
+
+
+class ProductEmbeddedSearchEngineRepo(EmbeddedSearchRepository):
+    INDEX = "product-index"
+    SEARCH_FIELDS = [
+        "name",
+        "brand",
+        "groups",
+        "category",
+    ]
+    FIELDS_TO_GET = ["id"]
+    SORTABLE_FIELDS = ProductMeiliSearchEngineRepo.SORTABLE_FIELDS
+    FILTERABLE_FIELDS = ProductMeiliSearchEngineRepo.FILTERABLE_FIELDS
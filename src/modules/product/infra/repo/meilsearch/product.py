@@ -10,3 +10,12 @@ class ProductMeiliSearchEngineRepo(MeiliSearchRepository):
         "category",
     ]
     FIELDS_TO_GET = ["id"]
+    SORTABLE_FIELDS = [
+        "name",
+        "energy_kcal_100g",
+        "fat_100g",
+        "carbohydrates_100g",
+        "sugars_100g",
+        "proteins_100g",
+    ]
+    FILTERABLE_FIELDS = ["category", "groups", "brand", *SORTABLE_FIELDS[1:]]
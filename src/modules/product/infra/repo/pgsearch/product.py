@@ -0,0 +1,13 @@
+from src.core.infra.repo.pgsearchrepo import PostgresSearchRepository
+from src.modules.product.infra.model.product import Product as ProductModel
+
+
+class ProductPostgresSearchEngineRepo(PostgresSearchRepository):
+    MODEL = ProductModel
+    INDEX = "product-index"
+    SEARCH_FIELDS = [
+        "name",
+        "brand",
+        "category",
+    ]
+    FIELDS_TO_GET = ["id"]
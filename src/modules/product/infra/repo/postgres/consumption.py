@@ -1,3 +1,7 @@
+from asyncpg import ObjectInUseError
+from tortoise.exceptions import BaseORMException
+
+from src.core.domain.errors import DBError
 from src.core.infra.repo.tortoiserepo import TortoiseRepo
 from src.modules.product.domain.entity.consumption import (
     DailyUserConsumption as DailyUserConsumptionEntity,
@@ -12,3 +16,55 @@ class DailyUserConsumptionTortoiseRepo(
 ):
     model = DailyUserConsumptionModel
     entity = DailyUserConsumptionEntity
+
+    AGGREGATE_RELATION = ("products", "product")
+
+    SUMMARY_FIELDS = (
+        "summary_calories",
+        "summary_proteins",
+        "summary_fats",
+        "summary_carbohydrates",
+    )
+    UPSERT_FIELDS = ("id", "created_at", "updated_at", "user_id", "date", *SUMMARY_FIELDS)
+
+    @classmethod
+    def _upsert_summary_query(cls) -> str:
+        meta = cls.model._meta
+        table = meta.db_table
+        columns = ", ".join(f'"{meta.fields_db_projection[name]}"' for name in cls.UPSERT_FIELDS)
+        placeholders = ", ".join(f"${idx}" for idx in range(1, len(cls.UPSERT_FIELDS) + 1))
+        increments = ", ".join(
+            f'"{column}" = ROUND(("{table}"."{column}" + EXCLUDED."{column}")::numeric, 2)::double precision'
+            for column in (meta.fields_db_projection[name] for name in cls.SUMMARY_FIELDS)
+        )
+        return (
+            f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders}) '
+            f'ON CONFLICT ("user_id", "date") DO UPDATE SET {increments}, "updated_at" = EXCLUDED."updated_at" '
+            f"RETURNING *"
+        )
+
+    @classmethod
+    async def aupsert_summary(cls, delta: DailyUserConsumptionEntity) -> DailyUserConsumptionEntity:
+        """
+        Atomically create the `(user_id, date)` day or add `delta` summaries to the existing one.
+
+        `delta` is a day entity whose `summary_*` fields hold the increments (negative to subtract).
+        Totals are computed by postgres in the same `INSERT ... ON CONFLICT DO UPDATE ... RETURNING` statement,
+        so concurrent meals of one user don't overwrite each other.
+
+        :param delta: The day with summary increments, its id / dates are used only when the day is created
+        :return: The day with current totals
+        """
+        fields_map = cls.model._meta.fields_map
+        values = [
+            fields_map[name].to_db_value(getattr(delta, name), cls.model)
+            for name in cls.UPSERT_FIELDS
+        ]
+        try:
+            db = cls.model._choose_db(for_write=True)
+            _, rows = await db.execute_query(cls._upsert_summary_query(), values)
+        except (BaseORMException, ObjectInUseError) as e:
+            raise DBError(e)
+
+        cls._written([rows[0]["id"]])
+        return cls._to_entity(cls.model._init_from_db(**dict(rows[0])))
@@ -1,8 +1,13 @@
 from src.core.infra.repo.tortoiserepo import TortoiseRepo
 from src.modules.product.domain.entity.product import Product as ProductEntity
 from src.modules.product.infra.model.product import Product as ProductModel
+from src.modules.product.infra.repo.meilsearch.product import (
+    ProductMeiliSearchEngineRepo,
+)
 
 
 class ProductTortoiseRepo(TortoiseRepo[ProductModel, ProductEntity]):
     model = ProductModel
     entity = ProductEntity
+
+    SEARCH_INDEX = ProductMeiliSearchEngineRepo.INDEX
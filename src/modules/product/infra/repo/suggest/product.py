@@ -0,0 +1,25 @@
+from tortoise.functions import Count
+
+from src.core.infra.repo.embeddedsearchrepo import document_key
+from src.core.infra.repo.suggestrepo import PrefixSuggestRepository
+from src.modules.product.infra.model.daily_product import DailyUserProduct as DailyUserProductModel
+
+
+class ProductSuggestRepo(PrefixSuggestRepository):
+    INDEX = "product-index"
+    SUGGEST_FIELDS = [
+        "name",
+        "brand",
+    ]
+    FIELDS_TO_GET = ["id", "name", "brand"]
+
+    async def apopularity(self) -> dict[str, int]:
+        """
+        Products are as popular as many times they were eaten.
+        """
+        rows = (
+            await DailyUserProductModel.annotate(uses=Count("id"))
+            .group_by("product_id")
+            .values("product_id", "uses")
+        )
+        return {document_key(row["product_id"]): row["uses"] for row in rows}
@@ -4,10 +4,18 @@ from loguru import logger
 from tortoise.exceptions import DoesNotExist
 from uuid6 import UUID
 
-from src.core.app.service import ICrudService
+from src.core.app.service import (
+    ICrudService,
+    in_search_order,
+    outputs_from_search,
+    parse_search_args,
+    search_ids,
+)
 from src.core.domain.errors import Error
+from src.core.domain.pagination import Cursor, Page
 from src.core.domain.repo.postgres import IPostgresRepository
 from src.core.domain.repo.search_engine import ISearchRepository
+from src.core.domain.unit_of_work import IUnitOfWork
 from src.modules.recipe.application.dto.recipe import (
     RecipeInputDto,
     RecipeOutputDto,
@@ -39,6 +47,8 @@ class RecipeService(ICrudService):
         product_for_recipe_repository: [IPostgresRepository],
         recipe_repository: [IPostgresRepository],
         search_repo: [ISearchRepository],
+        unit_of_work: IUnitOfWork,
+        search_served: bool = False,
     ):
         self._product_service: ICrudService = product_service
         self._product_for_recipe_repository: IPostgresRepository = (
@@ -46,69 +56,95 @@ class RecipeService(ICrudService):
         )
         self._recipe_repository: IPostgresRepository = recipe_repository
         self._search_repo: ISearchRepository = search_repo
+        self._unit_of_work: IUnitOfWork = unit_of_work
+        self._search_served = search_served
+
+    def _to_output(
+        self, recipe: Recipe, fields: list[str] | None = None
+    ) -> RecipeOutputDto | dict:
+        if fields:
+            return self._recipe_repository.to_sparse(recipe, fields)
+        return self._recipe_repository.to_dto(recipe, RecipeOutputDto)
 
     async def get_all(
         self,
         skip: int = 0,
         limit: int = 10,
         query: str | None = None,
-    ) -> [RecipeOutputDto]:
-        search_result = []
-
-        async def _get_recipes_normal_query():
-            return await self._recipe_repository.aget_all(
-                offset=skip,
-                limit=limit,
-                fetch_fields=["products_for_recipe", "products_for_recipe__product"],
-            )
-
-        def _convert_to_recipe_output_dto(_recipes):
-            return [
-                RecipeOutputDto(
-                    **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-                )
-                for recipe in _recipes
-            ]
+        fields: list[str] | None = None,
+        filters: list[str] | None = None,
+        sort: list[str] | None = None,
+    ) -> [RecipeOutputDto | dict]:
+        """
+        Get recipes, found by search engine when `query` is given - in search ranking order,
+        built straight from full search documents with `search_served`.
+
+        :raises ValidationError: When `filters` or `sort` are given, recipes have no filterable fields
+        """
+        parse_search_args(filters, sort, (), ())
+        fetch_fields = ["products_for_recipe", "products_for_recipe__product"]
 
         if query:
             logger.info("Searching recipes with query: {query}", query=query)
 
             try:
-                search_result = await self._search_repo.asearch(
+                documents = await self._search_repo.asearch(
                     offset=skip,
                     limit=limit,
                     query=query,
+                    fields_to_get=["*"] if self._search_served else None,
                 )
             except (Exception, Error) as e:
                 logger.error(f"Error while searching recipes: {e}")
-                recipes = await self._recipe_repository.aget_all(
-                    offset=skip,
-                    limit=limit,
-                    fetch_fields=[
-                        "products_for_recipe",
-                        "products_for_recipe__product",
-                    ],
+            else:
+                items = (
+                    outputs_from_search(documents, RecipeOutputDto, fields)
+                    if self._search_served
+                    else None
                 )
-                return _convert_to_recipe_output_dto(recipes)
-            finally:
-                logger.info("Recipes found: {recipes_id}", recipes_id=search_result)
+                if items is not None:
+                    return items
+
+                ids = search_ids(documents)
+                logger.info("Recipes found: {recipes_id}", recipes_id=ids)
                 recipes = await self._recipe_repository.aget_all_from_filter(
-                    offset=skip,
-                    limit=limit,
-                    id__in=[result.get("id") for result in search_result],
-                    fetch_fields=[
-                        "products_for_recipe",
-                        "products_for_recipe__product",
-                    ],
+                    limit=len(ids),
+                    id__in=ids,
+                    fetch_fields=fetch_fields,
+                    fields=fields,
                 )
-                return _convert_to_recipe_output_dto(recipes)
+                return [
+                    self._to_output(recipe, fields)
+                    for recipe in in_search_order(recipes, ids)
+                ]
 
-        return [
-            RecipeOutputDto(
-                **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-            )
-            for recipe in await _get_recipes_normal_query()
-        ]
+        recipes = await self._recipe_repository.aget_all(
+            offset=skip,
+            limit=limit,
+            fetch_fields=fetch_fields,
+            fields=fields,
+        )
+        return [self._to_output(recipe, fields) for recipe in recipes]
+
+    async def get_page(
+        self,
+        limit: int = 10,
+        cursor: str | None = None,
+        skip: int = 0,
+        fields: list[str] | None = None,
+    ) -> Page[RecipeOutputDto | dict]:
+        recipes = await self._recipe_repository.aget_all(
+            offset=skip,
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            fetch_fields=["products_for_recipe", "products_for_recipe__product"],
+            fields=fields,
+        )
+        return Page.from_entities(
+            recipes,
+            items=[self._to_output(recipe, fields) for recipe in recipes],
+            limit=limit,
+        )
 
     async def get_all_my_recipes(
         self, user_id: UUID, skip: int = 0, limit: int = 10
@@ -121,78 +157,55 @@ class RecipeService(ICrudService):
         )
 
         return [
-            RecipeOutputDto(
-                **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-            )
+            self._recipe_repository.to_dto(recipe, RecipeOutputDto)
             for recipe in recipes
         ]
 
     async def get_by_id(self, recipe_id: UUID) -> RecipeOutputDto:
         try:
-            recipe = await self._recipe_repository.aget_by_id(
-                id=recipe_id,
-                fetch_fields=["products_for_recipe", "products_for_recipe__product"],
-            )
+            recipe = await self._recipe_repository.aget_aggregate_by_id(id=recipe_id)
         except DoesNotExist:
             raise RecipeNotFound(message=f"Recipe with id {recipe_id} not found.")
-        return RecipeOutputDto(
-            **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-        )
+        return self._recipe_repository.to_dto(recipe, RecipeOutputDto)
 
     async def create(
         self, input_dto: RecipeInputDto, user_id: UUID = None, **kwargs
     ) -> RecipeOutputDto:
-        entity = Recipe.create(
-            name=input_dto.name,
-            link=input_dto.link,
-            description=input_dto.description,
-            user_id=user_id,
-        )
-        logger.info(
-            "Count: {number} of product(s) for recipe: {recipe_id}",
-            recipe_id=entity.id,
-            number=len(input_dto.products),
-        )
-        await self._recipe_repository.asave(entity)
-
-        try:
-            await self._search_repo.acreate_document(document=entity.snapshot)
-        except Exception as e:
-            logger.error(
-                "Error while creating document in search engine: {error}", error=e
-            )
-
-        for product_for_recipe in input_dto.products:
-            try:
-                product = await self._product_service.get_by_id(
-                    id=product_for_recipe.product_id
-                )
-            except Error as e:
-                raise ProductNotFound(message=e.message)
-
-            product_for_recipe_entity = ProductForRecipe.create(
-                recipe=entity,
-                product=product,
-                weight_in_grams=product_for_recipe.weight_in_grams,
+        async with self._unit_of_work as uow:
+            entity = Recipe.create(
+                name=input_dto.name,
+                link=input_dto.link,
+                description=input_dto.description,
+                user_id=user_id,
             )
-            await self._product_for_recipe_repository.asave(
-                entity=product_for_recipe_entity
+            logger.info(
+                "Count: {number} of product(s) for recipe: {recipe_id}",
+                recipe_id=entity.id,
+                number=len(input_dto.products),
             )
+            uow.save(self._recipe_repository, entity)
+
+            for product_for_recipe in input_dto.products:
+                try:
+                    product = await self._product_service.get_by_id(
+                        id=product_for_recipe.product_id
+                    )
+                except Error as e:
+                    raise ProductNotFound(message=e.message)
+
+                uow.save(
+                    self._product_for_recipe_repository,
+                    ProductForRecipe.create(
+                        recipe=entity,
+                        product=product,
+                        weight_in_grams=product_for_recipe.weight_in_grams,
+                    ),
+                )
+            await uow.flush()
 
-        await self._recipe_repository.aupdate(
-            entity=entity
-        )  # ToDo: Add in future get_or_update
+            recipe = await self._recipe_repository.aget_aggregate_by_id(id=entity.id)
 
-        recipe = await self._recipe_repository.aget_by_id(
-            id=entity.id,
-            fetch_fields=[
-                "products_for_recipe",
-                "products_for_recipe__product",
-            ],
-        )
-        return RecipeOutputDto(
-            **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-        )
+        return self._recipe_repository.to_dto(recipe, RecipeOutputDto)
 
     async def update(
         self,
@@ -201,65 +214,45 @@ class RecipeService(ICrudService):
         user_id: Optional[UUID] = None,
         is_admin: bool = False,
     ):
-        try:
-            recipe = await self._recipe_repository.aget_by_id(id)
-        except DoesNotExist:
-            raise RecipeNotFound(message=f"Recipe with id {id} not found.")
+        async with self._unit_of_work as uow:
+            try:
+                recipe = await self._recipe_repository.aget_by_id(id)
+            except DoesNotExist:
+                raise RecipeNotFound(message=f"Recipe with id {id} not found.")
 
-        if not is_admin and recipe.user_id != user_id:
-            raise RecipeNotRecordOwner(
-                message=f"Recipe with id {id} not owned by user with id {user_id}."
-            )
+            if not is_admin and recipe.user_id != user_id:
+                raise RecipeNotRecordOwner(
+                    message=f"Recipe with id {id} not owned by user with id {user_id}."
+                )
 
-        recipe.name = input_dto.name
-        recipe.link = input_dto.link
-        recipe.description = input_dto.description
+            # fields not given are left untouched, only changed columns are written
+            for field, value in input_dto.dict(exclude_none=True).items():
+                setattr(recipe, field, value)
 
-        await self._recipe_repository.aupdate(recipe)
+            uow.update(self._recipe_repository, recipe)
+            await uow.flush()
 
-        try:
-            await self._search_repo.aupdate_document(
-                document_id=id,
-                document={
-                    key: value
-                    for key, value in recipe.snapshot.items()
-                    if key != "products_for_recipe"
-                },
-            )
-        except Exception as e:
-            logger.error(
-                "Error while updating document in search engine: {error}", error=e
+            updated_recipe = await self._recipe_repository.aget_aggregate_by_id(
+                id=recipe.id
             )
 
-        recipe = await self._recipe_repository.aget_by_id(
-            id=recipe.id,
-            fetch_fields=["products_for_recipe", "products_for_recipe__product"],
-        )
-        return RecipeOutputDto(
-            **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-        )
+        return self._recipe_repository.to_dto(updated_recipe, RecipeOutputDto)
 
     async def delete(
         self, id: UUID, user_id: Optional[UUID] = None, is_admin: bool = False
     ):
-        try:
-            recipe = await self._recipe_repository.aget_by_id(id)
-        except DoesNotExist:
-            raise RecipeNotFound(message=f"Recipe with id {id} not found.")
-
-        if not is_admin and recipe.user_id != user_id:
-            raise RecipeNotRecordOwner(
-                message=f"Recipe with id {id} not owned by user with id {user_id}."
-            )
+        async with self._unit_of_work as uow:
+            try:
+                recipe = await self._recipe_repository.aget_by_id(id)
+            except DoesNotExist:
+                raise RecipeNotFound(message=f"Recipe with id {id} not found.")
 
-        await self._recipe_repository.adelete(recipe)
+            if not is_admin and recipe.user_id != user_id:
+                raise RecipeNotRecordOwner(
+                    message=f"Recipe with id {id} not owned by user with id {user_id}."
+                )
 
-        try:
-            await self._search_repo.adelete_document(document_id=recipe.id)
-        except Exception as e:
-            logger.error(
-                "Error while deleting document in search engine: {error}", error=e
-            )
+            uow.delete(self._recipe_repository, recipe)
 
     async def add_product(
         self,
@@ -268,37 +261,34 @@ class RecipeService(ICrudService):
         user_id: Optional[UUID] = None,
         is_admin: bool = False,
     ) -> RecipeOutputDto:
-        try:
-            recipe = await self._recipe_repository.aget_by_id(id)
-        except DoesNotExist:
-            raise RecipeNotFound(message=f"Recipe with id {id} not found.")
+        async with self._unit_of_work as uow:
+            try:
+                recipe = await self._recipe_repository.aget_by_id(id)
+            except DoesNotExist:
+                raise RecipeNotFound(message=f"Recipe with id {id} not found.")
 
-        if not is_admin and recipe.user_id != user_id:
-            raise ProductForRecipeNotRecordOwner(
-                message=f"Recipe with id {id} not owned by user with id {user_id}."
-            )
+            if not is_admin and recipe.user_id != user_id:
+                raise ProductForRecipeNotRecordOwner(
+                    message=f"Recipe with id {id} not owned by user with id {user_id}."
+                )
 
-        try:
-            product = await self._product_service.get_by_id(input_dto.product_id)
-        except Error as e:
-            raise ProductNotFound(message=e.message)
-
-        product_for_recipe = ProductForRecipe.create(
-            recipe=recipe,
-            product=product,
-            weight_in_grams=input_dto.weight_in_grams,
-        )
-        await self._product_for_recipe_repository.asave(product_for_recipe)
-        await self._recipe_repository.aupdate(recipe)
+            try:
+                product = await self._product_service.get_by_id(input_dto.product_id)
+            except Error as e:
+                raise ProductNotFound(message=e.message)
 
-        recipe = await self._recipe_repository.aget_by_id(
-            id=recipe.id,
-            fetch_fields=["products_for_recipe", "products_for_recipe__product"],
-        )
+            product_for_recipe = ProductForRecipe.create(
+                recipe=recipe,
+                product=product,
+                weight_in_grams=input_dto.weight_in_grams,
+            )
+            uow.save(self._product_for_recipe_repository, product_for_recipe)
+            uow.update(self._recipe_repository, recipe)
+            await uow.flush()
 
-        return RecipeOutputDto(
-            **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-        )
+            recipe = await self._recipe_repository.aget_aggregate_by_id(id=recipe.id)
+
+        return self._recipe_repository.to_dto(recipe, RecipeOutputDto)
 
     async def update_product(
         self,
@@ -307,57 +297,59 @@ class RecipeService(ICrudService):
         user_id: UUID,
         is_admin=False,
     ) -> RecipeOutputDto:
-        try:
-            product_for_recipe: ProductForRecipe = (
-                await self._product_for_recipe_repository.aget_by_id(
-                    id=id, fetch_fields=["product"]
+        async with self._unit_of_work as uow:
+            try:
+                product_for_recipe: ProductForRecipe = (
+                    await self._product_for_recipe_repository.aget_by_id(
+                        id=id, fetch_fields=["product"]
+                    )
+                )
+            except DoesNotExist:
+                raise ProductForRecipeNotFound(
+                    message=f"Product with id {id} not found."
                 )
+
+            recipe: Recipe = await self._recipe_repository.aget_by_id(
+                product_for_recipe.recipe_id
             )
-        except DoesNotExist:
-            raise ProductForRecipeNotFound(message=f"Product with id {id} not found.")
+            if recipe.user_id != user_id and not is_admin:
+                raise ProductForRecipeNotRecordOwner(
+                    message=f"User with id {user_id} is not Recipe owner"
+                )
 
-        recipe: Recipe = await self._recipe_repository.aget_by_id(
-            product_for_recipe.recipe_id
-        )
-        if recipe.user_id != user_id and not is_admin:
-            raise ProductForRecipeNotRecordOwner(
-                message=f"User with id {user_id} is not Recipe owner"
+            product_for_recipe.update_weight(
+                recipe=recipe, weight=update_dto.weight_in_grams
             )
 
-        product_for_recipe.update_weight(
-            recipe=recipe, weight=update_dto.weight_in_grams
-        )
+            uow.update(self._product_for_recipe_repository, product_for_recipe)
+            uow.update(self._recipe_repository, recipe)
+            await uow.flush()
 
-        await self._product_for_recipe_repository.aupdate(product_for_recipe)
-        await self._recipe_repository.aupdate(recipe)
+            recipe = await self._recipe_repository.aget_aggregate_by_id(id=recipe.id)
 
-        recipe = await self._recipe_repository.aget_by_id(
-            id=recipe.id,
-            fetch_fields=["products_for_recipe", "products_for_recipe__product"],
-        )
-
-        return RecipeOutputDto(
-            **self._recipe_repository.convert_snapshot(snapshot=recipe.snapshot)
-        )
+        return self._recipe_repository.to_dto(recipe, RecipeOutputDto)
 
     async def delete_product(self, id: UUID, user_id: UUID, is_admin=False) -> None:
-        try:
-            product_for_recipe: ProductForRecipe = (
-                await self._product_for_recipe_repository.aget_by_id(id)
-            )
-        except DoesNotExist:
-            raise ProductForRecipeNotFound(message=f"Product with id {id} not found.")
-
-        recipe: Recipe = await self._recipe_repository.aget_by_id(
-            product_for_recipe.recipe_id
-        )
+        async with self._unit_of_work as uow:
+            try:
+                product_for_recipe: ProductForRecipe = (
+                    await self._product_for_recipe_repository.aget_by_id(id)
+                )
+            except DoesNotExist:
+                raise ProductForRecipeNotFound(
+                    message=f"Product with id {id} not found."
+                )
 
-        if recipe.user_id != user_id and not is_admin:
-            raise ProductForRecipeNotRecordOwner(
-                message=f"User with id {user_id} is not Recipe owner"
+            recipe: Recipe = await self._recipe_repository.aget_by_id(
+                product_for_recipe.recipe_id
             )
 
-        recipe.delete_product(product_for_recipe)
+            if recipe.user_id != user_id and not is_admin:
+                raise ProductForRecipeNotRecordOwner(
+                    message=f"User with id {user_id} is not Recipe owner"
+                )
+
+            recipe.delete_product(product_for_recipe)
 
-        await self._product_for_recipe_repository.adelete(product_for_recipe)
-        await self._recipe_repository.aupdate(recipe)
+            uow.delete(self._product_for_recipe_repository, product_for_recipe)
+            uow.update(self._recipe_repository, recipe)
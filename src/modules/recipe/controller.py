@@ -52,7 +52,7 @@ class RecipeViewSet(BaseModelView[RecipeInputDto, RecipeOutputDto]):
         """
         Get all recipes for a user.
         """
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
         return await service.get_all_my_recipes(user_id=user.id)
 
     @post("/product_for_recipe/{recipe_id}")
@@ -68,7 +68,7 @@ class RecipeViewSet(BaseModelView[RecipeInputDto, RecipeOutputDto]):
         """
         Add a product to a recipe.
         """
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
         return await service.add_product(
             id=recipe_id, input_dto=input_dto, user_id=user.id, is_admin=user.is_admin
         )
@@ -86,7 +86,7 @@ class RecipeViewSet(BaseModelView[RecipeInputDto, RecipeOutputDto]):
         """
         Update a product for a recipe.
         """
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
         return await service.update_product(
             id=product_id,
             update_dto=update_dto,
@@ -106,7 +106,7 @@ class RecipeViewSet(BaseModelView[RecipeInputDto, RecipeOutputDto]):
         """
         Delete a product from a recipe.
         """
-        user = await auth_service.verify(token.credentials)
+        user = await auth_service.authorize(token.credentials)
         return await service.delete_product(
             id=product_id, user_id=user.id, is_admin=user.is_admin
         )
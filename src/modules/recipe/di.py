@@ -1,7 +1,12 @@
 from dependency_injector import containers, providers
 
+from src.core.infra.repo.failover import FailoverSearchRepository
+from src.core.infra.repo.search_cache import CachedSearchRepository
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
 from src.modules.recipe.application.service import RecipeService
+from src.modules.recipe.infra.repo.embedded.recipe import RecipeEmbeddedSearchEngineRepo
 from src.modules.recipe.infra.repo.meilsearch.recipe import RecipeMeiliSearchEngineRepo
+from src.modules.recipe.infra.repo.pgsearch.recipe import RecipePostgresSearchEngineRepo
 from src.modules.recipe.infra.repo.postgres.recipe import RecipeTortoiseRepo
 from src.modules.recipe.infra.repo.postgres.recipe_product import (
     RecipeForProductTortoiseRepo,
@@ -13,14 +18,33 @@ class RecipeContainer(containers.DeclarativeContainer):
     api_config = providers.ItemGetter()
     product_service = providers.Dependency()
 
+    meili_search_repo = providers.Singleton(
+        RecipeMeiliSearchEngineRepo,
+        meilisearch_url=api_config.MEILISEARCH_URL,
+        meilisearch_master_key=api_config.MEILISEARCH_MASTER_KEY,
+    )
+    search_repo = providers.Selector(
+        api_config.SEARCH_ENGINE,
+        meilisearch=providers.Singleton(
+            FailoverSearchRepository,
+            primary=providers.Singleton(
+                CachedSearchRepository,
+                repository=meili_search_repo,
+                max_bytes=api_config.SEARCH_CACHE_MAX_BYTES,
+                ttl=api_config.SEARCH_CACHE_TTL,
+            ),
+            fallback=providers.Singleton(RecipePostgresSearchEngineRepo),
+            retry_after=api_config.SEARCH_FAILOVER_RETRY_AFTER,
+        ),
+        embedded=providers.Singleton(RecipeEmbeddedSearchEngineRepo),
+    )
+
     service = providers.Factory(
         RecipeService,
         product_service=product_service,
         product_for_recipe_repository=RecipeForProductTortoiseRepo,
         recipe_repository=RecipeTortoiseRepo,
-        search_repo=providers.Factory(
-            RecipeMeiliSearchEngineRepo,
-            meilisearch_url=api_config.MEILISEARCH_URL,
-            meilisearch_master_key=api_config.MEILISEARCH_MASTER_KEY,
-        ),
+        search_repo=search_repo,
+        search_served=api_config.SEARCH_SERVED_LISTS,
+        unit_of_work=providers.Factory(TortoiseUnitOfWork),
     )
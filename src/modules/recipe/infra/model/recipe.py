@@ -19,3 +19,4 @@ class Recipe(BaseModel):
     class Meta:
         app = "recipe"
         table = "recipe"
+        indexes = (("created_at", "id"),)
@@ -0,0 +1,10 @@
+from src.core.infra.repo.embeddedsearchrepo import EmbeddedSearchRepository
+
+
+class RecipeEmbeddedSearchEngineRepo(EmbeddedSearchRepository):
+    INDEX = "recipe-index"
+    SEARCH_FIELDS = [
+        "name",
+        "description",
+    ]
+    FIELDS_TO_GET = ["id"]
@@ -0,0 +1,12 @@
+from src.core.infra.repo.pgsearchrepo import PostgresSearchRepository
+from src.modules.recipe.infra.model.recipe import Recipe as RecipeModel
+
+
+class RecipePostgresSearchEngineRepo(PostgresSearchRepository):
+    MODEL = RecipeModel
+    INDEX = "recipe-index"
+    SEARCH_FIELDS = [
+        "name",
+        "description",
+    ]
+    FIELDS_TO_GET = ["id"]
@@ -1,8 +1,13 @@
 from src.core.infra.repo.tortoiserepo import TortoiseRepo
 from src.modules.recipe.domain.entity.recipe import Recipe as RecipeEntity
 from src.modules.recipe.infra.model.recipe import Recipe as RecipeModel
+from src.modules.recipe.infra.repo.meilsearch.recipe import RecipeMeiliSearchEngineRepo
 
 
 class RecipeTortoiseRepo(TortoiseRepo[RecipeModel, RecipeEntity]):
     model = RecipeModel
     entity = RecipeEntity
+
+    AGGREGATE_RELATION = ("products_for_recipe", "product")
+    SEARCH_INDEX = RecipeMeiliSearchEngineRepo.INDEX
+    SEARCH_FETCH_FIELDS = ("products_for_recipe", "products_for_recipe__product")
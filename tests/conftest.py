@@ -233,11 +233,19 @@ async def api_client():
         yield client
 
 
+@pytest.fixture
+def outbox_relay():
+    return app.container.outbox_relay()
+
+
 @pytest.fixture(scope="function", autouse=True)
 def db(request, event_loop):
     async def _drop_db() -> None:
         # ToDO: Implement drop db
         Printer.teardown("Dropping tables...")
+        # verified users of dropped tables
+        app.container.auth.principal_cache().clear()
+        app.container.auth.throttle_store().clear()
         conn = Tortoise.get_connection("default")
         try:
             drop_query = """DROP SCHEMA IF EXISTS PUBLIC CASCADE;"""
@@ -253,6 +261,9 @@ def db(request, event_loop):
             Printer.teardown("Connection closed.")
 
     async def _drop_search_index():
+        for container in (app.container.product, app.container.recipe):
+            container.search_repo().invalidate()
+
         async with MeiliAsyncClient(
             url=settings.MEILISEARCH_URL,
             api_key=settings.MEILISEARCH_MASTER_KEY,
@@ -12,6 +12,8 @@ from src.modules.auth.application.dto import (
 )
 from src.modules.auth.application.service.auth import AuthenticationService
 from src.modules.auth.application.service.user import UserCrudService
+from src.modules.auth.domain.entity.user import User
+from src.modules.auth.domain.enums import TypeEnum
 from src.modules.auth.infra.repo.settings import MacroTortoiseRepo, UserSettingsTortoiseRepo
 from src.modules.auth.infra.repo.user import UserTortoiseRepo
 
@@ -86,6 +88,13 @@ async def user_record2(user_service, user_password):
     )
 
 
+@pytest_asyncio.fixture(scope="function")
+async def admin_record(user_password):
+    return await UserTortoiseRepo.asave(
+        User.create(username="admin", password=user_password, email="admin@no.com", type=TypeEnum.ADMIN.value)
+    )
+
+
 @pytest_asyncio.fixture(scope="function")
 async def user_token(auth_service, user_password, user_record):
     return await auth_service.authenticate(UserAuthInputDto(username=user_record.username, password=user_password))
@@ -96,6 +105,11 @@ async def user_token2(auth_service, user_password, user_record2):
     return await auth_service.authenticate(UserAuthInputDto(username=user_record2.username, password=user_password))
 
 
+@pytest_asyncio.fixture(scope="function")
+async def admin_token(auth_service, user_password, admin_record):
+    return await auth_service.authenticate(UserAuthInputDto(username=admin_record.username, password=user_password))
+
+
 @pytest.fixture
 def dummy_token():
     return TokenOutputDto(api_token=str(uuid.uuid4()), user_id=str(uuid.uuid4()))
@@ -3,12 +3,14 @@ from http import HTTPStatus
 
 import pytest
 
+from src.config import settings
 from src.modules.auth.application.dto import (
     UserInputDto,
     UserUpdateDto,
     UserAuthInputDto,
     UserSettingsDto,
 )
+from src.core.utils.metrics import metrics
 from src.modules.auth.infra.repo.user import UserTortoiseRepo
 
 
@@ -153,6 +155,48 @@ async def test_user_controller_delete_user(api_client, endpoint_enum, user_recor
     assert len(users) == 0
 
 
+@pytest.mark.asyncio
+async def test_user_controller_delete_user_reads_user_once(api_client, endpoint_enum, user_record, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+    metrics_before = metrics.snapshot()
+
+    # when
+    response = await api_client.delete(endpoint_enum.USERS.get_detail(user_token.user_id))
+
+    # then
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    metrics_after = metrics.snapshot()
+    # user from token is loaded by `verify`, service gets it from identity map
+    assert metrics_after["identity_map.hits"] - metrics_before.get("identity_map.hits", 0) == 1
+    assert metrics_after["identity_map.misses"] - metrics_before.get("identity_map.misses", 0) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_admin(api_client, admin_token):
+    # given
+    api_client.set_token(admin_token.api_token)
+
+    # when
+    response = await api_client.get("/metrics/")
+
+    # then
+    assert response.status_code == HTTPStatus.OK
+    assert isinstance(response.json(), dict)
+
+
+@pytest.mark.asyncio
+async def test_metrics_not_admin(api_client, user_record, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+
+    # when
+    response = await api_client.get("/metrics/")
+
+    # then
+    api_client.check_status_code_in_error_response(response, HTTPStatus.FORBIDDEN)
+
+
 @pytest.mark.asyncio
 async def test_user_controller_delete_user_dummy_token(api_client, endpoint_enum, user_record, dummy_token):
     # given
@@ -270,3 +314,33 @@ async def test_user_controller_refresh_token(api_client, endpoint_enum, user_rec
     assert isinstance(response_json["api_token"], str)
 
     assert user_token.api_token != response_json["api_token"]
+
+
+@pytest.mark.asyncio
+async def test_user_controller_logout_revokes_token(api_client, endpoint_enum, user_record, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+
+    # when
+    response = await api_client.post(endpoint_enum.USERS.get_detail("logout"))
+    after_logout = await api_client.get(endpoint_enum.USERS.get_detail("settings"))
+
+    # then
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    api_client.check_status_code_in_error_response(after_logout, HTTPStatus.UNAUTHORIZED)
+
+
+@pytest.mark.asyncio
+async def test_user_controller_login_is_throttled(api_client, endpoint_enum, user_record):
+    # given
+    login_dto = UserAuthInputDto(username=user_record.username, password="wrong_password")
+
+    # when
+    responses = [
+        await api_client.post(f"{endpoint_enum.USERS.value}login", json_data=login_dto.model_dump_json())
+        for _ in range(settings.AUTH_USER_THROTTLE_BURST + 1)
+    ]
+
+    # then
+    assert {response.status_code for response in responses[:-1]} == {HTTPStatus.UNAUTHORIZED}
+    api_client.check_status_code_in_error_response(responses[-1], HTTPStatus.TOO_MANY_REQUESTS)
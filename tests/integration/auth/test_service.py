@@ -1,9 +1,14 @@
+import asyncio
+import time
 import uuid
+from typing import Optional
 
 import pytest
+from pydantic import BaseModel
 from tortoise.exceptions import DoesNotExist
 
 from src.core.infra.repo.tortoiserepo import TortoiseRepo
+from src.config import settings
 from src.modules.auth.application.dto import (
     UserInputDto,
     UserUpdateDto,
@@ -11,9 +16,20 @@ from src.modules.auth.application.dto import (
     UserSettingsDto,
 )
 from src.modules.auth.application.service.auth import AuthenticationService
+from src.modules.auth.application.service.settings import UserSettingsService
 from src.modules.auth.application.service.user import UserCrudService
-from src.modules.auth.domain.errors import BadCredentials, UserNotRecordOwner
-from src.modules.auth.domain.entity.user import User
+from src.core.domain.errors import TooManyRequests
+from src.core.utils.bloom import BloomFilter
+from src.core.utils.throttle import MemoryBucketStore, RedisBucketStore, Throttle
+from src.modules.auth.domain.errors import BadCredentials, InvalidToken, UserNotRecordOwner
+from src.modules.auth.domain.entity.user import TokenPrincipal, User
+from src.modules.auth.domain.enums import TypeEnum
+from src.modules.auth.infra.cache import PrincipalCache
+from src.modules.auth.infra.keys import TokenKeys
+from src.modules.auth.infra.repo.settings import MacroTortoiseRepo, UserSettingsTortoiseRepo
+from src.modules.auth.infra.repo.user import UserTortoiseRepo
+from src.modules.auth.infra.revocation import RevocationList
+from src.core.utils.metrics import metrics
 
 
 @pytest.mark.asyncio
@@ -253,8 +269,354 @@ async def test_auth_service_refresh_token(
         credentials=UserAuthInputDto(username=user_record.username, password=user_password)
     )
     # when
-    new_token = auth_service.refresh_token(user=user)
+    new_token = await auth_service.refresh_token(user=user)
 
     # then
     assert new_token is not None
     assert new_token.api_token != token.api_token
+
+
+class CountingUserRepo(UserTortoiseRepo):
+    reads = 0
+
+    @classmethod
+    async def aget_principal(cls, *args, **kwargs):
+        cls.reads += 1
+        return await super().aget_principal(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_auth_service_verifies_cached_principal_until_user_is_updated(
+    secret_key: str, algorithm: str, user_record, user_password
+):
+    # given
+    metrics.reset()
+    CountingUserRepo.reads = 0
+    principal_cache = PrincipalCache()
+    auth_service = AuthenticationService(
+        user_repository=CountingUserRepo,
+        secret_key=secret_key,
+        algorithm=algorithm,
+        principal_cache=principal_cache,
+    )
+    user_service = UserCrudService(
+        repository=UserTortoiseRepo,
+        settings_repository=UserSettingsTortoiseRepo,
+        macro_repository=MacroTortoiseRepo,
+        principal_cache=principal_cache,
+    )
+    token = await auth_service.authenticate(UserAuthInputDto(username=user_record.username, password=user_password))
+
+    # when
+    first = await auth_service.verify(token=token.api_token)
+    second = await auth_service.verify(token=token.api_token)
+    reads_before_update = CountingUserRepo.reads
+    await user_service.update(
+        id=user_record.id, input_dto=UserUpdateDto(first_name="changed"), user_id=user_record.id
+    )
+    after_update = await auth_service.verify(token=token.api_token)
+
+    # then
+    assert first.id == second.id == user_record.id
+    assert reads_before_update == 1
+    assert after_update.first_name == "changed"
+    assert CountingUserRepo.reads == 2
+    assert metrics.get("principal_cache.hits") == 1
+    assert metrics.get("principal_cache.misses") == 2
+
+
+@pytest.mark.asyncio
+async def test_auth_service_rejects_cached_principal_revoked_by_other_instance(
+    secret_key: str, algorithm: str, user_record, user_password
+):
+    # given
+    revocations = RevocationList()
+    auth_service = AuthenticationService(
+        user_repository=UserTortoiseRepo,
+        secret_key=secret_key,
+        algorithm=algorithm,
+        principal_cache=PrincipalCache(),
+        revocations=revocations,
+    )
+    token = await auth_service.authenticate(UserAuthInputDto(username=user_record.username, password=user_password))
+    cached = await auth_service.verify(token=token.api_token)
+
+    # when
+    await RevocationList().arevoke_user(user_record.id)
+    await revocations.arefresh()
+
+    # then
+    assert cached.id == user_record.id
+    with pytest.raises(InvalidToken):
+        await auth_service.verify(token=token.api_token)
+
+
+def test_principal_cache_evicts_least_recently_used_and_caps_ttl_at_token_expiry():
+    # given
+    metrics.reset()
+    principal_cache = PrincipalCache(max_entries=2)
+    users = [User.create(username=f"user{idx}", password="pswd", email=f"user{idx}@no.com") for idx in range(3)]
+    expires = time.time() + 600
+
+    # when
+    principal_cache.put("token-0", users[0], expires=expires)
+    principal_cache.put("token-1", users[1], expires=expires)
+    principal_cache.get("token-0")
+    principal_cache.put("token-2", users[2], expires=expires)
+    principal_cache.put("expired", users[2], expires=time.time() - 1)
+
+    # then
+    assert principal_cache.get("token-0").user == users[0]
+    assert principal_cache.get("token-1") is None
+    assert principal_cache.get("token-2").user == users[2]
+    assert principal_cache.get("expired") is None
+    assert len(principal_cache) == 2
+    assert metrics.get("principal_cache.evictions") == 1
+
+
+def test_principal_cache_keeps_own_copy_of_user():
+    # given
+    principal_cache = PrincipalCache()
+    user = User.create(username="copy", password="pswd", email="copy@no.com", first_name="first")
+    principal_cache.put("token", user, expires=time.time() + 600)
+
+    # when
+    user.first_name = "changed before write"
+    first = principal_cache.get("token").user
+    first.first_name = "changed by request"
+    second = principal_cache.get("token").user
+
+    # then
+    assert first is not second
+    assert second.first_name == "first"
+
+
+@pytest.mark.asyncio
+async def test_user_passwords_are_hashed_and_verified_in_worker_pool():
+    # given
+    metrics.reset()
+
+    # when
+    user = await User.acreate(username="pool", password="pswd", email="pool@no.com")
+    correct, incorrect = await asyncio.gather(user.acorrect_password("pswd"), user.acorrect_password("bad"))
+    await user.aupdate(UserUpdateDto(password="new_pswd"))
+
+    # then
+    assert (correct, incorrect) == (True, False)
+    assert user.correct_password("new_pswd")
+    assert metrics.get("password_hashing.tasks") == 4
+    assert metrics.get("password_hashing.pending") == 0
+    assert metrics.get("password_hashing.queue_seconds") >= 0
+
+
+@pytest.mark.asyncio
+async def test_auth_service_verify_loads_settings_and_macro_with_user(
+    auth_service: AuthenticationService, user_record, user_password
+):
+    # given
+    token = await auth_service.authenticate(UserAuthInputDto(username=user_record.username, password=user_password))
+    settings_service = UserSettingsService(
+        settings_repository=UserSettingsTortoiseRepo,
+        macro_repository=MacroTortoiseRepo,
+    )
+
+    # when
+    user = await auth_service.verify(token=token.api_token)
+
+    # then
+    assert settings_service.from_principal(user) == await settings_service.get_by_user_id(user_id=user_record.id)
+
+
+@pytest.mark.asyncio
+async def test_stateless_authorize_reads_claims_and_rejects_logged_out_tokens_and_deleted_users(
+    secret_key: str, algorithm: str, user_record, user_password
+):
+    # given
+    CountingUserRepo.reads = 0
+    revocations = RevocationList()
+    auth_service = AuthenticationService(
+        user_repository=CountingUserRepo,
+        secret_key=secret_key,
+        algorithm=algorithm,
+        revocations=revocations,
+        stateless=True,
+    )
+    user_service = UserCrudService(
+        repository=UserTortoiseRepo,
+        settings_repository=UserSettingsTortoiseRepo,
+        macro_repository=MacroTortoiseRepo,
+        revocations=revocations,
+    )
+    credentials = UserAuthInputDto(username=user_record.username, password=user_password)
+    logged_out = await auth_service.authenticate(credentials)
+    token = await auth_service.authenticate(credentials)
+
+    # when
+    principal = await auth_service.authorize(token.api_token)
+    await auth_service.logout(logged_out.api_token)
+    with pytest.raises(InvalidToken):
+        await auth_service.authorize(logged_out.api_token)
+    still_valid = await auth_service.authorize(token.api_token)
+    await user_service.delete(id=user_record.id, user_id=user_record.id)
+    with pytest.raises(InvalidToken):
+        await auth_service.authorize(token.api_token)
+    other_instance = RevocationList()
+    refreshed = await other_instance.arefresh()
+
+    # then
+    assert principal == still_valid == TokenPrincipal(id=user_record.id, type=TypeEnum.USER.value)
+    assert not principal.is_admin
+    assert CountingUserRepo.reads == 0
+    assert refreshed == 2
+    assert await other_instance.ais_revoked(user_record.id)
+    assert not await other_instance.ais_revoked(uuid.uuid4(), uuid.uuid4().hex)
+
+
+class UserPrivilegeUpdateDto(BaseModel):
+    type: Optional[str] = None
+    status: Optional[str] = None
+
+
+@pytest.mark.asyncio
+async def test_stateless_authorize_rejects_tokens_issued_before_user_type_change(
+    secret_key: str, algorithm: str, user_password
+):
+    # given
+    revocations = RevocationList()
+    auth_service = AuthenticationService(
+        user_repository=UserTortoiseRepo,
+        secret_key=secret_key,
+        algorithm=algorithm,
+        revocations=revocations,
+        stateless=True,
+    )
+    user_service = UserCrudService(
+        repository=UserTortoiseRepo,
+        settings_repository=UserSettingsTortoiseRepo,
+        macro_repository=MacroTortoiseRepo,
+        revocations=revocations,
+    )
+    admin = await UserTortoiseRepo.asave(
+        User.create(username="admin", password=user_password, email="admin@no.com", type=TypeEnum.ADMIN.value)
+    )
+    credentials = UserAuthInputDto(username=admin.username, password=user_password)
+    token = await auth_service.authenticate(credentials)
+    principal = await auth_service.authorize(token.api_token)
+
+    # when
+    await user_service.update(
+        id=admin.id,
+        input_dto=UserPrivilegeUpdateDto(type=TypeEnum.USER.value, status=admin.status),
+        is_admin=True,
+    )
+    new_token = await auth_service.authenticate(credentials)
+
+    # then
+    assert principal.is_admin
+    with pytest.raises(InvalidToken):
+        await auth_service.authorize(token.api_token)
+    new_principal = await auth_service.authorize(new_token.api_token)
+    assert new_principal == TokenPrincipal(id=admin.id, type=TypeEnum.USER.value)
+    assert not new_principal.is_admin
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    # given
+    bloom_filter = BloomFilter(capacity=10_000, error_rate=0.01)
+    keys = [f"token:{uuid.uuid4().hex}" for _ in range(10_000)]
+
+    # when
+    for key in keys:
+        bloom_filter.add(key)
+    false_positives = sum(f"token:{uuid.uuid4().hex}" in bloom_filter for _ in range(10_000))
+
+    # then
+    assert all(key in bloom_filter for key in keys)
+    assert false_positives < 300
+    assert bloom_filter.size_bytes < 10_000 * 1.3
+
+
+def test_token_keys_verify_tokens_signed_by_rotated_asymmetric_keys():
+    # given
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+    ed25519 = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ed25519")
+
+    def pem_pair() -> tuple[str, str]:
+        key = ed25519.Ed25519PrivateKey.generate()
+        private = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return private.decode(), public.decode()
+
+    (old_private, old_public), (new_private, _) = pem_pair(), pem_pair()
+    old_keys = TokenKeys("EdDSA", old_private, key_id="old")
+    new_keys = TokenKeys("EdDSA", new_private, key_id="new", public_keys={"old": old_public})
+    user = User.create(username="keys", password="pswd", email="keys@no.com")
+
+    # when
+    old_token = user.create_token(secret_key=old_keys.signing_key, algorithm="EdDSA", key_id="old")
+    new_token = user.create_token(secret_key=new_keys.signing_key, algorithm="EdDSA", key_id="new")
+
+    # then
+    assert new_keys.decode(old_token)["user_id"] == new_keys.decode(new_token)["user_id"] == str(user.id)
+    with pytest.raises(InvalidToken):
+        old_keys.decode(new_token)
+
+
+@pytest.mark.asyncio
+async def test_auth_service_throttles_logins_per_username_and_client_before_hashing(
+    secret_key: str, algorithm: str, user_record, user_password
+):
+    # given
+    metrics.reset()
+    store = MemoryBucketStore()
+    auth_service = AuthenticationService(
+        user_repository=UserTortoiseRepo,
+        secret_key=secret_key,
+        algorithm=algorithm,
+        user_throttle=Throttle("auth_user", rate=0.001, burst=2, store=store),
+        ip_throttle=Throttle("auth_ip", rate=0.001, burst=3, store=store),
+    )
+    wrong = UserAuthInputDto(username=user_record.username, password="wrong")
+    correct = UserAuthInputDto(username=user_record.username, password=user_password)
+
+    # when
+    for _ in range(2):
+        with pytest.raises(BadCredentials):
+            await auth_service.authenticate(wrong, client_ip="10.0.0.1")
+    with pytest.raises(TooManyRequests):
+        await auth_service.authenticate(correct, client_ip="10.0.0.2")
+    with pytest.raises(BadCredentials):
+        await auth_service.authenticate(UserAuthInputDto(username="other", password="pswd"), client_ip="10.0.0.1")
+    with pytest.raises(TooManyRequests):
+        await auth_service.authenticate(UserAuthInputDto(username="another", password="pswd"), client_ip="10.0.0.1")
+
+    # then
+    assert metrics.get("password_hashing.tasks") == 2
+    assert metrics.get("throttle.auth_user.throttled") == 1
+    assert metrics.get("throttle.auth_ip.throttled") == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_bucket_store_shares_buckets_between_workers():
+    # given
+    prefix = f"throttle-test-{uuid.uuid4().hex}:"
+    first_worker = RedisBucketStore(settings.TEST_REDIS_URL, prefix=prefix)
+    second_worker = RedisBucketStore(settings.TEST_REDIS_URL, prefix=prefix)
+
+    # when
+    taken = [await first_worker.atake("login:user", rate=0.5, burst=2) for _ in range(2)]
+    rejected = await second_worker.atake("login:user", rate=0.5, burst=2)
+    other_key = await second_worker.atake("login:other", rate=0.5, burst=2)
+    expires_in = await first_worker._client().pttl(f"{prefix}login:user")
+    await first_worker.aclose()
+    await second_worker.aclose()
+
+    # then
+    assert taken == [0.0, 0.0]
+    assert 0 < rejected <= 2
+    assert other_key == 0.0
+    assert 0 < expires_in <= 5000
@@ -61,6 +61,15 @@ class InMemorySearchRepository(ISearchRepository):
                 self._documents[i] = document
 
 
+class RankedSearchRepository(InMemorySearchRepository):
+    """
+    Search repository returning stored documents in insertion order (as search ranking), paged by offset / limit.
+    """
+
+    async def asearch(self, query: str, offset: int = 0, limit: int = 100, *args, **kwargs) -> list[Any]:
+        return self._documents[offset : offset + limit]
+
+
 @pytest.fixture
 def user_service():
     return UserCrudService(
@@ -4,6 +4,7 @@ from uuid import UUID
 import pytest
 import pytest_asyncio
 
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
 from src.modules.product.application.service.consumption import ConsumptionService, IUserSettingsService
 from src.modules.product.application.service.product import ProductCrudService
 from src.modules.product.domain.entity.consumption import DailyUserConsumption
@@ -60,6 +61,7 @@ def consumption_service(secret_key, algorithm):
         daily_product_repository=DailyUserProductTortoiseRepo,
         consumption_repository=DailyUserConsumptionTortoiseRepo,
         settings_service=FakeUserSettingsService(),
+        unit_of_work=TortoiseUnitOfWork(),
     )
 
 
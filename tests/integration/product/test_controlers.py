@@ -5,8 +5,10 @@ from http import HTTPStatus
 import pytest
 from uuid6 import uuid6
 
+from src.api.main import app
 from src.modules.product.application.dto.daily_product import DailyUserProductInputDto
 from src.modules.product.application.dto.product import ProductInputDto
+from src.modules.product.domain.entity.product import Product
 from src.modules.product.domain.enum import UserProductType
 from src.modules.product.infra.repo.postgres.consumption import (
     DailyUserConsumptionTortoiseRepo,
@@ -66,6 +68,75 @@ async def test_product_controller_get_all_products(api_client, endpoint_enum, pr
     api_client.compare_response_object_with_db(response_json[0], product_record)
 
 
+@pytest.mark.asyncio
+async def test_product_controller_get_all_products_with_cursor(api_client, endpoint_enum, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+    products = [
+        Product.create(code=code, name=f"test_api_{code}", energy_kcal_100g=22.2)
+        for code in range(3)
+    ]
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    first_page = await api_client.get(endpoint_enum.PRODUCTS.value, params={"limit": 2})
+    second_page = await api_client.get(
+        endpoint_enum.PRODUCTS.value,
+        params={"limit": 2, "cursor": first_page.headers["X-Next-Cursor"]},
+    )
+
+    # then
+    assert first_page.status_code == HTTPStatus.OK
+    assert second_page.status_code == HTTPStatus.OK
+    assert "X-Next-Cursor" not in second_page.headers
+    assert [product["id"] for product in first_page.json() + second_page.json()] == [
+        str(product.id) for product in products
+    ]
+
+
+@pytest.mark.asyncio
+async def test_product_controller_get_all_products_sparse_fields(api_client, endpoint_enum, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+    products = [
+        Product.create(code=code, name=f"test_api_{code}", energy_kcal_100g=22.2)
+        for code in range(3)
+    ]
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    response = await api_client.get(endpoint_enum.PRODUCTS.value, params={"limit": 2, "fields": "id,name"})
+
+    # then
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [{"id": str(product.id), "name": product.name} for product in products[:2]]
+    assert response.headers["X-Next-Cursor"]
+
+
+@pytest.mark.asyncio
+async def test_product_controller_get_all_products_unknown_sparse_field(api_client, endpoint_enum, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+
+    # when
+    response = await api_client.get(endpoint_enum.PRODUCTS.value, params={"fields": "id,user_id"})
+
+    # then
+    api_client.check_status_code_in_error_response(response, HTTPStatus.BAD_REQUEST)
+
+
+@pytest.mark.asyncio
+async def test_product_controller_get_all_products_invalid_cursor(api_client, endpoint_enum, user_token):
+    # given
+    api_client.set_token(user_token.api_token)
+
+    # when
+    response = await api_client.get(endpoint_enum.PRODUCTS.value, params={"cursor": "not-a-cursor"})
+
+    # then
+    api_client.check_status_code_in_error_response(response, HTTPStatus.BAD_REQUEST)
+
+
 @pytest.mark.asyncio
 async def test_product_controller_get_product_by_id(api_client, endpoint_enum, product_record, user_token):
     # given
@@ -81,6 +152,28 @@ async def test_product_controller_get_product_by_id(api_client, endpoint_enum, p
     api_client.compare_response_object_with_db(response_json, product_record)
 
 
+@pytest.mark.asyncio
+async def test_product_controller_suggest_products(api_client, endpoint_enum):
+    # given
+    first, second = uuid6(), uuid6()
+    await app.container.product.suggest_repo().aupsert_documents(
+        documents=[
+            {"id": first, "name": "Suggested granola", "brand": "Crunchy"},
+            {"id": second, "name": "Suggested grapes", "brand": None},
+        ]
+    )
+
+    # when
+    response = await api_client.get(f"{endpoint_enum.PRODUCTS.value}suggest", params={"q": "suggested gra", "limit": 5})
+
+    # then
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [
+        {"id": str(first), "name": "Suggested granola", "brand": "Crunchy"},
+        {"id": str(second), "name": "Suggested grapes", "brand": None},
+    ]
+
+
 @pytest.mark.asyncio
 async def test_consumption_controller_create_consumption(
     api_client, endpoint_enum, user_record, product_record, user_token
@@ -316,7 +409,7 @@ async def test_consumption_controller_get_day_by_datetime_dummy_user(
 
 
 @pytest.mark.asyncio
-async def test_product_create_create_index_in_search_engine(api_client, endpoint_enum, user_token):
+async def test_product_create_create_index_in_search_engine(api_client, endpoint_enum, user_token, outbox_relay):
     # given
     api_client.set_token(user_token.api_token)
 
@@ -339,6 +432,7 @@ async def test_product_create_create_index_in_search_engine(api_client, endpoint
         endpoint_enum.PRODUCTS.value,
         json_data=product_input.dict(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
     response_search_first = await api_client.get(
         endpoint_enum.PRODUCTS.value,
@@ -377,7 +471,31 @@ async def test_product_create_create_index_in_search_engine(api_client, endpoint
 
 
 @pytest.mark.asyncio
-async def test_product_create_create_and_update_index_in_search_engine(api_client, endpoint_enum, user_token):
+async def test_product_facets_are_returned_in_response_body(api_client, endpoint_enum):
+    # when
+    response = await api_client.get(
+        endpoint_enum.PRODUCTS.get_detail("facets"),
+        params={"facets": "category", "filter": "fat_100g>1"},
+    )
+    response_unknown_facet = await api_client.get(
+        endpoint_enum.PRODUCTS.get_detail("facets"),
+        params={"facets": "name"},
+    )
+    response_no_facets = await api_client.get(endpoint_enum.PRODUCTS.get_detail("facets"))
+
+    # then
+    assert response.status_code == HTTPStatus.OK
+    assert isinstance(response.json(), dict)
+    assert set(response.json()) <= {"category"}
+    assert "X-Facets" not in response.headers
+    assert response_unknown_facet.status_code == HTTPStatus.BAD_REQUEST
+    assert response_no_facets.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_product_create_create_and_update_index_in_search_engine(
+    api_client, endpoint_enum, user_token, outbox_relay
+):
     # given
     api_client.set_token(user_token.api_token)
 
@@ -415,6 +533,7 @@ async def test_product_create_create_and_update_index_in_search_engine(api_clien
         endpoint_enum.PRODUCTS.value,
         json_data=product_input_create.dict(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
     response_search_first = await api_client.get(
         endpoint_enum.PRODUCTS.value,
@@ -427,6 +546,7 @@ async def test_product_create_create_and_update_index_in_search_engine(api_clien
         endpoint_enum.PRODUCTS.get_detail(product_id),
         json_data=product_input_update.model_dump_json(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
     response_search_second = await api_client.get(
         endpoint_enum.PRODUCTS.value,
@@ -450,7 +570,7 @@ async def test_product_create_create_and_update_index_in_search_engine(api_clien
 
 
 @pytest.mark.asyncio
-async def test_product_update_create_delete_index_in_search_engine(api_client, endpoint_enum, user_token):
+async def test_product_update_create_delete_index_in_search_engine(api_client, endpoint_enum, user_token, outbox_relay):
     # given
     api_client.set_token(user_token.api_token)
 
@@ -473,6 +593,7 @@ async def test_product_update_create_delete_index_in_search_engine(api_client, e
         endpoint_enum.PRODUCTS.value,
         json_data=product_input.dict(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
     response_search_first = await api_client.get(
         endpoint_enum.PRODUCTS.value,
@@ -484,6 +605,7 @@ async def test_product_update_create_delete_index_in_search_engine(api_client, e
     response_deleted = await api_client.delete(
         endpoint_enum.PRODUCTS.get_detail(product_id),
     )
+    await outbox_relay.adrain()
     await sleep(1)
 
     response_search_second = await api_client.get(
@@ -1,8 +1,42 @@
+import asyncio
+
 import pytest
+import pytest_asyncio
+from tortoise import Tortoise
+from tortoise.connection import connections
+from tortoise.exceptions import DoesNotExist
+from uuid6 import uuid6
 
+from src.config import settings
+from src.core.domain.errors import ValidationError
+from src.core.domain.search import SearchFilter, SearchSort
+from src.core.domain.value_object import PrecisedFloat
+from src.core.infra.model import SearchOutbox
+from src.core.infra.outbox import OutboxRelay
+from src.core.infra.outbox_feed import OutboxFeed
+from src.core.infra.reindex import areindex
+from src.core.infra.repo.failover import FailoverSearchRepository
+from src.core.infra.repo.identity_map import IdentityMap
+from src.core.infra.repo.search_cache import CachedSearchRepository
+from src.core.infra.router import ReadYourWrites
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
+from src.core.utils.metrics import metrics
+from src.modules.product.application.dto.consumption import (
+    DailyUserConsumptionOutputDto,
+)
 from src.modules.product.domain.entity.consumption import DailyUserConsumption
 from src.modules.product.domain.entity.daily_product import DailyUserProduct
 from src.modules.product.domain.entity.product import Product
+from src.modules.product.domain.enum import UserProductType
+from src.modules.product.infra.repo.embedded.product import (
+    ProductEmbeddedSearchEngineRepo,
+)
+from src.modules.product.infra.repo.meilsearch.product import (
+    ProductMeiliSearchEngineRepo,
+)
+from src.modules.product.infra.repo.pgsearch.product import (
+    ProductPostgresSearchEngineRepo,
+)
 from src.modules.product.infra.repo.postgres.consumption import (
     DailyUserConsumptionTortoiseRepo,
 )
@@ -10,6 +44,8 @@ from src.modules.product.infra.repo.postgres.daily_product import (
     DailyUserProductTortoiseRepo,
 )
 from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+from src.modules.product.infra.repo.suggest.product import ProductSuggestRepo
+from tests.integration.conftest import InMemorySearchRepository
 
 
 ### PRODUCT ###
@@ -153,6 +189,180 @@ async def test_delete_product():
     assert product_get_from_db is None
 
 
+def _products(codes):
+    return [
+        Product.create(
+            code=code,
+            name="SOME_NAME",
+            quantity="SOME_QUANTITY",
+            brand="SOME_BRAND",
+            size="SOME_SIZE",
+            groups="SOME_GROUPS",
+            category="SOME_CATEGORY",
+            energy_kcal_100g=100.0,
+            fat_100g=10.0,
+            carbohydrates_100g=20.0,
+            sugars_100g=30.0,
+            proteins_100g=40.0,
+        )
+        for code in codes
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_save_products():
+    # given
+    products_to_create = _products(range(5))
+
+    # when
+    await ProductTortoiseRepo.abulk_save(entities=products_to_create, batch_size=2)
+
+    # then
+    products_get_from_db = await ProductTortoiseRepo.aget_all()
+    assert {product.id for product in products_get_from_db} == {
+        product.id for product in products_to_create
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_products():
+    # given
+    products = _products(range(5))
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    for product in products:
+        product.name = f"NEW_NAME_{product.code}"
+        product.fat_100g = PrecisedFloat(1.5)
+    products[0].brand = None
+    await ProductTortoiseRepo.abulk_update(entities=products, batch_size=2)
+
+    # then
+    products_get_from_db = await ProductTortoiseRepo.aget_all()
+    assert len(products_get_from_db) == 5
+    for product in products_get_from_db:
+        assert product.name == f"NEW_NAME_{product.code}"
+        assert product.fat_100g == 1.5
+        assert product.brand == (None if product.code == 0 else "SOME_BRAND")
+    assert all(not product.changed_fields for product in products)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_products_writes_only_changed_columns():
+    # given
+    await ProductTortoiseRepo.abulk_save(entities=_products(range(2)))
+    first_writer = await ProductTortoiseRepo.aget_all()
+    second_writer = await ProductTortoiseRepo.aget_all()
+
+    # when
+    for product in first_writer:
+        product.name = "NEW_NAME"
+    for product in second_writer:
+        product.brand = "NEW_BRAND"
+    await ProductTortoiseRepo.abulk_update(entities=first_writer)
+    await ProductTortoiseRepo.abulk_update(entities=second_writer)
+
+    # then
+    for product in await ProductTortoiseRepo.aget_all():
+        assert product.name == "NEW_NAME"
+        assert product.brand == "NEW_BRAND"
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_products_only_given_fields():
+    # given
+    products = _products(range(3))
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    for product in products:
+        product.name = "NEW_NAME"
+        product.brand = "NEW_BRAND"
+    await ProductTortoiseRepo.abulk_update(entities=products, fields=["name"])
+
+    # then
+    for product in await ProductTortoiseRepo.aget_all():
+        assert product.name == "NEW_NAME"
+        assert product.brand == "SOME_BRAND"
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_products():
+    # given
+    products = _products(range(5))
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    await ProductTortoiseRepo.abulk_delete(
+        entities=[products[0], products[1].id, *products[2:4]], batch_size=2
+    )
+
+    # then
+    products_get_from_db = await ProductTortoiseRepo.aget_all()
+    assert [product.id for product in products_get_from_db] == [products[4].id]
+
+
+@pytest.mark.asyncio
+async def test_stream_products_in_batches():
+    # given
+    products = _products(range(5))
+    await ProductTortoiseRepo.abulk_save(products)
+
+    # when
+    batches = [batch async for batch in ProductTortoiseRepo.astream(batch_size=2)]
+    filtered = [batch async for batch in ProductTortoiseRepo.astream(batch_size=2, code__gte=3)]
+
+    # then
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(str(product.id) for batch in batches for product in batch) == sorted(
+        str(product.id) for product in products
+    )
+    assert sorted(product.code for batch in filtered for product in batch) == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_get_all_products_with_fields_projection():
+    # given
+    products = _products(range(3))
+    await ProductTortoiseRepo.abulk_save(entities=products)
+
+    # when
+    products_get_from_db = await ProductTortoiseRepo.aget_all(fields=["name", "code"])
+
+    # then
+    assert [product.id for product in products_get_from_db] == [product.id for product in products]
+    for product in products_get_from_db:
+        assert product.name == "SOME_NAME"
+        assert product.created_at is not None
+        assert product.brand is None
+        assert product.energy_kcal_100g is None
+
+
+@pytest.mark.asyncio
+async def test_get_product_by_id_with_fields_projection():
+    # given
+    product = _products([1])[0]
+    await ProductTortoiseRepo.abulk_save(entities=[product])
+
+    # when
+    product_get_from_db = await ProductTortoiseRepo.aget_by_id(id=product.id, fields=["brand"])
+
+    # then
+    assert product_get_from_db.brand == "SOME_BRAND"
+    assert product_get_from_db.name is None
+    assert ProductTortoiseRepo.to_sparse(product_get_from_db, ["id", "brand"]) == {
+        "id": product.id,
+        "brand": "SOME_BRAND",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_all_products_with_unknown_field():
+    # when / then
+    with pytest.raises(ValidationError):
+        await ProductTortoiseRepo.aget_all(fields=["name", "unknown"])
+
+
 ### DAILY USER CONSUMPTION ###
 
 
@@ -184,6 +394,125 @@ async def test_create_and_get_daily_consumption(user_record):
     assert daily_consumption_get_from_db.summary_calories == 0.0
 
 
+@pytest.mark.asyncio
+async def test_get_daily_consumption_maps_floats_and_relations(consumption_with_product):
+    # given
+    consumption = consumption_with_product
+
+    # when
+    consumption_get_from_db = await DailyUserConsumptionTortoiseRepo.aget_by_id(
+        id=consumption.id, fetch_fields=["products"]
+    )
+
+    # then
+    assert isinstance(consumption_get_from_db.summary_calories, PrecisedFloat)
+    assert isinstance(consumption_get_from_db.summary_proteins, PrecisedFloat)
+    assert len(consumption_get_from_db.products) == 1
+    assert consumption_get_from_db.products[0].day_id == consumption.id
+
+
+@pytest.mark.asyncio
+async def test_get_daily_consumption_with_empty_fetch_fields_loads_entity_relations(
+    consumption_with_product,
+):
+    # when
+    consumption_get_from_db = await DailyUserConsumptionTortoiseRepo.aget_by_id(
+        id=consumption_with_product.id, fetch_fields=[]
+    )
+    consumptions = await DailyUserConsumptionTortoiseRepo.aget_all(fetch_fields=[])
+
+    # then
+    assert len(consumption_get_from_db.products) == 1
+    assert len(consumptions[0].products) == 1
+
+
+@pytest.mark.asyncio
+async def test_daily_consumption_to_dto_matches_snapshot(consumption_with_product):
+    # given
+    consumption = await DailyUserConsumptionTortoiseRepo.aget_by_id(
+        id=consumption_with_product.id, fetch_fields=["products", "products__product"]
+    )
+    macro = {"proteins": 1.0, "fats": 2.0, "carbs": 3.0, "calories": 4.0}
+
+    # when
+    dto = DailyUserConsumptionTortoiseRepo.to_dto(
+        consumption, DailyUserConsumptionOutputDto, user=macro
+    )
+
+    # then
+    assert dto == DailyUserConsumptionOutputDto(
+        user=macro,
+        **DailyUserConsumptionTortoiseRepo.convert_snapshot(consumption.snapshot),
+    )
+    assert len(dto.products) == 1
+    assert dto.products[0].product.name == "SOME_NAME"
+
+
+@pytest.mark.asyncio
+async def test_get_daily_consumption_aggregate_matches_fetched_relations(consumption_with_product):
+    # given
+    products = _products(range(3))
+    await ProductTortoiseRepo.abulk_save(entities=products)
+    await DailyUserProductTortoiseRepo.abulk_save(
+        entities=[
+            DailyUserProduct.create(product=product, day=consumption_with_product, weight_in_grams=50.0)
+            for product in products
+        ]
+    )
+    macro = {"proteins": 1.0, "fats": 2.0, "carbs": 3.0, "calories": 4.0}
+
+    # when
+    aggregate = await DailyUserConsumptionTortoiseRepo.aget_aggregate_by_id(id=consumption_with_product.id)
+
+    # then
+    fetched = await DailyUserConsumptionTortoiseRepo.aget_by_id(
+        id=consumption_with_product.id, fetch_fields=["products", "products__product"]
+    )
+    aggregate_dto = DailyUserConsumptionTortoiseRepo.to_dto(aggregate, DailyUserConsumptionOutputDto, user=macro)
+    fetched_dto = DailyUserConsumptionTortoiseRepo.to_dto(fetched, DailyUserConsumptionOutputDto, user=macro)
+    assert len(aggregate_dto.products) == 4
+    assert sorted(aggregate_dto.products, key=lambda product: product.id) == sorted(
+        fetched_dto.products, key=lambda product: product.id
+    )
+    assert aggregate_dto.model_copy(update={"products": []}) == fetched_dto.model_copy(update={"products": []})
+    assert isinstance(aggregate.summary_calories, PrecisedFloat)
+    assert aggregate.products[0].type == UserProductType.LUNCH
+
+
+@pytest.mark.asyncio
+async def test_get_daily_consumption_aggregate_without_products(consumption_record):
+    # when
+    aggregate = await DailyUserConsumptionTortoiseRepo.aget_aggregate_by_id(id=consumption_record.id)
+
+    # then
+    assert aggregate.id == consumption_record.id
+    assert list(aggregate.products) == []
+
+
+@pytest.mark.asyncio
+async def test_get_daily_consumption_aggregate_not_found():
+    # when / then
+    with pytest.raises(DoesNotExist):
+        await DailyUserConsumptionTortoiseRepo.aget_aggregate_by_id(id=uuid6())
+
+
+@pytest.mark.asyncio
+async def test_get_daily_consumptions_with_fields_projection_and_relation(consumption_with_product):
+    # when
+    days = await DailyUserConsumptionTortoiseRepo.aget_all_from_filter(
+        user_id=consumption_with_product.user_id,
+        fetch_fields=["products", "products__product"],
+        fields=["date", "products"],
+    )
+
+    # then
+    assert len(days) == 1
+    assert days[0].user_id is None
+    assert days[0].date == consumption_with_product.date
+    assert len(days[0].products) == 1
+    assert days[0].products[0].product.name == "SOME_NAME"
+
+
 @pytest.mark.asyncio
 async def test_update_daily_consumption(user_record):
     # given
@@ -225,6 +554,59 @@ async def test_delete_daily_consumption(user_record):
     assert daily_consumption_get_from_db is None
 
 
+def _summary_delta(user_id, calories):
+    delta = DailyUserConsumption.create(user_id=user_id)
+    delta.summary_calories = PrecisedFloat(calories)
+    delta.summary_proteins = PrecisedFloat(calories / 10)
+    return delta
+
+
+@pytest.mark.asyncio
+async def test_upsert_summary_creates_day(user_record):
+    # given
+    delta = _summary_delta(user_record.id, 100.0)
+
+    # when
+    day = await DailyUserConsumptionTortoiseRepo.aupsert_summary(delta)
+
+    # then
+    assert day.id == delta.id
+    assert day.date == delta.date
+    assert day.summary_calories == 100.0
+    assert day.summary_proteins == 10.0
+    assert isinstance(day.summary_calories, PrecisedFloat)
+
+
+@pytest.mark.asyncio
+async def test_upsert_summary_adds_deltas_to_existing_day(user_record):
+    # given
+    first_delta = _summary_delta(user_record.id, 100.0)
+    await DailyUserConsumptionTortoiseRepo.aupsert_summary(first_delta)
+
+    # when
+    await asyncio.gather(
+        *(
+            DailyUserConsumptionTortoiseRepo.aupsert_summary(
+                _summary_delta(user_record.id, 10.15)
+            )
+            for _ in range(5)
+        )
+    )
+    day = await DailyUserConsumptionTortoiseRepo.aupsert_summary(
+        _summary_delta(user_record.id, -50.0)
+    )
+
+    # then
+    assert day.id == first_delta.id
+    assert day.summary_calories == 100.75
+    assert day.summary_proteins == 10.1
+    assert len(
+        await DailyUserConsumptionTortoiseRepo.aget_all_from_filter(
+            user_id=user_record.id
+        )
+    ) == 1
+
+
 ### DAILY PRODUCT ###
 
 
@@ -269,3 +651,831 @@ async def test_create_and_get_daily_product(user_record):
     assert daily_product_get_from_db
     assert daily_product_get_from_db.product_id == product.id
     assert daily_product_get_from_db.day_id == daily_user_consumption.id
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_daily_product_type(consumption_with_product):
+    # given
+    daily_products = await DailyUserProductTortoiseRepo.aget_all_from_filter(
+        day_id=consumption_with_product.id
+    )
+
+    # when
+    for daily_product in daily_products:
+        daily_product.type = UserProductType.DINNER
+    await DailyUserProductTortoiseRepo.abulk_update(
+        entities=daily_products, fields=["type"]
+    )
+
+    # then
+    daily_product_get_from_db = await DailyUserProductTortoiseRepo.aget_by_id(
+        id=daily_products[0].id
+    )
+    assert daily_product_get_from_db.type == UserProductType.DINNER
+
+
+### UNIT OF WORK ###
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_commits_pending_writes_on_exit():
+    # given
+    products = _products(range(3))
+
+    # when
+    async with TortoiseUnitOfWork() as uow:
+        for product in products:
+            uow.save(ProductTortoiseRepo, product)
+        products[0].name = "NEW_NAME"
+        uow.update(ProductTortoiseRepo, products[0])
+        uow.delete(ProductTortoiseRepo, products[2])
+
+    # then
+    products_get_from_db = await ProductTortoiseRepo.aget_all()
+    assert [product.id for product in products_get_from_db] == [
+        products[0].id,
+        products[1].id,
+    ]
+    assert products_get_from_db[0].name == "NEW_NAME"
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_rollbacks_on_error():
+    # given
+    products = _products(range(2))
+
+    # when
+    with pytest.raises(ValueError):
+        async with TortoiseUnitOfWork() as uow:
+            uow.save(ProductTortoiseRepo, products[0])
+            await uow.flush()
+            uow.save(ProductTortoiseRepo, products[1])
+            raise ValueError
+
+    # then
+    assert await ProductTortoiseRepo.aget_all() == []
+
+
+### IDENTITY MAP ###
+
+
+@pytest.mark.asyncio
+async def test_identity_map_reads_entity_once_until_written():
+    # given
+    product = _products([1])[0]
+    await ProductTortoiseRepo.abulk_save(entities=[product])
+    hits, misses = metrics.get("identity_map.hits"), metrics.get("identity_map.misses")
+
+    with IdentityMap.scope():
+        # when
+        first = await ProductTortoiseRepo.aget_by_id(id=product.id)
+        second = await ProductTortoiseRepo.aget_by_id(id=str(product.id))
+        second.name = "NEW_NAME"
+        await ProductTortoiseRepo.aupdate(entity=second)
+        fresh = await ProductTortoiseRepo.aget_by_id(id=product.id)
+
+    # then
+    assert first is second
+    assert fresh is not first
+    assert fresh.name == "NEW_NAME"
+    assert metrics.get("identity_map.hits") - hits == 1
+    assert metrics.get("identity_map.misses") - misses == 2
+
+
+@pytest.mark.asyncio
+async def test_identity_map_drops_entities_with_relations_on_related_write(consumption_with_product, product_record):
+    with IdentityMap.scope() as identity_map:
+        # given
+        day = await DailyUserConsumptionTortoiseRepo.aget_by_id(
+            id=consumption_with_product.id, fetch_fields=["products"]
+        )
+        assert len(day.products) == 1
+        assert (
+            identity_map.get(DailyUserConsumptionTortoiseRepo.model, day.id, ["products", "products__product"])
+            is None
+        )
+
+        # when
+        await DailyUserProductTortoiseRepo.abulk_save(
+            entities=[DailyUserProduct.create(product=product_record, day=day, weight_in_grams=50.0)]
+        )
+
+        # then
+        assert len(identity_map) == 0
+        fresh_day = await DailyUserConsumptionTortoiseRepo.aget_by_id(id=day.id, fetch_fields=["products"])
+        assert len(fresh_day.products) == 2
+
+
+@pytest.mark.asyncio
+async def test_identity_map_is_cleared_on_unit_of_work_rollback():
+    # given
+    product = _products([1])[0]
+
+    with IdentityMap.scope() as identity_map:
+        # when
+        with pytest.raises(ValueError):
+            async with TortoiseUnitOfWork() as uow:
+                uow.save(ProductTortoiseRepo, product)
+                await uow.flush()
+                await ProductTortoiseRepo.aget_by_id(id=product.id)
+                raise ValueError
+
+        # then
+        assert len(identity_map) == 0
+
+
+@pytest.mark.asyncio
+async def test_identity_map_is_off_outside_of_scope():
+    # given
+    product = _products([1])[0]
+    await ProductTortoiseRepo.abulk_save(entities=[product])
+
+    # when
+    first = await ProductTortoiseRepo.aget_by_id(id=product.id)
+    second = await ProductTortoiseRepo.aget_by_id(id=product.id)
+
+    # then
+    assert IdentityMap.current() is None
+    assert first is not second
+
+
+### READ REPLICAS ###
+
+
+@pytest_asyncio.fixture(scope="function")
+async def replica_db():
+    # one test database aliased twice as replica
+    replica_urls = settings.TEST_DATABASE_REPLICA_URLS
+    settings.TEST_DATABASE_REPLICA_URLS = f"{settings.TEST_DATABASE_URL},{settings.TEST_DATABASE_URL}"
+    try:
+        await Tortoise.init(config=settings.TORTOISE_TEST_CONFIG)
+        yield
+    finally:
+        settings.TEST_DATABASE_REPLICA_URLS = replica_urls
+
+
+@pytest.mark.asyncio
+async def test_reads_are_routed_to_replicas_round_robin(replica_db):
+    # given
+    product = _products([1])[0]
+    await ProductTortoiseRepo.abulk_save(entities=[product])
+    model = ProductTortoiseRepo.model
+
+    # when
+    chosen = [model._choose_db() for _ in range(4)]
+
+    # then
+    replicas = [connections.get("replica_0"), connections.get("replica_1")]
+    assert chosen == replicas * 2
+    assert model._choose_db(for_write=True) is connections.get("default")
+    assert [product.id for product in await ProductTortoiseRepo.aget_all()] == [product.id]
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_primary_after_write_in_request(replica_db):
+    # given
+    product = _products([1])[0]
+    model = ProductTortoiseRepo.model
+
+    with ReadYourWrites.scope():
+        assert model._choose_db() is not connections.get("default")
+
+        # when
+        await ProductTortoiseRepo.abulk_save(entities=[product])
+
+        # then
+        assert model._choose_db() is connections.get("default")
+        assert (await ProductTortoiseRepo.aget_by_id(id=product.id)).id == product.id
+
+
+@pytest.mark.asyncio
+async def test_reads_in_transaction_use_primary(replica_db):
+    # given
+    product = _products([1])[0]
+    model = ProductTortoiseRepo.model
+
+    # when
+    async with TortoiseUnitOfWork() as uow:
+        uow.save(ProductTortoiseRepo, product)
+        await uow.flush()
+        chosen, transaction = model._choose_db(), connections.get("default")
+        product_get_from_db = await ProductTortoiseRepo.aget_by_id(id=product.id)
+
+    # then
+    assert chosen is transaction
+    assert product_get_from_db.id == product.id
+
+
+### SEARCH ENGINE ###
+
+
+@pytest.mark.asyncio
+async def test_meilisearch_repo_reuses_client_and_index_handle():
+    # given
+    search_repo = ProductMeiliSearchEngineRepo(
+        meilisearch_url=settings.MEILISEARCH_URL,
+        meilisearch_master_key=settings.MEILISEARCH_MASTER_KEY,
+    )
+    calls = []
+
+    async def get_or_create_index(uid, primary_key):
+        calls.append(uid)
+        return search_repo.client.index(uid)
+
+    search_repo.client.get_or_create_index = get_or_create_index
+
+    # when
+    first_index = await search_repo.aget_create_index()
+    second_index = await search_repo.aget_create_index()
+    client = search_repo.client
+    await search_repo.aclose()
+
+    # then
+    assert first_index is second_index
+    assert calls == [ProductMeiliSearchEngineRepo.INDEX]
+    assert search_repo.client is not client
+    await search_repo.aclose()
+
+
+### SEARCH OUTBOX ###
+
+
+class RecordingSearchRepository(InMemorySearchRepository):
+    def __init__(self, fail_times: int = 0):
+        super().__init__()
+        self.calls = []
+        self._fail_times = fail_times
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        if self._fail_times:
+            self._fail_times -= 1
+            raise ConnectionError("search engine is down")
+        self.calls.append(("upsert", [document["id"] for document in documents]))
+        await super().aupsert_documents(documents)
+
+    async def adelete_documents(self, document_ids: list, *args, **kwargs) -> None:
+        self.calls.append(("delete", list(document_ids)))
+        await super().adelete_documents(document_ids)
+
+
+@pytest.fixture
+def product_search_repo():
+    search_repo = RecordingSearchRepository()
+    search_repo.INDEX = ProductTortoiseRepo.SEARCH_INDEX
+    return search_repo
+
+
+@pytest.mark.asyncio
+async def test_product_writes_are_recorded_in_search_outbox():
+    # given
+    first, second = _products([1, 2])
+
+    # when
+    await ProductTortoiseRepo.abulk_save([first, second])
+    first.name = "CHANGED"
+    await ProductTortoiseRepo.aupdate(first)
+    await ProductTortoiseRepo.adelete(second)
+
+    # then
+    rows = await SearchOutbox.all().order_by("id")
+    assert [(row.index, row.document_id) for row in rows] == [
+        (ProductTortoiseRepo.SEARCH_INDEX, first.id),
+        (ProductTortoiseRepo.SEARCH_INDEX, second.id),
+        (ProductTortoiseRepo.SEARCH_INDEX, first.id),
+        (ProductTortoiseRepo.SEARCH_INDEX, second.id),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_outbox_is_rolled_back_with_the_write():
+    # given
+    product = _products([1])[0]
+
+    # when
+    with pytest.raises(RuntimeError):
+        async with TortoiseUnitOfWork() as uow:
+            uow.save(ProductTortoiseRepo, product)
+            await uow.flush()
+            raise RuntimeError("rollback")
+
+    # then
+    assert await SearchOutbox.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_outbox_relay_drains_current_state_into_search_repo(product_search_repo):
+    # given
+    first, second = _products([1, 2])
+    await ProductTortoiseRepo.abulk_save([first, second])
+    first.name = "CHANGED"
+    await ProductTortoiseRepo.aupdate(first)
+    await ProductTortoiseRepo.adelete(second)
+    relay = OutboxRelay([ProductTortoiseRepo], [product_search_repo])
+
+    # when
+    relayed = await relay.adrain()
+
+    # then
+    assert relayed == 4
+    assert product_search_repo.calls == [("upsert", [str(first.id)]), ("delete", [second.id])]
+    assert [document["name"] for document in product_search_repo._documents] == ["CHANGED"]
+    assert "products" not in product_search_repo._documents[0]
+    assert await SearchOutbox.filter(relayed_at__isnull=True).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_outbox_relay_keeps_rows_when_search_engine_fails():
+    # given
+    search_repo = RecordingSearchRepository(fail_times=1)
+    search_repo.INDEX = ProductTortoiseRepo.SEARCH_INDEX
+    product = _products([1])[0]
+    await ProductTortoiseRepo.asave(product)
+    relay = OutboxRelay([ProductTortoiseRepo], [search_repo])
+
+    # when
+    with pytest.raises(ConnectionError):
+        await relay.adrain()
+    rows_after_failure = await SearchOutbox.filter(relayed_at__isnull=True).count()
+    relayed = await relay.adrain()
+
+    # then
+    assert rows_after_failure == 1
+    assert relayed == 1
+    assert search_repo.calls == [("upsert", [str(product.id)])]
+
+
+@pytest.mark.asyncio
+async def test_outbox_relay_measures_backlog_depth(product_search_repo):
+    # given
+    await ProductTortoiseRepo.abulk_save(_products([1, 2, 3]))
+    relay = OutboxRelay([ProductTortoiseRepo], [product_search_repo], batch_size=2)
+
+    # when
+    before = await relay.adepth()
+    await relay.arelay_batch()
+    after_batch = await relay.adepth()
+    await relay.adrain()
+    drained = await relay.adepth()
+
+    # then
+    assert (before, after_batch, drained) == (3, 1, 0)
+    assert metrics.get("outbox.depth") == 0
+
+
+class GatedSearchRepository(RecordingSearchRepository):
+    """
+    Search repository whose upserts wait until the gate is opened.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entered = asyncio.Event()
+        self.gate = asyncio.Event()
+
+    async def aupsert_documents(self, documents: list[dict], *args, **kwargs) -> None:
+        self.entered.set()
+        await self.gate.wait()
+        await super().aupsert_documents(documents)
+
+
+@pytest.mark.asyncio
+async def test_outbox_relays_send_one_document_one_at_a_time():
+    # given
+    slow_repo, other_repo = GatedSearchRepository(), RecordingSearchRepository()
+    slow_repo.INDEX = other_repo.INDEX = ProductTortoiseRepo.SEARCH_INDEX
+    product = _products([1])[0]
+    await ProductTortoiseRepo.asave(product)
+    slow_relay = OutboxRelay([ProductTortoiseRepo], [slow_repo])
+    other_relay = OutboxRelay([ProductTortoiseRepo], [other_repo])
+
+    # when
+    slow_batch = asyncio.ensure_future(slow_relay.arelay_batch())
+    await slow_repo.entered.wait()
+    leased = await SearchOutbox.filter(claimed_until__isnull=False).count()
+    product.name = "CHANGED"
+    await ProductTortoiseRepo.aupdate(product)
+    relayed_while_leased = await other_relay.arelay_batch()
+    slow_repo.gate.set()
+    slow_relayed = await slow_batch
+    relayed_after = await other_relay.arelay_batch()
+
+    # then
+    assert leased == 1
+    assert (relayed_while_leased, slow_relayed, relayed_after) == (0, 1, 1)
+    assert other_repo.calls == [("upsert", [str(product.id)])]
+    assert [document["name"] for document in other_repo._documents] == ["CHANGED"]
+    assert await SearchOutbox.filter(relayed_at__isnull=True).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_outbox_relay_prunes_rows_after_retention(product_search_repo):
+    # given
+    await ProductTortoiseRepo.abulk_save(_products([1, 2]))
+    kept = OutboxRelay([ProductTortoiseRepo], [product_search_repo])
+    expired = OutboxRelay([ProductTortoiseRepo], [product_search_repo], retention=0)
+    await kept.adrain()
+
+    # when
+    pruned_in_retention = await kept.aprune()
+    pruned_after_retention = await expired.aprune()
+
+    # then
+    assert (pruned_in_retention, pruned_after_retention) == (0, 2)
+    assert await SearchOutbox.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_outbox_feeds_of_every_process_follow_relayed_changes(product_search_repo):
+    # given
+    first, second = _products([1, 2])
+    first.name, second.name = "Butter", "Milk"
+    await ProductTortoiseRepo.abulk_save([first, second])
+    suggest_repos = [ProductSuggestRepo(), ProductSuggestRepo()]
+    feeds = [OutboxFeed([ProductTortoiseRepo], [suggest_repo]) for suggest_repo in suggest_repos]
+    for feed in feeds:
+        await feed.arebuild()
+    relay = OutboxRelay([ProductTortoiseRepo], [product_search_repo])
+
+    # when
+    first.name = "Peanut butter"
+    await ProductTortoiseRepo.aupdate(first)
+    await ProductTortoiseRepo.adelete(second)
+    third = _products([3])[0]
+    third.name = "Peanuts"
+    await ProductTortoiseRepo.asave(third)
+    await relay.adrain()
+    followed = [await feed.afollow() for feed in feeds]
+
+    # then
+    assert all(count >= 3 for count in followed)
+    for feed, suggest_repo in zip(feeds, suggest_repos):
+        assert {document["name"] for document in await suggest_repo.asearch("peanut")} == {
+            "Peanut butter",
+            "Peanuts",
+        }
+        assert await suggest_repo.asearch("milk") == []
+        assert await feed.afollow() == 0
+
+
+### POSTGRES SEARCH FALLBACK ###
+
+
+@pytest_asyncio.fixture
+async def product_search_vector():
+    await connections.get("default").execute_script(ProductPostgresSearchEngineRepo.vector_column_sql())
+
+
+@pytest.mark.asyncio
+async def test_postgres_search_matches_prefixes_and_substrings(product_search_vector):
+    # given
+    first, second, third = _products([1, 2, 3])
+    first.name, second.name, third.name = "Peanut butter", "Butter", "Milk"
+    second.category = "Peanuts"
+    await ProductTortoiseRepo.abulk_save([first, second, third])
+    search_repo = ProductPostgresSearchEngineRepo()
+
+    # when
+    prefix = await search_repo.asearch("pean butt")
+    substring = await search_repo.asearch("ilk")
+    nothing = await search_repo.asearch("%")
+
+    # then
+    assert [row["id"] for row in prefix] == [first.id, second.id]
+    assert [row["id"] for row in substring] == [third.id]
+    assert nothing == []
+
+
+@pytest.mark.asyncio
+async def test_postgres_search_filters_sorts_and_counts_facets(product_search_vector):
+    # given
+    first, second, third = _products([1, 2, 3])
+    first.name, second.name, third.name = "Peanut butter", "Butter", "Milk"
+    first.fat_100g, second.fat_100g, third.fat_100g = 50.0, 80.0, 3.0
+    third.category = "drinks"
+    await ProductTortoiseRepo.abulk_save([first, second, third])
+    search_repo = ProductPostgresSearchEngineRepo()
+    fields = ProductMeiliSearchEngineRepo.FILTERABLE_FIELDS
+
+    # when
+    fat = await search_repo.asearch(
+        "", filters=[SearchFilter.parse("fat_100g>=10", fields)], sort=[SearchSort("fat_100g", descending=True)]
+    )
+    butter_category = await search_repo.asearch(
+        "butter", filters=[SearchFilter.parse("category='some_category'", fields)]
+    )
+    facets = await search_repo.afacets("", ["category"], filters=[SearchFilter.parse("fat_100g<60", fields)])
+
+    # then
+    assert [row["id"] for row in fat] == [second.id, first.id]
+    assert [row["id"] for row in butter_category] == [first.id, second.id]
+    assert facets == {"category": {"SOME_CATEGORY": 1, "drinks": 1}}
+
+
+@pytest.mark.asyncio
+async def test_failover_search_repo_uses_fallback_while_primary_is_down():
+    # given
+    class DownSearchRepository(InMemorySearchRepository):
+        searches = 0
+
+        async def asearch(self, *args, **kwargs):
+            self.searches += 1
+            raise ConnectionError("search engine is down")
+
+    primary, fallback = DownSearchRepository(), InMemorySearchRepository()
+    primary.INDEX = "failover-index"
+    await fallback.acreate_document(document={"id": "found"})
+    search_repo = FailoverSearchRepository(primary, fallback, retry_after=60)
+
+    # when
+    results = [list(await search_repo.asearch("found")) for _ in range(3)]
+
+    # then
+    assert results == [[{"id": "found"}]] * 3
+    assert primary.searches == 1
+    assert metrics.get("search.failover-index.failovers") == 1
+    assert metrics.get("search.failover-index.fallback_searches") == 3
+
+
+### EMBEDDED SEARCH ENGINE ###
+
+
+@pytest.mark.asyncio
+async def test_embedded_search_ranks_prefix_matches():
+    # given
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    await search_repo.aupsert_documents(
+        documents=[
+            {"id": "1", "name": "Peanut butter", "brand": "Nuts", "category": "spreads"},
+            {"id": "2", "name": "Butter", "brand": "Dairy", "category": "butter"},
+            {"id": "3", "name": "Milk", "brand": "Dairy", "category": "drinks"},
+        ]
+    )
+
+    # when
+    butter = await search_repo.asearch("butt")
+    dairy_butter = await search_repo.asearch("dairy butter", fields_to_get=["id", "brand"])
+    by_category = await search_repo.asearch("butter", search_fields=["category"])
+    paged = await search_repo.asearch("dairy", offset=1, limit=1)
+
+    # then
+    assert butter == [{"id": "2"}, {"id": "1"}]
+    assert dairy_butter == [{"id": "2", "brand": "Dairy"}]
+    assert by_category == [{"id": "2"}]
+    assert len(paged) == 1
+    assert await search_repo.asearch("cheese") == []
+
+
+@pytest.mark.asyncio
+async def test_embedded_search_replaces_and_deletes_documents():
+    # given
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    first, second = uuid6(), uuid6()
+    await search_repo.aupsert_documents(
+        documents=[{"id": first, "name": "Peanut butter"}, {"id": second, "name": "Butter"}]
+    )
+
+    # when
+    await search_repo.aupdate_document(document_id=first, document={"id": first, "name": "Jam"})
+    await search_repo.adelete_documents(document_ids=[second.hex])
+
+    # then
+    assert len(search_repo) == 1
+    assert await search_repo.asearch("butter") == []
+    assert await search_repo.asearch("jam") == [{"id": first}]
+
+
+@pytest.mark.asyncio
+async def test_embedded_search_filters_sorts_and_counts_facets():
+    # given
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    await search_repo.aupsert_documents(
+        documents=[
+            {"id": "1", "name": "Peanut butter", "category": "spreads", "fat_100g": 50.0},
+            {"id": "2", "name": "Butter", "category": "butter", "fat_100g": 80.0},
+            {"id": "3", "name": "Milk", "category": "drinks", "fat_100g": 3.2},
+            {"id": "4", "name": "Water", "category": "drinks", "fat_100g": None},
+        ]
+    )
+    fields = ProductMeiliSearchEngineRepo.FILTERABLE_FIELDS
+
+    # when
+    lean = await search_repo.asearch("", filters=[SearchFilter.parse("fat_100g < 10", fields)])
+    drinks = await search_repo.asearch("", filters=[SearchFilter.parse("category=Drinks", fields)])
+    by_fat = await search_repo.asearch("", sort=[SearchSort.parse("fat_100g:desc", fields)], limit=3)
+    butter = await search_repo.asearch("butter", filters=[SearchFilter.parse("category!=butter", fields)])
+    facets = await search_repo.afacets("", ["category"], filters=[SearchFilter.parse("fat_100g<60", fields)])
+
+    # then
+    assert lean == [{"id": "3"}]
+    assert sorted(hit["id"] for hit in drinks) == ["3", "4"]
+    assert by_fat == [{"id": "2"}, {"id": "1"}, {"id": "3"}]
+    assert butter == [{"id": "1"}]
+    assert facets == {"category": {"spreads": 1, "drinks": 1}}
+
+
+@pytest.mark.asyncio
+async def test_embedded_search_stores_projected_fields_and_compacts_removed_documents():
+    # given
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    await search_repo.aupsert_documents(
+        documents=[{"id": str(idx), "name": f"Milk {idx}", "category": "drinks", "code": idx} for idx in range(2000)]
+    )
+
+    # when
+    await search_repo.adelete_documents(document_ids=[str(idx) for idx in range(1500)])
+    await search_repo.aupsert_documents(documents=[{"id": "1999", "name": "Cocoa", "category": "drinks"}])
+    hits = await search_repo.asearch("milk 1998", fields_to_get=["*"])
+
+    # then
+    assert len(search_repo) == 500
+    # compacted 500 documents and the updated one
+    assert len(search_repo._documents) == 501
+    assert len(search_repo._postings["name"]["milk"][0]) == 500
+    assert "1499" not in search_repo._postings["name"]
+    assert [hit["id"] for hit in hits] == ["1998"]
+    assert hits[0]["category"] == "drinks"
+    assert "code" not in hits[0]
+    assert await search_repo.asearch("cocoa") == [{"id": "1999"}]
+
+
+def test_search_filter_and_sort_parse_only_allowed_fields():
+    # given
+    fields = ["category", "fat_100g"]
+
+    # when
+    search_filter = SearchFilter.parse(' category != "dairy" ', fields)
+    sort = SearchSort.parse("fat_100g:desc", fields)
+
+    # then
+    assert search_filter == SearchFilter(field="category", operator="!=", value="dairy")
+    assert sort == SearchSort(field="fat_100g", descending=True)
+    for expression in ("name=milk", "category", "fat_100g>"):
+        with pytest.raises(ValidationError):
+            SearchFilter.parse(expression, fields)
+    for expression in ("name:asc", "fat_100g:up"):
+        with pytest.raises(ValidationError):
+            SearchSort.parse(expression, fields)
+
+
+### SEARCH RESULT CACHE ###
+
+
+class CountingSearchRepository(InMemorySearchRepository):
+    INDEX = "cached-index"
+
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+
+    async def asearch(self, query: str, *args, **kwargs):
+        self.searches += 1
+        return list(await super().asearch(query, *args, **kwargs))
+
+
+@pytest.mark.asyncio
+async def test_search_cache_hits_until_index_is_written():
+    # given
+    metrics.reset()
+    search_repo = CountingSearchRepository()
+    await search_repo.acreate_document(document={"id": "milk-1"})
+    cache = CachedSearchRepository(search_repo)
+
+    # when
+    first = await cache.asearch("milk")
+    second = await cache.asearch("milk")
+    other_page = await cache.asearch("milk", offset=0, limit=10)
+    await cache.acreate_document(document={"id": "milk-2"})
+    after_write = await cache.asearch("milk")
+
+    # then
+    assert first == second == other_page == [{"id": "milk-1"}]
+    assert after_write == [{"id": "milk-1"}, {"id": "milk-2"}]
+    assert search_repo.searches == 3
+    assert metrics.get("search_cache.cached-index.hits") == 1
+    assert metrics.get("search_cache.cached-index.misses") == 3
+    assert metrics.get("search_cache.cached-index.hit_ratio") == 0.25
+
+
+@pytest.mark.asyncio
+async def test_search_cache_evicts_least_recently_used_and_expired_results():
+    # given
+    search_repo = CountingSearchRepository()
+    for id in ("bread", "milk", "eggs"):
+        await search_repo.acreate_document(document={"id": id})
+    # one result is 17 bytes of json
+    cache = CachedSearchRepository(search_repo, max_bytes=40)
+    expired = CachedSearchRepository(search_repo, ttl=0)
+
+    # when
+    await cache.asearch("bread")
+    await cache.asearch("milk")
+    await cache.asearch("bread")
+    await cache.asearch("eggs")
+    searches = search_repo.searches
+    await cache.asearch("bread")
+    await cache.asearch("milk")
+    await expired.asearch("eggs")
+    await expired.asearch("eggs")
+
+    # then
+    assert searches == 3
+    assert search_repo.searches == 6
+    assert len(cache) == 2
+    assert len(expired) == 0
+
+
+class WrittenDuringRebuildRepo(ProductEmbeddedSearchEngineRepo):
+    """
+    Embedded search engine whose rebuild runs `write` after the table was streamed, before the index is swapped.
+    """
+
+    write = None
+
+    async def areindex(self, batches, concurrency: int = 1) -> int:
+        async def streamed():
+            async for batch in batches:
+                yield batch
+            await self.write()
+
+        return await super().areindex(streamed(), concurrency)
+
+
+@pytest.mark.asyncio
+async def test_reindex_replays_updates_and_deletes_written_during_rebuild():
+    # given
+    first, second = _products([1, 2])
+    first.name, second.name = "Butter", "Milk"
+    await ProductTortoiseRepo.abulk_save([first, second])
+    search_repo = WrittenDuringRebuildRepo()
+
+    async def write():
+        first.name = "Cocoa"
+        await ProductTortoiseRepo.aupdate(first)
+        await ProductTortoiseRepo.adelete(second)
+
+    search_repo.write = write
+
+    # when
+    report = await areindex(ProductTortoiseRepo, search_repo)
+
+    # then
+    assert report.documents == 2
+    assert len(search_repo) == 1
+    assert await search_repo.asearch("cocoa") == [{"id": str(first.id)}]
+    assert await search_repo.asearch("butter") == []
+    assert await search_repo.asearch("milk") == []
+
+
+### TYPEAHEAD SUGGESTIONS ###
+
+
+@pytest.mark.asyncio
+async def test_suggest_rebuild_ranks_prefix_matches_by_popularity(consumption_with_product, product_record):
+    # given
+    other, milk = _products([1, 2])
+    other.name, other.brand = "SOME_OTHER_NAME", None
+    milk.name = "Milk"
+    await ProductTortoiseRepo.abulk_save([other, milk])
+    suggest_repo = ProductSuggestRepo()
+
+    # when
+    report = await areindex(ProductTortoiseRepo, suggest_repo)
+    by_prefix = await suggest_repo.asearch("some_")
+    by_name = await suggest_repo.asearch("some_oth")
+
+    # then
+    assert report.documents == 3
+    assert str(by_prefix[0]["id"]) == str(product_record.id)
+    assert {str(document["id"]) for document in by_prefix[1:]} == {str(other.id), str(milk.id)}
+    assert by_name == [{"id": str(other.id), "name": "SOME_OTHER_NAME", "brand": None}]
+
+
+@pytest.mark.asyncio
+async def test_suggest_follows_document_writes():
+    # given
+    suggest_repo = ProductSuggestRepo()
+    suggest_repo.MERGE_THRESHOLD = 2
+    await suggest_repo.aupsert_documents(
+        documents=[
+            {"id": "1", "name": "Peanut butter", "brand": "Nuts"},
+            {"id": "2", "name": "Butter", "brand": "Dairy"},
+        ]
+    )
+    cached = await suggest_repo.asearch("but")
+
+    # when
+    await suggest_repo.aupsert_documents(
+        documents=[
+            {"id": "3", "name": "Buttermilk", "brand": "Dairy"},
+            {"id": "1", "name": "Peanuts", "brand": "Nuts"},
+        ]
+    )
+    await suggest_repo.adelete_documents(document_ids=["2"])
+
+    # then
+    assert [document["id"] for document in cached] == ["1", "2"]
+    assert [document["id"] for document in await suggest_repo.asearch("but")] == ["3"]
+    assert [document["id"] for document in await suggest_repo.asearch("peanut")] == ["1"]
+    assert await suggest_repo.asearch("peanut butter") == []
+    assert await suggest_repo.asearch("dairy", limit=1) == [{"id": "3", "name": "Buttermilk", "brand": "Dairy"}]
+    assert len(suggest_repo) == 2
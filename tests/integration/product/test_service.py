@@ -1,10 +1,18 @@
+import json
 from datetime import datetime, date, timedelta
+from types import SimpleNamespace
 
 import pytest
 from uuid6 import uuid6
 
 from src.modules.product.application.dto.daily_product import DailyUserProductInputDto
-from src.modules.product.application.dto.product import ProductInputDto
+from src.core.domain.errors import ValidationError
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
+from src.core.utils.encoder import CustomJsonEncoder
+from src.modules.product.application.dto.product import ProductInputDto, ProductOutputDto
+from src.modules.product.application.service.consumption import ConsumptionService
+from src.modules.product.application.service.product import ProductCrudService
+from src.modules.product.domain.entity.product import Product
 from src.modules.product.domain.enum import UserProductType
 from src.modules.product.domain.errors import (
     ProductNotFound,
@@ -16,6 +24,10 @@ from src.modules.product.infra.repo.postgres.consumption import (
 from src.modules.product.infra.repo.postgres.daily_product import (
     DailyUserProductTortoiseRepo,
 )
+from src.modules.product.infra.repo.embedded.product import ProductEmbeddedSearchEngineRepo
+from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+from tests.integration.conftest import RankedSearchRepository
+from tests.integration.product.conftest import FakeUserSettingsService
 
 
 @pytest.mark.asyncio
@@ -131,6 +143,32 @@ async def test_get_all_user_days(user_record, consumption_with_product, consumpt
     assert days[0].date.year == consumption_with_product.date.year
 
 
+@pytest.mark.asyncio
+async def test_get_all_user_days_takes_macro_from_principal(user_record, consumption_with_product):
+    # given
+    class PrincipalSettingsService(FakeUserSettingsService):
+        async def get_by_user_id(self, user_id):
+            raise AssertionError("settings are queried again")
+
+        def from_principal(self, user):
+            return user.settings
+
+    consumption_service = ConsumptionService(
+        product_repository=ProductTortoiseRepo,
+        daily_product_repository=DailyUserProductTortoiseRepo,
+        consumption_repository=DailyUserConsumptionTortoiseRepo,
+        settings_service=PrincipalSettingsService(),
+        unit_of_work=TortoiseUnitOfWork(),
+    )
+    principal = SimpleNamespace(id=user_record.id, settings=await FakeUserSettingsService().get_by_user_id(None))
+
+    # when
+    days = await consumption_service.get_all_user_days(user_id=user_record.id, principal=principal)
+
+    # then
+    assert [day.id for day in days] == [consumption_with_product.id]
+
+
 @pytest.mark.asyncio
 async def test_get_all_user_days_dummy_user(consumption_service):
     # given
@@ -216,6 +254,29 @@ async def test_get_all_products(product_record, product_service):
     assert products[0].energy_kcal_100g == product_record.energy_kcal_100g
 
 
+@pytest.mark.asyncio
+async def test_get_products_page(product_record, product_service):
+    # when
+    first_page = await product_service.get_page(limit=1)
+    second_page = await product_service.get_page(limit=1, cursor=first_page.next_cursor)
+
+    # then
+    assert [product.id for product in first_page.items] == [product_record.id]
+    assert first_page.next_cursor is not None
+    assert second_page.items == []
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_days_page(user_record, consumption_with_product, consumption_service):
+    # when
+    page = await consumption_service.get_user_days_page(user_id=user_record.id, limit=10)
+
+    # then
+    assert [day.id for day in page.items] == [consumption_with_product.id]
+    assert page.next_cursor is None
+
+
 @pytest.mark.asyncio
 async def test_get_product_by_id(product_record, product_service):
     # when
@@ -306,3 +367,106 @@ async def test_delete_product(product_record, product_service):
     # then
     with pytest.raises(ProductNotFound):
         await product_service.get_by_id(id=product_record.id)
+
+
+def _search_document(product: Product, full: bool = False) -> dict:
+    # documents come back from search engine serialized with `CustomJsonEncoder`
+    return json.loads(json.dumps(ProductTortoiseRepo.to_search_document(product, full=full), cls=CustomJsonEncoder))
+
+
+@pytest.mark.asyncio
+async def test_search_products_in_search_ranking_order():
+    # given
+    products = [Product.create(code=code, name=f"NAME_{code}", energy_kcal_100g=1.0) for code in range(4)]
+    await ProductTortoiseRepo.abulk_save(products)
+    search_repo = RankedSearchRepository()
+    for product in (products[3], products[0], products[2], products[1]):
+        await search_repo.acreate_document(_search_document(product))
+    product_service = ProductCrudService(repository=ProductTortoiseRepo, search_repo=search_repo)
+
+    # when
+    result = await product_service.get_all(skip=1, limit=2, query="NAME")
+
+    # then
+    assert [product.id for product in result] == [products[0].id, products[2].id]
+
+
+@pytest.mark.asyncio
+async def test_search_served_products_are_built_from_search_documents():
+    # given
+    products = [Product.create(code=code, name=f"NAME_{code}", energy_kcal_100g=1.0) for code in range(2)]
+    search_repo = RankedSearchRepository()
+    for product in reversed(products):
+        await search_repo.acreate_document(_search_document(product, full=True))
+    product_service = ProductCrudService(repository=ProductTortoiseRepo, search_repo=search_repo, search_served=True)
+
+    # when
+    result = await product_service.get_all(skip=0, limit=10, query="NAME")
+    sparse = await product_service.get_all(skip=0, limit=10, query="NAME", fields=["id", "name"])
+
+    # then
+    # products are not in db - output comes from search documents only
+    assert result == [ProductTortoiseRepo.to_dto(product, ProductOutputDto) for product in reversed(products)]
+    assert sparse == [{"id": product.id, "name": product.name} for product in reversed(products)]
+
+
+@pytest.mark.asyncio
+async def test_search_served_products_fall_back_to_db_for_partial_documents():
+    # given
+    product = Product.create(code=1, name="NAME", energy_kcal_100g=1.0)
+    await ProductTortoiseRepo.asave(product)
+    search_repo = RankedSearchRepository()
+    await search_repo.acreate_document({"id": product.id.hex})
+    product_service = ProductCrudService(repository=ProductTortoiseRepo, search_repo=search_repo, search_served=True)
+
+    # when
+    result = await product_service.get_all(skip=0, limit=10, query="NAME")
+
+    # then
+    assert [(item.id, item.name) for item in result] == [(product.id, "NAME")]
+
+
+@pytest.mark.asyncio
+async def test_search_products_with_filters_sort_and_facets():
+    # given
+    products = [
+        Product.create(code=code, name=f"NAME_{code}", category=category, energy_kcal_100g=1.0, fat_100g=fat)
+        for code, category, fat in ((1, "dairy", 30.0), (2, "dairy", 3.0), (3, "drinks", 0.5))
+    ]
+    await ProductTortoiseRepo.abulk_save(products)
+    search_repo = ProductEmbeddedSearchEngineRepo()
+    await search_repo.aupsert_documents([_search_document(product, full=True) for product in products])
+    product_service = ProductCrudService(repository=ProductTortoiseRepo, search_repo=search_repo)
+
+    # when
+    lean = await product_service.get_all(skip=0, limit=10, filters=["fat_100g<10"], sort=["fat_100g:asc"])
+    facets = await product_service.get_facets(query="name", facets=["category"], filters=["fat_100g>1"])
+
+    # then
+    assert [product.id for product in lean] == [products[2].id, products[1].id]
+    assert facets == {"category": {"dairy": 2}}
+    with pytest.raises(ValidationError):
+        await product_service.get_all(skip=0, limit=10, filters=["name=NAME_1"])
+    with pytest.raises(ValidationError):
+        await product_service.get_facets(query="", facets=["name"])
+
+
+@pytest.mark.asyncio
+async def test_search_products_filters_fall_back_to_db_when_search_fails():
+    # given
+    class DownSearchRepository(RankedSearchRepository):
+        async def asearch(self, *args, **kwargs):
+            raise ConnectionError("search engine is down")
+
+    products = [
+        Product.create(code=code, name=f"NAME_{code}", energy_kcal_100g=1.0, fat_100g=float(code))
+        for code in range(1, 4)
+    ]
+    await ProductTortoiseRepo.abulk_save(products)
+    product_service = ProductCrudService(repository=ProductTortoiseRepo, search_repo=DownSearchRepository())
+
+    # when
+    result = await product_service.get_all(skip=0, limit=10, filters=["fat_100g>=2"])
+
+    # then
+    assert sorted(product.code for product in result) == [2, 3]
@@ -1,6 +1,7 @@
 import pytest
 import pytest_asyncio
 
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
 from src.modules.product.application.service.product import ProductCrudService
 from src.modules.product.domain.entity.product import Product
 from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
@@ -21,6 +22,7 @@ def recipe_service():
         product_for_recipe_repository=RecipeForProductTortoiseRepo,
         product_service=ProductCrudService(repository=ProductTortoiseRepo),
         search_repo=InMemorySearchRepository(),
+        unit_of_work=TortoiseUnitOfWork(),
     )
 
 
@@ -769,7 +769,7 @@ async def test_recipe_controller_delete_product_user_not_owner(
 
 @pytest.mark.asyncio
 async def test_recipe_create_create_index_in_search_engine(
-    api_client, endpoint_enum, user_token, product_record
+    api_client, endpoint_enum, user_token, product_record, outbox_relay
 ):
     # given
     api_client.set_token(user_token.api_token)
@@ -792,6 +792,7 @@ async def test_recipe_create_create_index_in_search_engine(
         endpoint_enum.RECIPE.value,
         json_data=recipe_input.dict(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
     response_search_first = await api_client.get(
         endpoint_enum.RECIPE.value,
@@ -831,7 +832,7 @@ async def test_recipe_create_create_index_in_search_engine(
 
 @pytest.mark.asyncio
 async def test_recipe_update_create_and_update_index_in_search_engine(
-    api_client, endpoint_enum, user_token, product_record
+    api_client, endpoint_enum, user_token, product_record, outbox_relay
 ):
     # given
     api_client.set_token(user_token.api_token)
@@ -861,6 +862,7 @@ async def test_recipe_update_create_and_update_index_in_search_engine(
         endpoint_enum.RECIPE.value,
         json_data=recipe_input.model_dump_json(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
 
     response_search_first = await api_client.get(
@@ -872,6 +874,7 @@ async def test_recipe_update_create_and_update_index_in_search_engine(
         endpoint_enum.RECIPE.get_detail(recipe_id),
         json_data=recipe_update_input.model_dump_json(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
 
     response_search_second = await api_client.get(
@@ -897,7 +900,7 @@ async def test_recipe_update_create_and_update_index_in_search_engine(
 
 @pytest.mark.asyncio
 async def test_recipe_delete_create_delete_index_in_search_engine(
-    api_client, endpoint_enum, user_token, product_record
+    api_client, endpoint_enum, user_token, product_record, outbox_relay
 ):
     # given
     api_client.set_token(user_token.api_token)
@@ -921,6 +924,7 @@ async def test_recipe_delete_create_delete_index_in_search_engine(
         endpoint_enum.RECIPE.value,
         json_data=recipe_input.model_dump_json(),
     )
+    await outbox_relay.adrain()
     await sleep(1)
 
     response_search_first = await api_client.get(
@@ -932,6 +936,7 @@ async def test_recipe_delete_create_delete_index_in_search_engine(
     response_deleted = await api_client.delete(
         endpoint_enum.RECIPE.get_detail(recipe_id),
     )
+    await outbox_relay.adrain()
     await sleep(1)
 
     response_search_second = await api_client.get(
@@ -1,19 +1,36 @@
+import asyncio
+import json
 from copy import deepcopy
 
 import pytest
 from uuid6 import uuid6
 
-from src.modules.recipe.application.dto.recipe import RecipeInputDto, RecipeUpdateDto
+from src.core.infra.unit_of_work import TortoiseUnitOfWork
+from src.core.utils.encoder import CustomJsonEncoder
+from src.modules.product.application.service.product import ProductCrudService
+from src.modules.product.infra.repo.postgres.product import ProductTortoiseRepo
+from src.modules.recipe.application.dto.recipe import (
+    RecipeInputDto,
+    RecipeOutputDto,
+    RecipeUpdateDto,
+)
 from src.modules.recipe.application.dto.recipe_product import (
     ProductForRecipeInputDto,
     ProductForRecipeUpdateDto,
 )
+from src.modules.recipe.application.service import RecipeService
 from src.modules.recipe.domain.errors import (
+    ProductNotFound,
     RecipeNotFound,
     RecipeNotRecordOwner,
     ProductForRecipeNotRecordOwner,
     ProductForRecipeNotFound,
 )
+from src.modules.recipe.infra.repo.postgres.recipe import RecipeTortoiseRepo
+from src.modules.recipe.infra.repo.postgres.recipe_product import (
+    RecipeForProductTortoiseRepo,
+)
+from tests.integration.conftest import RankedSearchRepository
 
 
 @pytest.mark.asyncio
@@ -148,6 +165,46 @@ async def test_recipe_service_create_multiple_products(
     assert recipe.summary_calories == 37.54
 
 
+@pytest.mark.asyncio
+async def test_recipe_service_concurrent_create_keeps_transactions_apart(
+    recipe_service, user_record, product_record
+):
+    # given
+    valid_input = RecipeInputDto(
+        name="valid",
+        products=[
+            ProductForRecipeInputDto(
+                product_id=product_record.id, weight_in_grams=20.0
+            )
+        ],
+    )
+    invalid_input = RecipeInputDto(
+        name="invalid",
+        products=[
+            ProductForRecipeInputDto(
+                product_id=product_record.id, weight_in_grams=20.0
+            ),
+            ProductForRecipeInputDto(product_id=uuid6(), weight_in_grams=20.0),
+        ],
+    )
+
+    # when
+    valid, invalid = await asyncio.gather(
+        recipe_service.create(user_id=user_record.id, input_dto=valid_input),
+        recipe_service.create(user_id=user_record.id, input_dto=invalid_input),
+        return_exceptions=True,
+    )
+
+    # then
+    assert isinstance(invalid, ProductNotFound)
+    assert valid.name == "valid"
+    assert len(valid.products_for_recipe) == 1
+
+    recipes = await RecipeTortoiseRepo.aget_all()
+    assert [recipe.name for recipe in recipes] == ["valid"]
+    assert len(await RecipeForProductTortoiseRepo.aget_all()) == 1
+
+
 @pytest.mark.asyncio
 async def test_recipe_service_update(recipe_record, recipe_service):
     # given
@@ -450,3 +507,37 @@ async def test_recipe_service_delete_product_from_recipe_wrong_user(
     # when/then
     with pytest.raises(ProductForRecipeNotRecordOwner):
         await recipe_service.delete_product(id=product_for_recipe_id, user_id=uuid6())
+
+
+@pytest.mark.asyncio
+async def test_recipe_service_search_served_from_full_documents(
+    recipe_record_with_products,
+):
+    # given
+    recipe = await RecipeTortoiseRepo.aget_aggregate_by_id(
+        id=recipe_record_with_products.id
+    )
+    search_repo = RankedSearchRepository()
+    await search_repo.acreate_document(
+        json.loads(
+            json.dumps(
+                RecipeTortoiseRepo.to_search_document(recipe, full=True),
+                cls=CustomJsonEncoder,
+            )
+        )
+    )
+    recipe_service = RecipeService(
+        recipe_repository=RecipeTortoiseRepo,
+        product_for_recipe_repository=RecipeForProductTortoiseRepo,
+        product_service=ProductCrudService(repository=ProductTortoiseRepo),
+        search_repo=search_repo,
+        unit_of_work=TortoiseUnitOfWork(),
+        search_served=True,
+    )
+
+    # when
+    recipes = await recipe_service.get_all(query="name")
+
+    # then
+    assert recipes == [RecipeTortoiseRepo.to_dto(recipe, RecipeOutputDto)]
+    assert recipes[0].products_for_recipe